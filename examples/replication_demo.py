@@ -0,0 +1,164 @@
+"""
+Two in-process nodes: a peer serving its audit log, a follower mirroring it.
+
+    PYTHONPATH=icn-node python examples/replication_demo.py
+
+The peer is the ICN app on a scratch SQLite file (called through ASGI, no
+sockets); the follower writes its mirror to a second SQLite file. The demo
+syncs, rewrites one mirrored entry to show Merkle anti-entropy locating it in
+a few round trips, repairs it, then tampers with the peer's own log.
+
+Every step is checked; the script exits 1 on the first failed check, so it
+doubles as an end-to-end test of replication.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+WORK = tempfile.mkdtemp(prefix="icn-replication-")
+PEER_DB = os.path.join(WORK, "peer.db")
+FOLLOWER_DB = os.path.join(WORK, "follower.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{PEER_DB}"
+
+import httpx  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+from app.db import AsyncSessionFactory, Base, create_engines, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Org  # noqa: E402
+from app.services.replication import Diverged, Follower, ReplicationError  # noqa: E402
+from app.utils.crypto import generate_keypair, sign_data  # noqa: E402
+
+INVOICES = 300
+ENTRIES = INVOICES + 2  # plus one transition and one attestation
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def check(ok, what):
+    if not ok:
+        raise CheckFailed(what)
+    print("  ok:", what)
+
+
+async def signed_post(client, path, body, urn, priv, idem=None):
+    headers = {"Content-Type": "application/json", "X-Key-Id": urn, "X-Signature": sign_data(body, priv)}
+    if idem:
+        headers["Idempotency-Key"] = idem
+    r = await client.post(path, content=json.dumps(body), headers=headers)
+    r.raise_for_status()
+    return r.json()
+
+
+async def main():
+    # Peer node: schema, two orgs, invoices, a transition and an attestation
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    keys = {}
+    async with AsyncSessionFactory() as s:
+        for urn in ("urn:coop:bakery", "urn:coop:grocer"):
+            pub, priv = generate_keypair()
+            keys[urn] = priv
+            s.add(Org(urn=urn, name=urn, public_key=pub, org_metadata={}))
+        await s.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://peer") as peer:
+        ids = []
+        for i in range(INVOICES):
+            body = {
+                "from_org": "urn:coop:bakery",
+                "to_org": "urn:coop:grocer",
+                "lines": [{"sku": "bread", "qty": 10 + i, "unit": "loaf", "unit_price": 3.0}],
+                "total": 3.0 * (10 + i),
+                "terms": {},
+                "signatures": [],
+            }
+            created = await signed_post(peer, "/invoices", body, "urn:coop:bakery", keys["urn:coop:bakery"], f"demo-{i}")
+            ids.append(created["id"])
+        await signed_post(peer, f"/invoices/{ids[0]}/accept", {}, "urn:coop:grocer", keys["urn:coop:grocer"])
+        await signed_post(
+            peer,
+            "/attestations",
+            {
+                "subject_type": "invoice",
+                "subject_id": str(ids[0]),
+                "claims": [{"claim": "quantity_verified", "value": {"received": 10}, "confidence": 1.0}],
+                "weight": 1.0,
+            },
+            "urn:coop:grocer",
+            keys["urn:coop:grocer"],
+        )
+        head = (await peer.get("/replication/head")).json()
+        print("peer head:", head)
+        check(head["id"] == ENTRIES, f"peer log holds {ENTRIES} entries")
+
+        # Follower node: its own database, mirroring the peer
+        follower_read, follower_write = create_engines(f"sqlite+aiosqlite:///{FOLLOWER_DB}")
+        async with follower_write.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(bind=follower_write, expire_on_commit=False)
+        follower = Follower(peer, sessions, "peer", batch=100)
+
+        result = await follower.sync()
+        print(f"sync: applied {result.applied} in {result.requests} requests, mirror head id {result.head_id}")
+        check(result.applied == ENTRIES and result.head_id == head["id"], "sync mirrors every entry")
+        last = sqlite3.connect(FOLLOWER_DB).execute(
+            "select id, op_type, entity_type, payload from mirrored_audit_log order by id desc limit 2"
+        ).fetchall()
+        for row in last:
+            print("  mirrored", row[0], row[1], row[2], json.loads(row[3]))
+        check([(r[1], r[2]) for r in last] == [("create", "attestation"), ("accept", "invoice")], "newest entries are the attestation and the transition")
+        check(all(json.loads(r[3]) for r in last), "entity payloads are mirrored")
+        stored = sqlite3.connect(FOLLOWER_DB).execute("select count(*) from audit_payloads").fetchone()[0]
+        check(stored == ENTRIES, "canonical payloads are stored by the follower")
+
+        # Corrupt one mirrored entry: pulls still succeed, anti-entropy finds it
+        db = sqlite3.connect(FOLLOWER_DB)
+        db.execute("update mirrored_audit_log set row_hash = 'ff' || substr(row_hash, 3) where id = 123")
+        db.commit()
+        follower.round_trips = 0
+        at = await follower.find_divergence()
+        print(f"check: first divergent id {at} after {follower.round_trips} digest requests over {result.head_id} entries")
+        check(at == 123 and follower.round_trips <= 3, "anti-entropy finds id 123 in at most 3 digest requests")
+        await follower.truncate(123)
+        result = await follower.sync()
+        at = await follower.find_divergence()
+        print(f"repaired: re-pulled {result.applied}; divergent id now {at}")
+        check(result.applied == ENTRIES - 122 and at is None, "repair re-pulls from id 123 and the mirror matches")
+
+        # Rewrite the peer's newest entry: the mirror head becomes unknown to the peer
+        db = sqlite3.connect(PEER_DB)
+        db.execute("update audit_log set row_hash = 'ee' || substr(row_hash, 3) where id = (select max(id) from audit_log)")
+        db.commit()
+        raised = None
+        try:
+            await follower.sync()
+        except Diverged as exc:
+            print("sync without repair:", exc)
+            raised = exc
+        check(isinstance(raised, Diverged), "sync raises Diverged once the peer rewrote its head")
+        raised = None
+        try:
+            await follower.sync(repair=True)
+        except ReplicationError as exc:
+            print("sync with repair: peer chain rejected:", exc)
+            raised = exc
+        check(isinstance(raised, ReplicationError), "repair rejects the tampered peer chain")
+
+        await follower_read.dispose()
+        await follower_write.dispose()
+    print("databases in", WORK)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except CheckFailed as exc:
+        print("FAILED:", exc)
+        sys.exit(1)
@@ -51,6 +51,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=url is not None and url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -62,7 +63,12 @@ def run_migrations_online() -> None:
     connectable = engine
 
     def do_run(connection):
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite can't ALTER most constraints/columns in place; batch mode recreates the table
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
         with context.begin_transaction():
             context.run_migrations()
 
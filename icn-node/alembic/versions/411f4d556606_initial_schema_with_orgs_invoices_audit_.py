@@ -30,7 +30,7 @@ def upgrade() -> None:
     sa.Column('entity_id', sa.String(length=255), nullable=False),
     sa.Column('payload_hash', sa.String(length=128), nullable=False),
     sa.Column('signature', sa.String(length=1024), nullable=True),
-    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index('ix_audit_entity', 'audit_log', ['entity_type', 'entity_id'], unique=False)
@@ -45,7 +45,7 @@ def upgrade() -> None:
     sa.Column('merkle_root', sa.String(length=128), nullable=False),
     sa.Column('prev_checkpoint_hash', sa.String(length=128), nullable=True),
     sa.Column('signature', sa.String(length=1024), nullable=False),
-    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_checkpoints_date'), 'checkpoints', ['date'], unique=False)
@@ -55,7 +55,7 @@ def upgrade() -> None:
     sa.Column('name', sa.String(length=255), nullable=False),
     sa.Column('public_key', sa.String(length=512), nullable=False),
     sa.Column('metadata', sa.JSON(), nullable=False),
-    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_orgs_urn'), 'orgs', ['urn'], unique=True)
@@ -67,7 +67,7 @@ def upgrade() -> None:
     sa.Column('claims', sa.JSON(), nullable=False),
     sa.Column('weight', sa.Float(), nullable=False),
     sa.Column('signature', sa.String(length=1024), nullable=False),
-    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     sa.ForeignKeyConstraint(['attestor_org_id'], ['orgs.id'], ondelete='RESTRICT'),
     sa.PrimaryKeyConstraint('id')
     )
@@ -87,7 +87,7 @@ def upgrade() -> None:
     sa.Column('signatures', sa.JSON(), nullable=False),
     sa.Column('prev_hash', sa.String(length=128), nullable=True),
     sa.Column('row_hash', sa.String(length=128), nullable=True),
-    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     sa.ForeignKeyConstraint(['from_org_id'], ['orgs.id'], ondelete='RESTRICT'),
     sa.ForeignKeyConstraint(['to_org_id'], ['orgs.id'], ondelete='RESTRICT'),
     sa.PrimaryKeyConstraint('id'),
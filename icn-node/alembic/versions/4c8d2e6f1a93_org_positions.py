@@ -0,0 +1,64 @@
+"""org positions
+
+Revision ID: 4c8d2e6f1a93
+Revises: e2f7a4c9b108
+Create Date: 2026-10-18 18:12:37.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8d2e6f1a93'
+down_revision: Union[str, Sequence[str], None] = 'e2f7a4c9b108'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('org_balances',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('receivable_cents', sa.BigInteger(), nullable=False),
+    sa.Column('payable_cents', sa.BigInteger(), nullable=False),
+    sa.Column('open_invoices', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    op.create_table('org_positions',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('counterparty_id', sa.Integer(), nullable=False),
+    sa.Column('receivable_cents', sa.BigInteger(), nullable=False),
+    sa.Column('payable_cents', sa.BigInteger(), nullable=False),
+    sa.Column('open_invoices', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['counterparty_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id', 'counterparty_id')
+    )
+    op.create_table('position_journal',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=True),
+    sa.Column('receivable_delta', sa.BigInteger(), nullable=False),
+    sa.Column('payable_delta', sa.BigInteger(), nullable=False),
+    sa.Column('receivable_cents', sa.BigInteger(), nullable=False),
+    sa.Column('payable_cents', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_position_journal_org_id_created_at', 'position_journal', ['org_id', 'created_at'], unique=False)
+    op.create_index('ix_position_journal_created_at', 'position_journal', ['created_at'], unique=False)
+    # Existing open invoices are folded in with `python -m app.reconcile_positions --fix`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_position_journal_created_at', table_name='position_journal')
+    op.drop_index('ix_position_journal_org_id_created_at', table_name='position_journal')
+    op.drop_table('position_journal')
+    op.drop_table('org_positions')
+    op.drop_table('org_balances')
@@ -0,0 +1,35 @@
+"""audit watermarks
+
+Revision ID: 5e2b8d41a7c0
+Revises: c3a1f7d2b9e4
+Create Date: 2026-10-18 10:03:17.902431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8d41a7c0'
+down_revision: Union[str, Sequence[str], None] = 'c3a1f7d2b9e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_watermarks',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('verified_up_to_id', sa.Integer(), nullable=False),
+    sa.Column('row_hash', sa.String(length=128), nullable=True),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_watermarks')
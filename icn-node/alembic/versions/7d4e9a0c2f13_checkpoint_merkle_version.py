@@ -0,0 +1,29 @@
+"""checkpoint merkle version
+
+Revision ID: 7d4e9a0c2f13
+Revises: 5e2b8d41a7c0
+Create Date: 2026-10-18 11:26:40.318552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e9a0c2f13'
+down_revision: Union[str, Sequence[str], None] = '5e2b8d41a7c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing checkpoints were built with the legacy hex-concat encoding (v1)
+    op.add_column('checkpoints', sa.Column('merkle_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('checkpoints', 'merkle_version')
@@ -0,0 +1,73 @@
+"""invoice status events
+
+Revision ID: 9a3f5b7c1d24
+Revises: 4c8d2e6f1a93
+Create Date: 2026-10-18 19:26:03.881540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3f5b7c1d24'
+down_revision: Union[str, Sequence[str], None] = '4c8d2e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    events = op.create_table('invoice_status_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('previous_status', sa.String(length=32), nullable=True),
+    sa.Column('actor', sa.String(length=255), nullable=True),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('row_hash', sa.String(length=128), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('invoice_id', 'seq', name='uq_invoice_status_events_invoice_id_seq')
+    )
+    op.create_index('ix_invoice_status_events_status_created_at', 'invoice_status_events', ['status', 'created_at'], unique=False)
+
+    # Backfill from the status_history JSON written at creation time
+    invoices = sa.table(
+        'invoices',
+        sa.column('id', sa.Integer()),
+        sa.column('status_history', sa.JSON()),
+        sa.column('row_hash', sa.String()),
+        sa.column('created_at', sa.DateTime(timezone=True)),
+    )
+    conn = op.get_bind()
+    rows = []
+    for inv in conn.execute(sa.select(invoices).order_by(invoices.c.id)):
+        previous = None
+        for seq, entry in enumerate(inv.status_history or [], start=1):
+            rows.append({
+                'invoice_id': inv.id,
+                'seq': seq,
+                'status': entry.get('status'),
+                'previous_status': previous,
+                'actor': entry.get('by'),
+                'note': None,
+                'row_hash': inv.row_hash if seq == 1 else None,
+                'created_at': inv.created_at,
+            })
+            previous = entry.get('status')
+        if len(rows) >= 10000:
+            op.bulk_insert(events, rows)
+            rows = []
+    if rows:
+        op.bulk_insert(events, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoice_status_events_status_created_at', table_name='invoice_status_events')
+    op.drop_table('invoice_status_events')
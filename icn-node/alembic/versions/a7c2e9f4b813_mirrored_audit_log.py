@@ -0,0 +1,42 @@
+"""mirrored audit log
+
+Revision ID: a7c2e9f4b813
+Revises: f3b8e1d6c492
+Create Date: 2026-10-19 10:42:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e9f4b813'
+down_revision: Union[str, Sequence[str], None] = 'f3b8e1d6c492'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('mirrored_audit_log',
+    sa.Column('peer', sa.String(length=255), nullable=False),
+    sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('prev_hash', sa.String(length=128), nullable=True),
+    sa.Column('row_hash', sa.String(length=128), nullable=False),
+    sa.Column('op_type', sa.String(length=64), nullable=False),
+    sa.Column('entity_type', sa.String(length=64), nullable=False),
+    sa.Column('entity_id', sa.String(length=255), nullable=False),
+    sa.Column('payload_hash', sa.String(length=128), nullable=False),
+    sa.Column('signature', sa.String(length=1024), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('peer', 'id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('mirrored_audit_log')
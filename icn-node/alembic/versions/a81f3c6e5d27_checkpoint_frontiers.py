@@ -0,0 +1,40 @@
+"""checkpoint frontiers
+
+Revision ID: a81f3c6e5d27
+Revises: 7d4e9a0c2f13
+Create Date: 2026-10-18 12:48:05.611934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81f3c6e5d27'
+down_revision: Union[str, Sequence[str], None] = '7d4e9a0c2f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Frontiers are created lazily: the first append of a day (or a checkpoint
+    # request) rebuilds that day's row from audit_log.
+    op.create_table('checkpoint_frontiers',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('merkle_version', sa.Integer(), nullable=False),
+    sa.Column('leaf_count', sa.Integer(), nullable=False),
+    sa.Column('peaks', sa.LargeBinary(), nullable=False),
+    sa.Column('last_row_hash', sa.String(length=128), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_index(op.f('ix_audit_log_timestamp'), 'audit_log', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_audit_log_timestamp'), table_name='audit_log')
+    op.drop_table('checkpoint_frontiers')
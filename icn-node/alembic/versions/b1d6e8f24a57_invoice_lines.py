@@ -0,0 +1,121 @@
+"""invoice lines
+
+Revision ID: b1d6e8f24a57
+Revises: 9a3f5b7c1d24
+Create Date: 2026-10-18 20:48:19.640125
+
+"""
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1d6e8f24a57'
+down_revision: Union[str, Sequence[str], None] = '9a3f5b7c1d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_CHUNK = 5000
+
+
+def _decimal(value):
+    # Same rules as app.services.invoice_lines.to_decimal (kept local: migrations
+    # must not change behaviour when app code does)
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        d = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+    return d if d.is_finite() else None
+
+
+def _fit(value, precision, scale):
+    # Same rules as app.services.invoice_lines.fit: NULL rather than overflow the column
+    if value is None:
+        return None
+    try:
+        d = value.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_EVEN)
+    except InvalidOperation:
+        return None
+    return d if d.adjusted() < precision - scale else None
+
+
+def _text(value, size):
+    return None if value is None else str(value)[:size]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    lines = op.create_table('invoice_lines',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('line_no', sa.Integer(), nullable=False),
+    sa.Column('from_org_id', sa.Integer(), nullable=False),
+    sa.Column('to_org_id', sa.Integer(), nullable=False),
+    sa.Column('sku', sa.String(length=255), nullable=True),
+    sa.Column('unit', sa.String(length=64), nullable=True),
+    sa.Column('qty', sa.Numeric(precision=18, scale=4), nullable=True),
+    sa.Column('unit_price', sa.Numeric(precision=18, scale=4), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['from_org_id'], ['orgs.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['to_org_id'], ['orgs.id'], ondelete='RESTRICT'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Backfill from invoices.lines, streamed in id order so memory stays flat
+    invoices = sa.table(
+        'invoices',
+        sa.column('id', sa.Integer()),
+        sa.column('from_org_id', sa.Integer()),
+        sa.column('to_org_id', sa.Integer()),
+        sa.column('lines', sa.JSON()),
+        sa.column('created_at', sa.DateTime(timezone=True)),
+    )
+    conn = op.get_bind()
+    result = conn.execution_options(stream_results=True, yield_per=BACKFILL_CHUNK).execute(
+        sa.select(invoices).order_by(invoices.c.id)
+    )
+    for part in result.partitions():
+        rows = []
+        for inv in part:
+            for line_no, line in enumerate(inv.lines or [], start=1):
+                if not isinstance(line, dict):
+                    continue
+                qty, price = _decimal(line.get('qty')), _decimal(line.get('unit_price'))
+                amount = qty * price if qty is not None and price is not None else _decimal(line.get('amount'))
+                rows.append({
+                    'invoice_id': inv.id,
+                    'line_no': line_no,
+                    'from_org_id': inv.from_org_id,
+                    'to_org_id': inv.to_org_id,
+                    'sku': _text(line.get('sku'), 255),
+                    'unit': _text(line.get('unit'), 64),
+                    'qty': _fit(qty, 18, 4),
+                    'unit_price': _fit(price, 18, 4),
+                    'amount': _fit(amount, 18, 2),
+                    'created_at': inv.created_at,
+                })
+        if rows:
+            op.bulk_insert(lines, rows)
+
+    # Indexes after the backfill: one sort each instead of per-row maintenance
+    op.create_index(op.f('ix_invoice_lines_invoice_id'), 'invoice_lines', ['invoice_id'], unique=False)
+    op.create_index('ix_invoice_lines_sku_created_at', 'invoice_lines', ['sku', 'created_at'], unique=False)
+    op.create_index('ix_invoice_lines_from_org_id_sku', 'invoice_lines', ['from_org_id', 'sku'], unique=False)
+    op.create_index('ix_invoice_lines_to_org_id_sku', 'invoice_lines', ['to_org_id', 'sku'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoice_lines_to_org_id_sku', table_name='invoice_lines')
+    op.drop_index('ix_invoice_lines_from_org_id_sku', table_name='invoice_lines')
+    op.drop_index('ix_invoice_lines_sku_created_at', table_name='invoice_lines')
+    op.drop_index(op.f('ix_invoice_lines_invoice_id'), table_name='invoice_lines')
+    op.drop_table('invoice_lines')
@@ -0,0 +1,42 @@
+"""trust edges
+
+Revision ID: b6c0d93e41f8
+Revises: a81f3c6e5d27
+Create Date: 2026-10-18 14:02:51.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c0d93e41f8'
+down_revision: Union[str, Sequence[str], None] = 'a81f3c6e5d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trust_edges',
+    sa.Column('from_org_id', sa.Integer(), nullable=False),
+    sa.Column('to_org_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_count', sa.Integer(), nullable=False),
+    sa.Column('total_sum', sa.Float(), nullable=False),
+    sa.Column('direct_weighted', sa.Float(), nullable=False),
+    sa.Column('attestation_count', sa.Integer(), nullable=False),
+    sa.Column('attest_weighted', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['from_org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['to_org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('from_org_id', 'to_org_id')
+    )
+    op.create_index('ix_trust_edges_to_org_id', 'trust_edges', ['to_org_id'], unique=False)
+    # Existing invoices/attestations are folded in with `python -m app.rebuild_trust`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trust_edges_to_org_id', table_name='trust_edges')
+    op.drop_table('trust_edges')
@@ -0,0 +1,55 @@
+"""keyset pagination indexes
+
+Revision ID: c3a1f7d2b9e4
+Revises: 89be20d17e70
+Create Date: 2026-10-18 09:12:44.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a1f7d2b9e4'
+down_revision: Union[str, Sequence[str], None] = '89be20d17e70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listings filter on these columns and then walk `id DESC`; with `id` as the
+    # trailing key a page is a single index range scan at any depth.
+    op.create_index('ix_invoices_from_to_id', 'invoices', ['from_org_id', 'to_org_id', 'id'], unique=False)
+    op.create_index('ix_invoices_from_org_id_id', 'invoices', ['from_org_id', 'id'], unique=False)
+    op.create_index('ix_invoices_to_org_id_id', 'invoices', ['to_org_id', 'id'], unique=False)
+    op.create_index('ix_invoices_status_id', 'invoices', ['status', 'id'], unique=False)
+    op.create_index('ix_attestations_subject_id_id', 'attestations', ['subject_id', 'id'], unique=False)
+    op.create_index('ix_attestations_attestor_org_id_id', 'attestations', ['attestor_org_id', 'id'], unique=False)
+
+    # Superseded: each is a prefix of one of the composites above
+    op.drop_index('ix_invoices_from_to', table_name='invoices')
+    op.drop_index(op.f('ix_invoices_from_org_id'), table_name='invoices')
+    op.drop_index(op.f('ix_invoices_to_org_id'), table_name='invoices')
+    op.drop_index(op.f('ix_invoices_status'), table_name='invoices')
+    op.drop_index(op.f('ix_attestations_subject_id'), table_name='attestations')
+    op.drop_index(op.f('ix_attestations_attestor_org_id'), table_name='attestations')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_attestations_attestor_org_id'), 'attestations', ['attestor_org_id'], unique=False)
+    op.create_index(op.f('ix_attestations_subject_id'), 'attestations', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_invoices_status'), 'invoices', ['status'], unique=False)
+    op.create_index(op.f('ix_invoices_to_org_id'), 'invoices', ['to_org_id'], unique=False)
+    op.create_index(op.f('ix_invoices_from_org_id'), 'invoices', ['from_org_id'], unique=False)
+    op.create_index('ix_invoices_from_to', 'invoices', ['from_org_id', 'to_org_id'], unique=False)
+
+    op.drop_index('ix_attestations_attestor_org_id_id', table_name='attestations')
+    op.drop_index('ix_attestations_subject_id_id', table_name='attestations')
+    op.drop_index('ix_invoices_status_id', table_name='invoices')
+    op.drop_index('ix_invoices_to_org_id_id', table_name='invoices')
+    op.drop_index('ix_invoices_from_org_id_id', table_name='invoices')
+    op.drop_index('ix_invoices_from_to_id', table_name='invoices')
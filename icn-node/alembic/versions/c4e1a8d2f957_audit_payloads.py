@@ -0,0 +1,39 @@
+"""audit payloads
+
+Revision ID: c4e1a8d2f957
+Revises: a7c2e9f4b813
+Create Date: 2026-10-19 14:05:51.630917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a8d2f957'
+down_revision: Union[str, Sequence[str], None] = 'a7c2e9f4b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_payloads',
+    sa.Column('payload_hash', sa.String(length=64), nullable=False),
+    sa.Column('raw_size', sa.Integer(), nullable=False),
+    sa.Column('stored_size', sa.Integer(), nullable=False),
+    sa.Column('dict_id', sa.BigInteger(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=True),
+    sa.Column('segment', sa.Integer(), nullable=True),
+    sa.Column('segment_offset', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('payload_hash')
+    )
+    # Entries appended before this revision have no stored payload (only payload_hash)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_payloads')
@@ -0,0 +1,35 @@
+"""invoice status filter indexes
+
+Revision ID: d1e58a144b71
+Revises: c4e1a8d2f957
+Create Date: 2026-10-20 10:41:07.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e58a144b71'
+down_revision: Union[str, Sequence[str], None] = 'c4e1a8d2f957'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listings that combine `status` with org filters; without these they walk the
+    # org's (or pair's) id index and filter on status, so a rare status for a busy
+    # org costs a scan of its whole history.
+    op.create_index('ix_invoices_from_status_id', 'invoices', ['from_org_id', 'status', 'id'], unique=False)
+    op.create_index('ix_invoices_to_status_id', 'invoices', ['to_org_id', 'status', 'id'], unique=False)
+    op.create_index('ix_invoices_from_to_status_id', 'invoices', ['from_org_id', 'to_org_id', 'status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoices_from_to_status_id', table_name='invoices')
+    op.drop_index('ix_invoices_to_status_id', table_name='invoices')
+    op.drop_index('ix_invoices_from_status_id', table_name='invoices')
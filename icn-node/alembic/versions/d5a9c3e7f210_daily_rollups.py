@@ -0,0 +1,45 @@
+"""daily rollups
+
+Revision ID: d5a9c3e7f210
+Revises: b1d6e8f24a57
+Create Date: 2026-10-18 22:05:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9c3e7f210'
+down_revision: Union[str, Sequence[str], None] = 'b1d6e8f24a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('invoices_issued', sa.Integer(), nullable=False),
+    sa.Column('invoices_received', sa.Integer(), nullable=False),
+    sa.Column('value_issued_cents', sa.BigInteger(), nullable=False),
+    sa.Column('value_received_cents', sa.BigInteger(), nullable=False),
+    sa.Column('attestations_made', sa.Integer(), nullable=False),
+    sa.Column('disputes_issued', sa.Integer(), nullable=False),
+    sa.Column('disputes_received', sa.Integer(), nullable=False),
+    sa.Column('settlements_issued', sa.Integer(), nullable=False),
+    sa.Column('settlements_received', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'org_id')
+    )
+    op.create_index('ix_daily_rollups_org_id_day', 'daily_rollups', ['org_id', 'day'], unique=False)
+    # History is folded in with `python -m app.backfill_rollups`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_rollups_org_id_day', table_name='daily_rollups')
+    op.drop_table('daily_rollups')
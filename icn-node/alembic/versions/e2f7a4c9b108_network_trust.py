@@ -0,0 +1,36 @@
+"""network trust
+
+Revision ID: e2f7a4c9b108
+Revises: b6c0d93e41f8
+Create Date: 2026-10-18 16:40:12.518903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f7a4c9b108'
+down_revision: Union[str, Sequence[str], None] = 'b6c0d93e41f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('network_trust',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('raw', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    # Populated by `python -m app.compute_network_trust`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('network_trust')
@@ -0,0 +1,63 @@
+"""
+Report payload store size and verify stored payloads against their hashes.
+
+    python -m app.check_payloads              # stats, then re-hash every stored payload; exit 1 on corruption
+    python -m app.check_payloads --stats      # stats only (cost per million audit entries)
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import select
+
+from .db import AsyncSessionFactory
+from .models import AuditPayload
+from .services.payload_store import PayloadCorrupt, payload_store
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with AsyncSessionFactory() as session:
+        print(json.dumps(await payload_store.stats(session), indent=2))
+        if args.stats:
+            return 0
+        started = time.perf_counter()
+        checked, corrupt, last = 0, [], ""
+        while True:
+            hashes = list(
+                (
+                    await session.execute(
+                        select(AuditPayload.payload_hash)
+                        .where(AuditPayload.payload_hash > last)
+                        .order_by(AuditPayload.payload_hash)
+                        .limit(args.batch)
+                    )
+                ).scalars()
+            )
+            if not hashes:
+                break
+            try:
+                await payload_store.get_many(session, hashes)
+            except PayloadCorrupt:
+                # Narrow the failing batch down to its corrupt payloads
+                for h in hashes:
+                    try:
+                        await payload_store.get(session, h)
+                    except PayloadCorrupt:
+                        corrupt.append(h)
+            checked += len(hashes)
+            last = hashes[-1]
+    for h in corrupt[:50]:
+        print(f"corrupt: {h}")
+    print(f"verified {checked} payloads in {time.perf_counter() - started:.1f}s, {len(corrupt)} corrupt")
+    return 1 if corrupt else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stats", action="store_true", help="print stats without verifying payloads")
+    parser.add_argument("--batch", type=int, default=1000, help="payloads read per query")
+    sys.exit(asyncio.run(main(parser.parse_args())))
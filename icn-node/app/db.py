@@ -1,10 +1,49 @@
+"""
+Async SQLAlchemy engines and sessions.
+
+Backends (chosen by `DATABASE_URL`)
+- Postgres (`postgresql+asyncpg://...`, the default): one pooled engine;
+  `write_engine` is the same engine.
+- SQLite (`sqlite+aiosqlite:///path/to/icn.db`) for single-node deployments
+  (PRD §4 Phase 0) without a database server:
+  - WAL journal, so readers never block the writer and the writer never
+    blocks readers; `synchronous=NORMAL` (`SQLITE_SYNCHRONOUS=FULL` to fsync
+    every commit), a busy timeout, foreign keys on, a 64 MiB page cache and
+    memory-mapped reads.
+  - `engine` is a pool of read connections (`SQLITE_READ_POOL_SIZE`, default 4).
+  - `write_engine` holds exactly one connection and opens transactions with
+    `BEGIN IMMEDIATE`. The audit appender, which performs every chained
+    write, runs on it, so chain writes never wait on a lock upgrade.
+  - An in-memory URL (`sqlite+aiosqlite://`) becomes a named shared-cache
+    database with the same read pool and writer. Its readers run
+    `read_uncommitted`, because shared-cache table locks fail at once instead
+    of waiting: reads may see a batch the writer has yet to commit.
+
+Postgres pool tuning (env)
+- `DB_POOL_SIZE` (5), `DB_MAX_OVERFLOW` (10), `DB_POOL_TIMEOUT` seconds (30),
+  `DB_POOL_RECYCLE` seconds (1800), `DB_POOL_PRE_PING` (1: test a connection
+  before handing it out, so a restarted server or a failover costs one retry,
+  not a 500).
+- `DB_STATEMENT_CACHE_SIZE` (500, asyncpg only): prepared statements cached
+  per connection. Set 0 behind PgBouncer in transaction pooling mode.
+
+Read replicas
+- `DATABASE_REPLICA_URLS` (comma-separated) builds read-only engines with
+  `create_replica_engine`; `services.replicas` routes read-only routes to them.
+"""
 from __future__ import annotations
 
 import os
-from typing import AsyncGenerator
+import uuid
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Sequence
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .utils.metrics import instrument_engine
 
 
 # Base declarative class used by all ORM models
@@ -19,13 +58,115 @@ def get_database_url() -> str:
     )
 
 
-# Async SQLAlchemy engine and session factory
-engine = create_async_engine(get_database_url(), echo=False, future=True)
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _pool_options(url: str) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "no"),
+    }
+    if make_url(url).get_driver_name() == "asyncpg":
+        # SQLAlchemy's prepared statement LRU and asyncpg's own statement cache (asyncpg-only arguments)
+        statements = _env_int("DB_STATEMENT_CACHE_SIZE", 500)
+        options["connect_args"] = {"prepared_statement_cache_size": statements, "statement_cache_size": statements}
+    return options
+
+
+def _sqlite_pragmas() -> tuple[tuple[str, Any], ...]:
+    return (
+        ("journal_mode", "WAL"),
+        ("synchronous", os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")),
+        ("busy_timeout", int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))),
+        ("foreign_keys", "ON"),
+        ("temp_store", "MEMORY"),
+        ("cache_size", -65536),  # KiB
+        ("mmap_size", 256 * 1024 * 1024),
+    )
+
+
+def _configure_sqlite(engine: AsyncEngine, begin: str, read_only: bool = False, memory: bool = False) -> None:
+    pragmas = _sqlite_pragmas() + ((("query_only", "ON"),) if read_only else ())
+    if memory:
+        # Shared-cache connections lock per table and fail at once (SQLITE_LOCKED, no busy
+        # timeout) on conflict; readers that take no table locks never conflict with the writer.
+        pragmas += (("read_uncommitted", "ON"),)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (the driver would defer it to the first write)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql(begin)
+
+
+def create_engines(url: str) -> tuple[AsyncEngine, AsyncEngine]:
+    """(read engine, write engine) for `url`; the same engine unless it is a SQLite file."""
+    if not is_sqlite(url):
+        engine = create_async_engine(url, echo=False, future=True, **_pool_options(url))
+        instrument_engine(engine)
+        return engine, engine
+    memory = url.rstrip("/").endswith(("sqlite+aiosqlite:", ":memory:"))
+    if memory:
+        # A named shared-cache database, so the read pool and the writer see the same data
+        url = f"sqlite+aiosqlite:///file:icn-{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true"
+    readers = _env_int("SQLITE_READ_POOL_SIZE", 4)
+    # An explicit queue pool: SQLAlchemy would pick StaticPool for a memory URL
+    read = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=readers, max_overflow=readers)
+    write = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0)
+    _configure_sqlite(read, "BEGIN", memory=memory)
+    _configure_sqlite(write, "BEGIN IMMEDIATE", memory=memory)
+    instrument_engine(read)
+    instrument_engine(write)
+    return read, write
+
+
+def create_replica_engine(url: str) -> AsyncEngine:
+    """A read engine for a replica; SQLite replica files are opened query-only."""
+    if not is_sqlite(url):
+        engine = create_async_engine(url, echo=False, future=True, **_pool_options(url))
+    else:
+        readers = _env_int("SQLITE_READ_POOL_SIZE", 4)
+        engine = create_async_engine(url, pool_size=readers, max_overflow=readers)
+        _configure_sqlite(engine, "BEGIN", read_only=True)
+    instrument_engine(engine)
+    return engine
+
+
+def replica_urls() -> list[str]:
+    return [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+
+
+# Async SQLAlchemy engines and session factories
+engine, write_engine = create_engines(get_database_url())
 AsyncSessionFactory = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,
     class_=AsyncSession,
 )
+# Sessions on the single writer connection (SQLite); the shared pool elsewhere
+WriteSessionFactory = async_sessionmaker(
+    bind=write_engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -34,3 +175,74 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def upsert_increment(
+    session: AsyncSession,
+    model: Any,
+    rows: Sequence[dict[str, Any]],
+    key_columns: Sequence[str],
+    increment_columns: Sequence[str],
+) -> None:
+    """Insert `rows`, or add their `increment_columns` onto existing rows.
+
+    One `INSERT ... ON CONFLICT (keys) DO UPDATE SET c = c + excluded.c` for the
+    whole list (Postgres and SQLite). Keys must be unique within `rows`; callers
+    pre-aggregate, since one statement can't update the same row twice.
+    """
+    if not rows:
+        return
+    stmt = _upsert_statement(session.bind.dialect.name, model, tuple(key_columns), tuple(increment_columns))
+    await session.execute(stmt, list(rows))
+
+
+def _dialect_insert(dialect: str) -> Any:
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
+    return insert
+
+
+@lru_cache(maxsize=None)
+def _upsert_statement(dialect: str, model: Any, key_columns: tuple[str, ...], increment_columns: tuple[str, ...]) -> Any:
+    # Built once per shape: constructing the ON CONFLICT clause costs more than executing it on SQLite
+    stmt = _dialect_insert(dialect)(model)
+    return stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={c: getattr(model, c) + stmt.excluded[c] for c in increment_columns},
+    )
+
+
+@lru_cache(maxsize=None)
+def _insert_ignore_statement(dialect: str, model: Any, key_columns: tuple[str, ...]) -> Any:
+    return _dialect_insert(dialect)(model).on_conflict_do_nothing(index_elements=list(key_columns))
+
+
+async def insert_ignore(
+    session: AsyncSession,
+    model: Any,
+    rows: Sequence[dict[str, Any]],
+    key_columns: Sequence[str],
+) -> None:
+    """Insert `rows`, skipping those whose keys already exist (`ON CONFLICT DO NOTHING`)."""
+    if not rows:
+        return
+    stmt = _insert_ignore_statement(session.bind.dialect.name, model, tuple(key_columns))
+    await session.execute(stmt, list(rows))
+
+
+async def lock_for_rebuild(session: AsyncSession, *models: Any) -> None:
+    """Hold off every other writer to `models` until this transaction ends.
+
+    Postgres: `LOCK TABLE ... IN EXCLUSIVE MODE` waits for in-flight writers
+    to commit and blocks new INSERT/UPDATE (plain reads still run), so a
+    rebuild's read-then-replace cannot drop a concurrent hook's increment.
+    SQLite rebuilds run on the writer connection, whose `BEGIN IMMEDIATE`
+    already excludes every other writer.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return
+    preparer = session.bind.dialect.identifier_preparer
+    tables = ", ".join(preparer.format_table(m.__table__) for m in models)
+    await session.execute(text(f"LOCK TABLE {tables} IN EXCLUSIVE MODE"))
@@ -0,0 +1,67 @@
+"""
+Mirror a peer node's audit log into `mirrored_audit_log`.
+
+    python -m app.follow_peer http://peer:8000              # pull until caught up
+    python -m app.follow_peer http://peer:8000 --follow     # keep polling every --interval seconds
+    python -m app.follow_peer http://peer:8000 --check      # anti-entropy only: report the first divergent id
+    python -m app.follow_peer http://peer:8000 --repair     # on divergence, cut the mirror there and re-pull
+
+Exits 1 when the mirror and the peer diverge (and --repair is not given).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from .db import WriteSessionFactory
+from .services.replication import Diverged, Follower, ReplicationError
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with httpx.AsyncClient(base_url=args.peer, timeout=args.timeout) as client:
+        follower = Follower(client, WriteSessionFactory, args.name or args.peer, args.batch, args.parts)
+        if args.check:
+            at = await follower.find_divergence()
+            head_id, _ = await follower.mirror_head()
+            if at is None:
+                print(f"mirror of {follower.peer} matches up to id {head_id} ({follower.round_trips} requests)")
+                return 0
+            print(f"mirror of {follower.peer} diverges at id {at} ({follower.round_trips} requests)")
+            return 1
+        while True:
+            started = time.perf_counter()
+            try:
+                result = await follower.sync(repair=args.repair)
+            except Diverged as exc:
+                print(f"{exc}; re-run with --repair to re-pull from there")
+                return 1
+            except ReplicationError as exc:
+                print(f"peer served an invalid chain: {exc}")
+                return 1
+            if result.applied or not args.follow:
+                repaired = f", repaired from id {result.diverged_at}" if result.repaired else ""
+                print(
+                    f"applied {result.applied} entries in {result.requests} requests "
+                    f"({time.perf_counter() - started:.1f}s); head id {result.head_id}{repaired}"
+                )
+            if not args.follow:
+                return 0
+            await asyncio.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("peer", help="peer base URL, e.g. http://peer:8000")
+    parser.add_argument("--name", help="mirror name for the peer (default: the URL)")
+    parser.add_argument("--follow", action="store_true", help="keep polling for new entries")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --follow")
+    parser.add_argument("--check", action="store_true", help="compare range digests only; pull nothing")
+    parser.add_argument("--repair", action="store_true", help="truncate the mirror at a divergence and re-pull")
+    parser.add_argument("--batch", type=int, default=1000, help="entries per request")
+    parser.add_argument("--parts", type=int, default=16, help="sub-ranges compared per anti-entropy round trip")
+    parser.add_argument("--timeout", type=float, default=30.0, help="HTTP timeout in seconds")
+    sys.exit(asyncio.run(main(parser.parse_args())))
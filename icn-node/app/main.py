@@ -4,19 +4,34 @@ FastAPI application entry point for the ICN Node (Weekend MVP).
 
 Responsibilities
 - Registers the signature verification middleware for POST/PATCH writes
-- Wires core routers: invoices, attestations, trust, checkpoints
-- Exposes a debug endpoint for verifying audit-chain continuity
+- Wires core routers: invoices, attestations, trust, checkpoints, export, settlements, positions, analytics, replication
+- Exposes debug endpoints for incremental and ranged audit-chain verification
+- Serves Prometheus-format metrics at `/metrics` (see `app/utils/metrics.py`)
+- Registers the audit appender's derived-table hooks (`services.hooks`)
+- Drains the audit appender (group-commit chain writer) on shutdown
 
 Notes
 - Signature middleware enforces `X-Key-Id` (org URN) and `X-Signature` (Ed25519)
 - `POST /checkpoints/generate` is exempted for local demo convenience
 """
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import PlainTextResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Flush any queued signed writes before the process exits
+    await audit_appender.close()
+    await read_router.close()
+    crypto_pool.shutdown()
 
-app = FastAPI(title="ICN Node", version="0.1.0")
+
+app = FastAPI(title="ICN Node", version="0.1.0", lifespan=lifespan)
 
 # CORS for local demo UI
 app.add_middleware(
@@ -32,34 +47,94 @@ async def health():
     return {"status": "ok", "node": "icn-mvp"}
 
 # Wiring
+from .middleware.metrics import MetricsMiddleware
 from .middleware.signatures import SignatureVerificationMiddleware
 from .routers.invoices import router as invoices_router
 from .routers.attestations import router as attestations_router
 from .routers.trust import router as trust_router
 from .routers.checkpoints import router as checkpoints_router
-from .db import get_session
-from .models import AuditLog
+from .routers.export import router as export_router
+from .routers.settlements import router as settlements_router
+from .routers.positions import router as positions_router
+from .routers.analytics import router as analytics_router
+from .routers.replication import router as replication_router
+from .services.audit import audit_appender
+from .services.audit_verifier import audit_verifier
+from .services.hooks import install_hooks
+from .services.idempotency import idempotency_store
+from .services.org_registry import org_registry
+from .services.replicas import read_router
+from .utils.crypto_pool import crypto_pool
+from .utils.metrics import metrics
 
+install_hooks()
 app.add_middleware(SignatureVerificationMiddleware)
+# Added last so it is outermost: request timing includes signature verification
+app.add_middleware(MetricsMiddleware)
 app.include_router(invoices_router)
 app.include_router(attestations_router)
 app.include_router(trust_router)
 app.include_router(checkpoints_router)
+app.include_router(export_router)
+app.include_router(settlements_router)
+app.include_router(positions_router)
+app.include_router(analytics_router)
+app.include_router(replication_router)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Counters and latency histograms in Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/debug/audit-log")
-async def debug_audit_log(session: AsyncSession = Depends(get_session)):
-    res = await session.execute(select(AuditLog).order_by(AuditLog.id.asc()))
-    items = res.scalars().all()
-    chain_ok = True
-    prev = None
-    for a in items:
-        if a.prev_hash != (prev.row_hash if prev else None):
-            chain_ok = False
-            break
-        prev = a
+async def debug_audit_log():
+    """Incrementally verify the audit chain (links and recomputed hashes).
+
+    Only rows appended since the persisted watermark are read, so repeated calls
+    on a large, already-verified log return in milliseconds.
+    """
+    result, mark = await audit_verifier.verify_incremental()
     return {
-        "count": len(items),
-        "chain_ok": chain_ok,
-        "head": items[-1].row_hash if items else None,
+        "count": mark.row_count,
+        "chain_ok": result.ok,
+        "head": mark.row_hash if result.ok else result.last_hash,
+        "verified_up_to_id": mark.verified_up_to_id,
+        "checked": result.checked,
+        "first_broken": result.first_broken,
+        "elapsed_ms": round(result.elapsed_ms, 3),
     }
+
+
+@app.get("/debug/audit-log/verify")
+async def debug_audit_log_verify(
+    start_id: int = Query(1, ge=1),
+    end_id: Optional[int] = Query(None, ge=1),
+):
+    """Fully verify an arbitrary id range (does not move the watermark)."""
+    return (await audit_verifier.verify_range(start_id, end_id)).as_dict()
+
+
+@app.get("/debug/org-registry")
+async def debug_org_registry():
+    """Org key cache size and hit rate (see `app/services/org_registry.py`)."""
+    return org_registry.stats()
+
+
+@app.get("/debug/idempotency")
+async def debug_idempotency():
+    """Idempotency store cache/filter state and where lookups were answered."""
+    return idempotency_store.stats()
+
+
+@app.get("/debug/replicas")
+async def debug_replicas():
+    """Read replica heads, lag behind the primary and where reads were routed."""
+    return read_router.stats()
+
+
+@app.get("/debug/crypto")
+async def debug_crypto():
+    """Crypto worker pool queue depth and signature verification latency."""
+    return crypto_pool.stats()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.metrics import http_request_duration
+
+
+class MetricsMiddleware:
+    """
+    Record every HTTP request in `icn_http_request_duration_seconds` (pure ASGI).
+
+    Labels
+    - `route` is the matched route's path template (`/invoices/{invoice_id}`),
+      read from the scope after routing, so ids never become label values.
+      Requests that match no route are recorded as "unmatched".
+    - `status` is the response status; 500 if the app raised before responding.
+
+    Cost
+    - One `perf_counter` pair, a `send` wrapper and one histogram observe per
+      request (see `python -m bench.metrics`).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+            )
@@ -1,76 +1,159 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from typing import Callable
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine
 
-from fastapi import HTTPException, Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from ..utils.crypto import canonicalize_json, verify_signature
-from ..models import Org
-from ..db import AsyncSessionFactory
-from sqlalchemy import select
+from ..utils.crypto import canonicalize_json
+from ..utils.crypto_pool import crypto_pool
+from ..services.org_registry import OrgEntry, org_registry
 
 
-class SignatureVerificationMiddleware(BaseHTTPMiddleware):
+@dataclass(frozen=True)
+class SignedBody:
+    """Everything derived from a verified request body, computed exactly once."""
+    org: OrgEntry
+    signature_b64: str
+    body: Any
+    canonical: bytes
+    sha256: bytes
+
+    @property
+    def sha256_hex(self) -> str:
+        return self.sha256.hex()
+
+
+class SignatureVerificationMiddleware:
     """
-    Verify Ed25519 signatures on JSON write requests.
+    Verify Ed25519 signatures on JSON write requests (pure ASGI middleware).
 
     Security model
-    - Each org has a public key (seeded for the demo) stored in the DB
+    - Each org has a public key (seeded for the demo) stored in the DB; keys are
+      served from the shared org registry cache, so lookups rarely hit the DB
     - Writers sign the canonicalized JSON body; the server verifies before processing
-    - Valid requests get `request.state.org` (the signer org) attached for handlers
+    - Valid requests get `request.state.org` (the signer's `OrgEntry`) attached for handlers
 
     Headers
     - `X-Key-Id`: org URN (e.g., `urn:coop:sunrise-bakery`)
     - `X-Signature`: base64-encoded Ed25519 signature over the JSON body
 
+    Single pass
+    - The body is buffered, parsed and canonicalized once; the canonical bytes and
+      their SHA-256 are exposed as `request.state.signed` (`SignedBody`).
+    - Routers using `SignedRoute` hand the parsed body to FastAPI, so pydantic
+      validates the existing object instead of re-parsing the bytes.
+    - Non-write requests pass straight through with no per-request task or stream
+      wrapping (unlike `BaseHTTPMiddleware`).
+
     Exemptions
     - Some dev endpoints (health, docs, debug, checkpoint generation) are exempt to
       simplify local demos while keeping the default secure-by-default posture.
+    - `POST /trust/scores` is a read (a body only because the pair list can be
+      long), as open as `GET /trust/score`.
     """
 
-    def __init__(self, app, exempt_paths: set[str] | None = None):
-        super().__init__(app)
-        self.exempt_paths = exempt_paths or {"/health", "/docs", "/openapi.json", "/debug/audit-log", "/checkpoints/generate"}
-
-    async def dispatch(self, request: Request, call_next: Callable):
-        if request.method in {"POST", "PATCH"} and request.url.path not in self.exempt_paths:
-            content_type = request.headers.get("content-type", "").lower()
-            if "application/json" not in content_type:
-                raise HTTPException(status_code=415, detail="Content-Type must be application/json")
-
-            key_id = request.headers.get("X-Key-Id")
-            signature_b64 = request.headers.get("X-Signature")
-            if not key_id or not signature_b64:
-                raise HTTPException(status_code=401, detail="Missing signature headers")
-
-            body_bytes = await request.body()
-            # Re-inject body for downstream handlers
-            request._body = body_bytes  # type: ignore[attr-defined]
-            try:
-                body_obj = json.loads(body_bytes.decode("utf-8")) if body_bytes else {}
-            except json.JSONDecodeError:
-                raise HTTPException(status_code=400, detail="Invalid JSON body")
-
-            # Lookup org by urn
-            async with AsyncSessionFactory() as session:
-                org = (
-                    await session.execute(select(Org).where(Org.urn == key_id))
-                ).scalar_one_or_none()
-            if not org:
-                raise HTTPException(status_code=401, detail="Unknown X-Key-Id")
-
-            # Verify signature over canonicalized JSON using org's public key
-            if not verify_signature(body_obj, signature_b64, org.public_key):
-                raise HTTPException(status_code=401, detail="Invalid signature")
-
-            # Attach state and canonical bytes for reuse.
-            request.state.org = org
-            request.state.canonical_body = canonicalize_json(body_obj)
-            request.state.signature_b64 = signature_b64
-
-        response = await call_next(request)
-        return response
-
-
+    def __init__(self, app: ASGIApp, exempt_paths: set[str] | None = None):
+        self.app = app
+        self.exempt_paths = exempt_paths or {"/health", "/docs", "/openapi.json", "/debug/audit-log", "/checkpoints/generate", "/trust/scores"}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in {"POST", "PATCH"}
+            or scope["path"] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_type = headers.get("content-type", "").lower()
+        if "application/json" not in content_type:
+            return await _reject(scope, receive, send, 415, "Content-Type must be application/json")
+
+        key_id = headers.get("x-key-id")
+        signature_b64 = headers.get("x-signature")
+        if not key_id or not signature_b64:
+            return await _reject(scope, receive, send, 401, "Missing signature headers")
+
+        body_bytes = await _read_body(receive)
+        try:
+            body_obj = json.loads(body_bytes) if body_bytes else {}
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return await _reject(scope, receive, send, 400, "Invalid JSON body")
+
+        # Lookup org by urn (cached VerifyKey)
+        org = await org_registry.get(key_id)
+        if not org:
+            return await _reject(scope, receive, send, 401, "Unknown X-Key-Id")
+
+        # Verify signature over canonicalized JSON using org's public key (off-loop)
+        canonical = canonicalize_json(body_obj)
+        if not await crypto_pool.verify(canonical, signature_b64, org.verify_key):
+            return await _reject(scope, receive, send, 401, "Invalid signature")
+
+        # Attach state for handlers (request.state reads scope["state"]).
+        state = scope.setdefault("state", {})
+        state["signed"] = SignedBody(
+            org=org,
+            signature_b64=signature_b64,
+            body=body_obj,
+            canonical=canonical,
+            sha256=hashlib.sha256(canonical).digest(),
+        )
+        state["org"] = org
+        state["canonical_body"] = canonical
+        state["signature_b64"] = signature_b64
+
+        await self.app(scope, _replay(body_bytes, receive), send)
+
+
+class SignedRoute(APIRoute):
+    """APIRoute that reuses the middleware's parsed body instead of re-reading it."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            signed = request.scope.get("state", {}).get("signed")
+            if signed is not None:
+                request._json = signed.body  # type: ignore[attr-defined]
+            return await handler(request)
+
+        return route_handler
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """Re-inject the buffered body for downstream handlers, then defer to the server."""
+    pending = True
+
+    async def replay() -> Message:
+        nonlocal pending
+        if pending:
+            pending = False
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str) -> None:
+    await JSONResponse({"detail": detail}, status_code=status_code)(scope, receive, send)
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
 from datetime import datetime, date
+from decimal import Decimal
 from typing import Optional
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Date,
     DateTime,
     Float,
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
+    Numeric,
     String,
     Text,
     UniqueConstraint,
@@ -50,13 +54,13 @@ class Invoice(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     idempotency_key: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
 
-    from_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"), index=True)
-    to_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"), index=True)
+    from_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"))
+    to_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"))
 
     lines: Mapped[dict] = mapped_column(JSON, default=list, nullable=False)
     total: Mapped[float] = mapped_column(Float, nullable=False)
     terms: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
-    status: Mapped[str] = mapped_column(String(32), default="proposed", index=True)
+    status: Mapped[str] = mapped_column(String(32), default="proposed")
     status_history: Mapped[list] = mapped_column(JSON, default=list, nullable=False)
     signatures: Mapped[list] = mapped_column(JSON, default=list, nullable=False)
 
@@ -70,8 +74,66 @@ class Invoice(Base):
     from_org: Mapped[Org] = relationship(back_populates="from_invoices", foreign_keys=[from_org_id])
     to_org: Mapped[Org] = relationship(back_populates="to_invoices", foreign_keys=[to_org_id])
 
+    # Keyset pagination: every listing filter is a prefix of an index ending in id
     __table_args__ = (
-        Index("ix_invoices_from_to", "from_org_id", "to_org_id"),
+        Index("ix_invoices_from_to_id", "from_org_id", "to_org_id", "id"),
+        Index("ix_invoices_from_org_id_id", "from_org_id", "id"),
+        Index("ix_invoices_to_org_id_id", "to_org_id", "id"),
+        Index("ix_invoices_status_id", "status", "id"),
+        Index("ix_invoices_from_status_id", "from_org_id", "status", "id"),
+        Index("ix_invoices_to_status_id", "to_org_id", "status", "id"),
+        Index("ix_invoices_from_to_status_id", "from_org_id", "to_org_id", "status", "id"),
+    )
+
+
+class InvoiceLine(Base):
+    """One typed line item of an invoice (from `Invoice.lines`), for SQL-side aggregates.
+
+    Parties and creation time are copied from the invoice so per-org and per-day
+    line queries need no join.
+    """
+    __tablename__ = "invoice_lines"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    invoice_id: Mapped[int] = mapped_column(ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False, index=True)
+    line_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    from_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"), nullable=False)
+    to_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"), nullable=False)
+    sku: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    unit: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    qty: Mapped[Optional[Decimal]] = mapped_column(Numeric(18, 4), nullable=True)
+    unit_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(18, 4), nullable=True)
+    amount: Mapped[Optional[Decimal]] = mapped_column(Numeric(18, 2), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_invoice_lines_sku_created_at", "sku", "created_at"),
+        Index("ix_invoice_lines_from_org_id_sku", "from_org_id", "sku"),
+        Index("ix_invoice_lines_to_org_id_sku", "to_org_id", "sku"),
+    )
+
+
+class InvoiceStatusEvent(Base):
+    """Append-only invoice lifecycle: one row per status change (seq 1 = creation).
+
+    (invoice_id, seq) is unique, so two transitions racing from the same state
+    cannot both commit.
+    """
+    __tablename__ = "invoice_status_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    invoice_id: Mapped[int] = mapped_column(ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    previous_status: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    actor: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    note: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    row_hash: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("invoice_id", "seq", name="uq_invoice_status_events_invoice_id_seq"),
+        Index("ix_invoice_status_events_status_created_at", "status", "created_at"),
     )
 
 
@@ -80,8 +142,8 @@ class Attestation(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     subject_type: Mapped[str] = mapped_column(String(64), nullable=False)
-    subject_id: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
-    attestor_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"), index=True)
+    subject_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    attestor_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="RESTRICT"))
     claims: Mapped[list] = mapped_column(JSON, default=list, nullable=False)
     weight: Mapped[float] = mapped_column(Float, default=1.0, nullable=False)
     signature: Mapped[str] = mapped_column(String(1024), nullable=False)
@@ -93,6 +155,137 @@ class Attestation(Base):
 
     __table_args__ = (
         Index("ix_attestations_subject", "subject_type", "subject_id"),
+        Index("ix_attestations_subject_id_id", "subject_id", "id"),
+        Index("ix_attestations_attestor_org_id_id", "attestor_org_id", "id"),
+    )
+
+
+class TrustEdge(Base):
+    """Running trust aggregates for invoices from_org -> to_org.
+
+    Decayed sums are stored as sum(w * 2^(days_since_epoch / half_life)); scale by
+    2^(-days_now / half_life) to read them "as of now" (see services/trust_edges.py).
+    """
+    __tablename__ = "trust_edges"
+
+    from_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    to_org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    invoice_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    direct_weighted: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    attestation_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    attest_weighted: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_trust_edges_to_org_id", "to_org_id"),
+    )
+
+
+class NetworkTrust(Base):
+    """Network testimony per org from the last EigenTrust batch run.
+
+    `raw` is the org's share of the global trust vector (sums to 1 over all rows,
+    and seeds the next run); `score` is raw / max(raw), in [0, 1].
+    """
+    __tablename__ = "network_trust"
+
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    raw: Mapped[float] = mapped_column(Float, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class OrgBalance(Base):
+    """Open (proposed/accepted) invoice totals per org, in integer cents.
+
+    net = receivable_cents - payable_cents; the invoice's to_org owes its from_org.
+    """
+    __tablename__ = "org_balances"
+
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    receivable_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    payable_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    open_invoices: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class OrgPosition(Base):
+    """Open invoice totals of `org_id` against one counterparty, in integer cents."""
+    __tablename__ = "org_positions"
+
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    counterparty_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    receivable_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    payable_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    open_invoices: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class PositionJournal(Base):
+    """Append-only balance changes per org; each row carries the org's balance after it.
+
+    A position as of time T is the org's last row with created_at <= T.
+    `invoice_id` is NULL for reconciliation corrections.
+    """
+    __tablename__ = "position_journal"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    invoice_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    receivable_delta: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payable_delta: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    receivable_cents: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payable_cents: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_position_journal_org_id_created_at", "org_id", "created_at"),
+        Index("ix_position_journal_created_at", "created_at"),
+    )
+
+
+class DailyRollup(Base):
+    """Per-org activity counters for one UTC day (`services/rollups.py`).
+
+    A row exists only for days the org was active. Network totals sum the
+    `*_issued` side so every invoice counts once.
+    """
+    __tablename__ = "daily_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    invoices_issued: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    invoices_received: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value_issued_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    value_received_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    attestations_made: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    disputes_issued: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    disputes_received: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    settlements_issued: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    settlements_received: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_daily_rollups_org_id_day", "org_id", "day"),
+    )
+
+
+class IdempotencyKey(Base):
+    """First response to a keyed write, replayed byte-for-byte until `expires_at`.
+
+    `fingerprint` is the SHA-256 of the signed canonical body; a replay must
+    come from the same org with the same fingerprint.
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    response: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
     )
 
 
@@ -108,7 +301,7 @@ class AuditLog(Base):
     payload_hash: Mapped[str] = mapped_column(String(128), nullable=False)
     signature: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
     timestamp: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
     )
 
     __table_args__ = (
@@ -116,6 +309,78 @@ class AuditLog(Base):
     )
 
 
+class AuditPayload(Base):
+    """Canonical bytes an audit entry's payload_hash was computed over, zstd-compressed.
+
+    Content-addressed: identical payloads share one row. The frame lives in
+    `data`, or at (`segment`, `segment_offset`) in a segment file when the store
+    is configured with a directory; see services/payload_store.py.
+    """
+    __tablename__ = "audit_payloads"
+
+    payload_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    raw_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    stored_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # zstd dictionary id the frame was compressed with; 0 = none
+    dict_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    segment: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    segment_offset: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class MirroredAuditEntry(Base):
+    """A peer node's audit entry, pulled by the replication follower.
+
+    `id` is the entry's id on the peer; each peer's chain is kept separately and
+    never mixed into this node's own `audit_log`. `payload` is the entity record
+    the entry wrote, as served by `GET /replication/since/{row_hash}`.
+    """
+    __tablename__ = "mirrored_audit_log"
+
+    peer: Mapped[str] = mapped_column(String(255), primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    prev_hash: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    row_hash: Mapped[str] = mapped_column(String(128), nullable=False)
+    op_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    entity_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload_hash: Mapped[str] = mapped_column(String(128), nullable=False)
+    signature: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class AuditWatermark(Base):
+    """Progress marker for the incremental audit-chain verifier: rows up to and
+    including `verified_up_to_id` recompute to `row_hash`."""
+    __tablename__ = "audit_watermarks"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    verified_up_to_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    row_hash: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class CheckpointFrontier(Base):
+    """Rolling Merkle frontier (one peak per set bit of leaf_count) of a UTC day's
+    audit rows, maintained by the audit appender; see utils/merkle.MerkleFrontier."""
+    __tablename__ = "checkpoint_frontiers"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    merkle_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    leaf_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    peaks: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, default=b"")
+    last_row_hash: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
 class Checkpoint(Base):
     __tablename__ = "checkpoints"
 
@@ -124,6 +389,8 @@ class Checkpoint(Base):
     node_id: Mapped[str] = mapped_column(String(255), nullable=False)
     operations_count: Mapped[int] = mapped_column(Integer, nullable=False)
     merkle_root: Mapped[str] = mapped_column(String(128), nullable=False)
+    # Leaf/node encoding of merkle_root (see utils/merkle.py); 1 = legacy hex-concat
+    merkle_version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
     prev_checkpoint_hash: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
     signature: Mapped[str] = mapped_column(String(1024), nullable=False)
     timestamp: Mapped[datetime] = mapped_column(
@@ -0,0 +1,40 @@
+"""
+Rebuild or check the `trust_edges` aggregates against a full recomputation.
+
+    python -m app.rebuild_trust          # recompute and replace every edge
+    python -m app.rebuild_trust --check  # report drift only; exit 1 if any
+
+A rebuild locks `trust_edges` for its transaction: writes that touch trust
+(invoices, attestations, status changes) wait until it commits.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+from .db import AsyncSessionFactory, WriteSessionFactory
+from .services import trust_edges
+
+
+async def main(check_only: bool) -> int:
+    # A rebuild reads and rewrites in one transaction: on SQLite it must hold the writer
+    async with (AsyncSessionFactory if check_only else WriteSessionFactory)() as session:
+        if check_only:
+            problems = await trust_edges.check(session)
+            for p in problems[:50]:
+                print(f"{p['from_org_id']}->{p['to_org_id']} {p['column']}: expected {p['expected']!r}, stored {p['stored']!r}")
+            if len(problems) > 50:
+                print(f"... {len(problems) - 50} more")
+            print("trust_edges OK" if not problems else f"{len(problems)} mismatched values")
+            return 1 if problems else 0
+        count = await trust_edges.rebuild(session)
+        await session.commit()
+        print(f"Rebuilt {count} trust edges")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="compare only; do not write")
+    sys.exit(asyncio.run(main(parser.parse_args().check)))
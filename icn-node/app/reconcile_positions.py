@@ -0,0 +1,43 @@
+"""
+Reconcile the net-position ledger against a full recomputation from `invoices`.
+
+    python -m app.reconcile_positions        # report drift only; exit 1 if any
+    python -m app.reconcile_positions --fix  # rewrite current positions, journal corrections
+
+--fix locks the ledger tables for its transaction: invoice creates and status
+changes wait until it commits.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+from .db import AsyncSessionFactory, WriteSessionFactory
+from .services import positions
+
+
+async def main(fix: bool) -> int:
+    # --fix reads and rewrites in one transaction: on SQLite it must hold the writer
+    async with (WriteSessionFactory if fix else AsyncSessionFactory)() as session:
+        problems = await positions.check(session)
+        for p in problems[:50]:
+            print(f"{p['table']} {p['key']} {p['column']}: expected {p['expected']}, stored {p['stored']}")
+        if len(problems) > 50:
+            print(f"... {len(problems) - 50} more")
+        if not problems:
+            print("positions OK")
+            return 0
+        print(f"{len(problems)} mismatched values")
+        if not fix:
+            return 1
+        corrected = await positions.rebuild(session)
+        await session.commit()
+        print(f"Rebuilt positions; journaled corrections for {corrected} orgs")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fix", action="store_true", help="rewrite positions from invoices")
+    sys.exit(asyncio.run(main(parser.parse_args().fix)))
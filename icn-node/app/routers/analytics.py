@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_session
+from ..models import InvoiceLine, Org
+from ..services import rollups
+from ..services.org_registry import org_registry
+
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+MAX_DAILY_RANGE = 1000
+
+# group_by name -> column expression on invoice_lines
+LINE_DIMENSIONS = {
+    "sku": InvoiceLine.sku,
+    "unit": InvoiceLine.unit,
+    "day": func.date(InvoiceLine.created_at),
+    "from_org": InvoiceLine.from_org_id,
+    "to_org": InvoiceLine.to_org_id,
+}
+
+
+@router.get("/lines")
+async def line_aggregates(
+    group_by: str = Query("sku", description="Comma-separated: sku, unit, day, from_org, to_org"),
+    sku: Optional[str] = Query(None),
+    from_org: Optional[str] = Query(None),
+    to_org: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on invoice created_at"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on invoice created_at"),
+    limit: int = Query(100, ge=1, le=10000),
+    session: AsyncSession = Depends(get_session),
+):
+    """Line-item volume and price aggregates, computed entirely in SQL (GROUP BY)."""
+    dims = [d.strip() for d in group_by.split(",") if d.strip()]
+    unknown = [d for d in dims if d not in LINE_DIMENSIONS]
+    if not dims or unknown:
+        raise HTTPException(status_code=400, detail=f"group_by must be from: {', '.join(LINE_DIMENSIONS)}")
+
+    columns = [LINE_DIMENSIONS[d].label(d) for d in dims]
+    stmt = select(
+        *columns,
+        func.count().label("lines"),
+        func.count(func.distinct(InvoiceLine.invoice_id)).label("invoices"),
+        func.sum(InvoiceLine.qty).label("qty"),
+        func.sum(InvoiceLine.amount).label("amount"),
+        func.min(InvoiceLine.unit_price).label("min_unit_price"),
+        func.max(InvoiceLine.unit_price).label("max_unit_price"),
+        # Volume-weighted: what a unit actually cost on average
+        (func.sum(InvoiceLine.amount) / func.nullif(func.sum(InvoiceLine.qty), 0)).label("avg_unit_price"),
+    )
+    if sku is not None:
+        stmt = stmt.where(InvoiceLine.sku == sku)
+    orgs = await org_registry.get_many([u for u in (from_org, to_org) if u], session)
+    for urn, column in ((from_org, InvoiceLine.from_org_id), (to_org, InvoiceLine.to_org_id)):
+        if urn:
+            if urn not in orgs:
+                raise HTTPException(status_code=400, detail=f"Unknown org: {urn}")
+            stmt = stmt.where(column == orgs[urn].id)
+    if since is not None:
+        stmt = stmt.where(InvoiceLine.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(InvoiceLine.created_at < until)
+    stmt = stmt.group_by(*[LINE_DIMENSIONS[d] for d in dims]).order_by(func.sum(InvoiceLine.amount).desc().nulls_last()).limit(limit)
+    rows = (await session.execute(stmt)).all()
+
+    org_ids = {getattr(r, d) for r in rows for d in dims if d in ("from_org", "to_org")}
+    urns = {}
+    if org_ids:
+        urns = dict((await session.execute(select(Org.id, Org.urn).where(Org.id.in_(org_ids)))).all())
+
+    items: list[dict[str, Any]] = []
+    for r in rows:
+        item = r._asdict()
+        for d in ("from_org", "to_org"):
+            if d in item:
+                item[d] = urns.get(item[d])
+        if "day" in item and item["day"] is not None:
+            item["day"] = str(item["day"])
+        items.append(item)
+    return {"group_by": dims, "items": items}
+
+
+def _ratio(num: int, den: int) -> Optional[float]:
+    return round(num / den, 4) if den else None
+
+
+def _network_day(day: date, r: Any) -> dict[str, Any]:
+    invoices = int(r.invoices_issued) if r else 0
+    attestations = int(r.attestations_made) if r else 0
+    disputes = int(r.disputes_issued) if r else 0
+    return {
+        "day": day.isoformat(),
+        "invoices_created": invoices,
+        "total_value": int(r.value_issued_cents) / 100 if r else 0.0,
+        "attestations": attestations,
+        "attestations_per_invoice": _ratio(attestations, invoices),
+        "disputes": disputes,
+        "dispute_rate": _ratio(disputes, invoices),
+        "settlements": int(r.settlements_issued) if r else 0,
+        "active_orgs": int(r.active_orgs) if r else 0,
+    }
+
+
+def _org_day(day: date, r: Any) -> dict[str, Any]:
+    item: dict[str, Any] = {"day": day.isoformat()}
+    for col in rollups.SUM_COLUMNS:
+        value = getattr(r, col) if r else 0
+        if col.endswith("_cents"):
+            item[col[: -len("_cents")]] = value / 100
+        else:
+            item[col] = value
+    return item
+
+
+@router.get("/daily")
+async def daily(
+    from_: Optional[date] = Query(None, alias="from", description="First day (UTC), default 29 days before `to`"),
+    to: Optional[date] = Query(None, description="Last day (UTC, inclusive), default today"),
+    org: Optional[str] = Query(None, description="Org URN; omit for network totals"),
+    session: AsyncSession = Depends(get_session),
+):
+    """PRD §13 transaction metrics per UTC day, read from `daily_rollups` only."""
+    end = to or datetime.now(timezone.utc).date()
+    start = from_ or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    days = (end - start).days + 1
+    if days > MAX_DAILY_RANGE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DAILY_RANGE} days per request")
+
+    org_id = None
+    if org is not None:
+        entry = await org_registry.get(org, session)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Org not found")
+        org_id = entry.id
+
+    rows = {r.day: r for r in await rollups.daily_rows(session, start, end, org_id)}
+    # Days without activity have no row; report them as zeros
+    calendar = [start + timedelta(days=i) for i in range(days)]
+    if org_id is not None:
+        items = [_org_day(d, rows.get(d)) for d in calendar]
+        return {"from": start.isoformat(), "to": end.isoformat(), "org": org, "items": items}
+
+    items = [_network_day(d, rows.get(d)) for d in calendar]
+    invoices = sum(i["invoices_created"] for i in items)
+    attestations = sum(i["attestations"] for i in items)
+    disputes = sum(i["disputes"] for i in items)
+    summary = {
+        "invoices_created": invoices,
+        "total_value": round(sum(i["total_value"] for i in items), 2),
+        "attestations": attestations,
+        "attestations_per_invoice": _ratio(attestations, invoices),
+        "disputes": disputes,
+        "dispute_rate": _ratio(disputes, invoices),
+        "settlements": sum(i["settlements"] for i in items),
+        "active_orgs": await rollups.active_orgs(session, start, end),
+    }
+    return {"from": start.isoformat(), "to": end.isoformat(), "org": None, "summary": summary, "items": items}
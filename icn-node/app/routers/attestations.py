@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
-from ..models import AuditLog, Attestation, Org
-from ..utils.crypto import compute_hash
+from ..middleware.signatures import SignedRoute
+from ..models import Attestation
+from ..services.audit import AuditWrite, audit_appender
+from ..services.idempotency import IdempotencyClaim, IdempotencyMismatch, idempotency_store
+from ..services.org_registry import OrgEntry, org_registry
+from ..utils.pagination import decode_cursor, next_cursor
 
 
-router = APIRouter(prefix="/attestations", tags=["attestations"])
+router = APIRouter(prefix="/attestations", tags=["attestations"], route_class=SignedRoute)
 
 
 class Claim(BaseModel):
@@ -38,15 +44,26 @@ class AttestationCreate(BaseModel):
 async def create_attestation(
     request: Request,
     payload: AttestationCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     session: AsyncSession = Depends(get_session),
 ):
-    org: Org = getattr(request.state, "org", None)
+    """Record a signed attestation.
+
+    With an `Idempotency-Key` header, retries of the same signed body get the
+    first response back byte for byte (422 if the key was used for another request).
+    """
+    org: OrgEntry = getattr(request.state, "org", None)
     if not org:
         raise HTTPException(status_code=401, detail="Signature verification required")
 
-    # Compute prev hash from audit log
-    last = (await session.execute(select(AuditLog).order_by(AuditLog.id.desc()).limit(1))).scalar_one_or_none()
-    prev_hash = last.row_hash if last else None
+    claim = None
+    if idempotency_key:
+        fingerprint = request.state.signed.sha256_hex
+        stored = await idempotency_store.lookup("attestations", idempotency_key, session)
+        if stored is not None:
+            return _replay(stored, org, fingerprint)
+        claim = IdempotencyClaim("attestations", idempotency_key, org.id, fingerprint)
+    await session.close()
 
     attestation_payload = {
         "subject_type": payload.subject_type,
@@ -55,45 +72,72 @@ async def create_attestation(
         "claims": [c.model_dump() for c in payload.claims],
         "weight": payload.weight,
     }
-    payload_hash, row_hash = compute_hash(attestation_payload, prev_hash)
-
-    att = Attestation(
-        subject_type=payload.subject_type,
-        subject_id=payload.subject_id,
-        attestor_org_id=org.id,
-        claims=[c.model_dump() for c in payload.claims],
-        weight=payload.weight,
-        signature=getattr(request.state, "signature_b64", None) or "",
-    )
-    session.add(att)
-    await session.flush()
-
-    audit = AuditLog(
-        prev_hash=prev_hash,
-        row_hash=row_hash,
+    signature = getattr(request.state, "signature_b64", None)
+
+    def build(prev_hash: str | None, row_hash: str) -> Attestation:
+        return Attestation(
+            subject_type=payload.subject_type,
+            subject_id=payload.subject_id,
+            attestor_org_id=org.id,
+            claims=attestation_payload["claims"],
+            weight=payload.weight,
+            signature=signature or "",
+            created_at=datetime.now(timezone.utc),
+        )
+
+    write = AuditWrite(
         op_type="create",
         entity_type="attestation",
-        entity_id=str(att.id),
-        payload_hash=payload_hash,
-        signature=getattr(request.state, "signature_b64", None),
+        payload=attestation_payload,
+        build=build,
+        signature=signature,
     )
-    session.add(audit)
-    await session.commit()
+    if claim is None:
+        receipt = await audit_appender.append(write)
+        return {"id": receipt.entity.id, "row_hash": receipt.row_hash}
 
-    return {"id": att.id, "row_hash": row_hash}
+    write.context["idempotency"] = claim
+    try:
+        await audit_appender.append(write)
+    except IntegrityError:
+        # Lost a race on the same key: the winner's response is stored
+        stored = await idempotency_store.lookup("attestations", claim.key, session, use_filter=False)
+        if stored is None:
+            raise
+        return _replay(stored, org, claim.fingerprint)
+    return claim.response()
+
+
+def _replay(stored: Any, org: OrgEntry, fingerprint: str) -> Any:
+    try:
+        return idempotency_store.replay(stored, org.id, fingerprint)
+    except IdempotencyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was used for a different request")
 
 
 @router.get("")
 async def list_attestations(
     subject_id: Optional[str] = Query(default=None),
-    limit: int = 50,
-    offset: int = 0,
+    attestor_org: Optional[str] = Query(default=None),
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    offset: int = Query(0, ge=0, description="Deprecated: use `after`"),
     session: AsyncSession = Depends(get_session),
 ):
-    stmt = select(Attestation).order_by(Attestation.id.desc()).limit(limit).offset(offset)
+    """Newest-first attestation listing with keyset pagination (see `list_invoices`)."""
+    stmt = select(Attestation)
     if subject_id:
-        stmt = select(Attestation).where(Attestation.subject_id == subject_id).order_by(Attestation.id.desc()).limit(limit).offset(offset)
-    res = await session.execute(stmt)
+        stmt = stmt.where(Attestation.subject_id == subject_id)
+    if attestor_org:
+        org = await org_registry.get(attestor_org, session)
+        if not org:
+            raise HTTPException(status_code=400, detail="Unknown attestor_org")
+        stmt = stmt.where(Attestation.attestor_org_id == org.id)
+    if after:
+        stmt = stmt.where(Attestation.id < decode_cursor(after))
+    elif offset:
+        stmt = stmt.offset(offset)
+    rows = (await session.execute(stmt.order_by(Attestation.id.desc()).limit(limit + 1))).scalars().all()
     items = [
         {
             "id": a.id,
@@ -104,8 +148,6 @@ async def list_attestations(
             "weight": a.weight,
             "created_at": a.created_at,
         }
-        for a in res.scalars().all()
+        for a in rows[:limit]
     ]
-    return {"items": items, "limit": limit, "offset": offset}
-
-
+    return {"items": items, "limit": limit, "offset": offset, "next_cursor": next_cursor([a.id for a in rows], limit)}
@@ -1,97 +1,196 @@
 from __future__ import annotations
 
-from datetime import date as Date, datetime, timezone
+import os
+import time
+from collections import OrderedDict
+from datetime import date as Date, datetime
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from ..db import WriteSessionFactory, get_session
 from ..models import AuditLog, Checkpoint
-from ..utils.crypto import merkle_root, sha256_hex
+from ..services.checkpoint_frontier import (
+    FRONTIER_MERKLE_VERSION,
+    as_utc,
+    audit_leaf_data,
+    day_rows,
+    get_frontier,
+    scan_frontier,
+)
+from ..services.replicas import get_read_session
+from ..utils.crypto import sha256_hex
+from ..utils.merkle import MERKLE_V1, MerkleTree, proof_to_json
+from ..utils.metrics import metrics
 
 
 router = APIRouter(prefix="/checkpoints", tags=["checkpoints"])
 
+# Closed days don't change, so proofs for the same checkpoint reuse one tree.
+_TREE_CACHE_SIZE = int(os.getenv("MERKLE_TREE_CACHE", "2"))
+_tree_cache: "OrderedDict[tuple[int, int, str], MerkleTree]" = OrderedDict()
+
+# PRD §13 checkpoint_generation_success_rate = success / (success + failure)
+generations = metrics.counter(
+    "icn_checkpoint_generations_total", "Checkpoint generation attempts, by result", ("result",)
+)
+generation_duration = metrics.histogram(
+    "icn_checkpoint_generation_seconds", "Checkpoint generation time, by method", ("method",)
+)
+
 
 def _leaf_from_audit(a: AuditLog) -> str:
-    """Deterministic leaf (PRD §11):
+    """Deterministic leaf (PRD §11), legacy v1 form:
     sha256(prev_hash || row_hash || op_type || entity_type || entity_id || payload_hash || timestamp)
     """
-    prev = (a.prev_hash or "")
-    row = a.row_hash or ""
-    ts = a.timestamp.isoformat()
-    s = f"{prev}|{row}|{a.op_type}|{a.entity_type}|{a.entity_id}|{a.payload_hash}|{ts}"
-    return sha256_hex(s.encode("utf-8"))
+    return sha256_hex(audit_leaf_data(a, MERKLE_V1))
 
 
-@router.post("/generate")
-async def generate_checkpoint(
-    date: str = Query(..., description="YYYY-MM-DD"),
-    session: AsyncSession = Depends(get_session),
-):
+def _parse_date(date: str) -> Date:
     try:
-        d = datetime.strptime(date, "%Y-%m-%d").date()
+        return datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
 
-    # Fetch day's audit entries in order
-    start = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
-    end = datetime(d.year, d.month, d.day, 23, 59, 59, tzinfo=timezone.utc)
-    rows = (
-        await session.execute(
-            select(AuditLog).where(and_(AuditLog.timestamp >= start, AuditLog.timestamp <= end)).order_by(AuditLog.id.asc())
-        )
-    ).scalars().all()
-    leaves = [_leaf_from_audit(a) for a in rows]
-    root = merkle_root(leaves)
-
-    # Link to previous checkpoint
-    last_cp = (
-        await session.execute(select(Checkpoint).order_by(Checkpoint.id.desc()).limit(1))
-    ).scalar_one_or_none()
-    prev_cp_hash = last_cp.merkle_root if last_cp else None
-
-    cp = Checkpoint(
-        date=d,
-        node_id="local-node",  # TODO: configurable node identifier
-        operations_count=len(rows),
-        merkle_root=root or "",
-        prev_checkpoint_hash=prev_cp_hash,
-        signature="",  # TODO: sign with node operational key when available
-    )
-    session.add(cp)
-    await session.commit()
-    return {"date": date, "operations_count": len(rows), "merkle_root": root}
 
+def _build_tree(rows: list[Any], version: int) -> MerkleTree:
+    return MerkleTree.from_data((audit_leaf_data(a, version) for a in rows), version)
 
-@router.get("/{date}/verify")
-async def verify_checkpoint(
-    date: str,
-    session: AsyncSession = Depends(get_session),
-):
-    try:
-        d = datetime.strptime(date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format")
 
+async def _get_checkpoint(session: AsyncSession, d: Date) -> Checkpoint:
     cp = (
         await session.execute(select(Checkpoint).where(Checkpoint.date == d).limit(1))
     ).scalar_one_or_none()
     if not cp:
         raise HTTPException(status_code=404, detail="Checkpoint not found")
+    return cp
+
 
-    start = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
-    end = datetime(d.year, d.month, d.day, 23, 59, 59, tzinfo=timezone.utc)
-    rows = (
-        await session.execute(
-            select(AuditLog).where(and_(AuditLog.timestamp >= start, AuditLog.timestamp <= end)).order_by(AuditLog.id.asc())
-        )
-    ).scalars().all()
-    leaves = [_leaf_from_audit(a) for a in rows]
-    root = merkle_root(leaves)
-    ok = (root or "") == (cp.merkle_root or "")
-    return {"ok": ok, "merkle_root": cp.merkle_root, "count": len(rows)}
+@router.post("/generate")
+async def generate_checkpoint(
+    date: str = Query(..., description="YYYY-MM-DD"),
+    full: bool = Query(False, description="Rescan the day's audit rows instead of using the stored frontier"),
+    session: AsyncSession = Depends(get_session),
+):
+    d = _parse_date(date)
+    started = time.perf_counter()
+    try:
+        # The appender keeps the day's frontier current; closing it is O(log n).
+        stored = None if full else await get_frontier(session, d)
+        frontier = stored[1] if stored else (await scan_frontier(session, d))[0]
+        root = frontier.root_hex
+        await session.close()
+
+        # The write goes through the writer connection (SQLite: BEGIN IMMEDIATE), so it
+        # can't fail on a read-to-write lock upgrade while the appender commits.
+        async with WriteSessionFactory() as ws:
+            # Link to previous checkpoint
+            last_cp = (
+                await ws.execute(select(Checkpoint).order_by(Checkpoint.id.desc()).limit(1))
+            ).scalar_one_or_none()
+            prev_cp_hash = last_cp.merkle_root if last_cp else None
+
+            cp = Checkpoint(
+                date=d,
+                node_id="local-node",  # TODO: configurable node identifier
+                operations_count=frontier.count,
+                merkle_root=root,
+                merkle_version=frontier.version,
+                prev_checkpoint_hash=prev_cp_hash,
+                signature="",  # TODO: sign with node operational key when available
+            )
+            ws.add(cp)
+            await ws.commit()
+    except Exception:
+        generations.inc("failure")
+        raise
+    generations.inc("success")
+    generation_duration.observe(time.perf_counter() - started, "rescan" if stored is None else "frontier")
+    return {"date": date, "operations_count": frontier.count, "merkle_root": root, "merkle_version": frontier.version}
+
+
+@router.get("/{date}/verify")
+async def verify_checkpoint(
+    date: str,
+    full: bool = Query(False, description="Recompute from every audit row of the day (independent audit)"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Compare a checkpoint against the stored frontier, or a full rescan.
 
+    v1 checkpoints predate the frontier and are always rescanned.
+    """
+    d = _parse_date(date)
+    cp = await _get_checkpoint(session, d)
+    stored = None
+    if not full and cp.merkle_version == FRONTIER_MERKLE_VERSION:
+        stored = await get_frontier(session, d)
+    if stored is not None:
+        frontier = stored[1]
+        # A checkpoint cut before the day ended covers fewer rows than the
+        # frontier now does; only a matching count can be answered from it.
+        if frontier.count == cp.operations_count:
+            ok = frontier.root_hex == (cp.merkle_root or "")
+            return {"ok": ok, "merkle_root": cp.merkle_root, "merkle_version": cp.merkle_version, "count": frontier.count, "method": "frontier"}
+    # The checkpoint commits to the first operations_count rows of the day.
+    rows = (await day_rows(session, d, cp.merkle_version))[:cp.operations_count]
+    root = _build_tree(rows, cp.merkle_version).root_hex
+    ok = len(rows) == cp.operations_count and root == (cp.merkle_root or "")
+    return {"ok": ok, "merkle_root": cp.merkle_root, "merkle_version": cp.merkle_version, "count": len(rows), "method": "rescan"}
+
+
+@router.get("/{date}/proof/{audit_id}")
+async def inclusion_proof(
+    date: str,
+    audit_id: int,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Prove that one audit row is included in a day's checkpoint.
 
+    A counterparty recomputes the leaf from `audit` (see
+    `services.checkpoint_frontier.audit_leaf_data`), hashes it with
+    `leaf_hash(..., merkle_version)` and folds `proof` up to `merkle_root`
+    (`utils.merkle.verify_proof`), without downloading the rest of the day.
+    For v2 the timestamp is UTC ISO 8601 (see `services.checkpoint_frontier`).
+    """
+    d = _parse_date(date)
+    cp = await _get_checkpoint(session, d)
+    rows = (await day_rows(session, d, cp.merkle_version))[:cp.operations_count]
+    index = next((i for i, a in enumerate(rows) if a.id == audit_id), None)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Audit row not in this checkpoint")
+
+    key = (cp.id, cp.merkle_version, cp.merkle_root or "")
+    tree = _tree_cache.get(key)
+    if tree is None or len(tree) != len(rows):
+        tree = _build_tree(rows, cp.merkle_version)
+        if tree.root_hex != key[2]:
+            raise HTTPException(status_code=409, detail="Audit log no longer matches checkpoint")
+        _tree_cache[key] = tree
+        while len(_tree_cache) > _TREE_CACHE_SIZE:
+            _tree_cache.popitem(last=False)
+    else:
+        _tree_cache.move_to_end(key)
+
+    a = rows[index]
+    return {
+        "date": date,
+        "audit_id": audit_id,
+        "index": index,
+        "operations_count": len(rows),
+        "merkle_version": cp.merkle_version,
+        "merkle_root": cp.merkle_root,
+        "leaf": tree.leaf(index).hex(),
+        "audit": {
+            "prev_hash": a.prev_hash,
+            "row_hash": a.row_hash,
+            "op_type": a.op_type,
+            "entity_type": a.entity_type,
+            "entity_id": a.entity_id,
+            "payload_hash": a.payload_hash,
+            "timestamp": (a.timestamp if cp.merkle_version == MERKLE_V1 else as_utc(a.timestamp)).isoformat(),
+        },
+        "proof": proof_to_json(tree.proof(index)),
+    }
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models import Attestation, AuditLog, Invoice
+from ..services.replicas import get_read_sessions
+
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORTS = {
+    "audit": AuditLog,
+    "invoices": Invoice,
+    "attestations": Attestation,
+}
+YIELD_PER = 1000
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+async def _ndjson(
+    sessions: async_sessionmaker[AsyncSession], model: Any, since_id: int, until_id: int
+) -> AsyncIterator[bytes]:
+    """Yield one chunk of NDJSON per server-side cursor partition.
+
+    The generator owns its session: request-scoped dependencies are torn down
+    before a streaming body is sent, and the cursor must outlive the handler.
+    """
+    columns = list(model.__table__.columns)
+    names = [c.key for c in columns]
+    stmt = (
+        select(*columns)
+        .where(model.id > since_id, model.id <= until_id)
+        .order_by(model.id.asc())
+        .execution_options(yield_per=YIELD_PER)
+    )
+    dumps = json.JSONEncoder(separators=(",", ":"), default=_json_default).encode
+    async with sessions() as session:
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            yield "".join(dumps(dict(zip(names, row))) + "\n" for row in rows).encode("utf-8")
+
+
+async def _gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    async for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+@router.get("/{kind}")
+async def export_table(
+    kind: str,
+    since_id: int = Query(0, ge=0, description="Only rows with id > since_id"),
+    gzip: bool = Query(False, description="gzip the stream (Content-Encoding: gzip)"),
+    sessions: async_sessionmaker[AsyncSession] = Depends(get_read_sessions),
+):
+    """
+    Stream a full table dump as newline-delimited JSON, oldest first.
+
+    - Rows come from a server-side cursor `YIELD_PER` at a time, so memory stays
+      flat regardless of table size.
+    - The dump is bounded by the max id at request time (`X-Export-Until-Id`);
+      rows appended while streaming are picked up by the next `since_id` run.
+    - The bound and the rows come from the same database (a replica when one is
+      within the staleness bound), so the dump never skips rows.
+    - Resume an interrupted dump with `since_id=<last id received>`.
+    """
+    model = EXPORTS.get(kind)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+
+    async with sessions() as session:
+        until_id = (await session.execute(select(func.max(model.id)))).scalar_one() or 0
+
+    body = _ndjson(sessions, model, since_id, until_id)
+    headers = {"X-Export-Until-Id": str(until_id)}
+    if gzip:
+        body = _gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
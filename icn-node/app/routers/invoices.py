@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from datetime import datetime, timezone
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request
 from pydantic import BaseModel, Field
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
-from ..models import AuditLog, Invoice, Org
-from ..utils.crypto import compute_hash, canonicalize_json
+from ..middleware.signatures import SignedRoute
+from ..models import Invoice, InvoiceStatusEvent
+from ..services.audit import AuditWrite, audit_appender
+from ..services.idempotency import IdempotencyClaim, IdempotencyMismatch, idempotency_store
+from ..services.invoice_status import TRANSITIONS, StatusConflict, transition_write
+from ..services.org_registry import OrgEntry, org_registry
+from ..services.replicas import get_read_session
+from ..utils.crypto import canonicalize_json, sha256_hex
+from ..utils.crypto_pool import crypto_pool
+from ..utils.pagination import decode_cursor, next_cursor
 
 
-router = APIRouter(prefix="/invoices", tags=["invoices"])
+router = APIRouter(prefix="/invoices", tags=["invoices"], route_class=SignedRoute)
 
 
 class InvoiceCreate(BaseModel):
@@ -32,6 +44,73 @@ class InvoiceCreate(BaseModel):
     signatures: list[dict] = Field(default_factory=list)
 
 
+MAX_BATCH_ITEMS = 5000
+
+
+class InvoiceBatchItem(BaseModel):
+    """One individually signed invoice inside a batch.
+
+    `signature` is the signer's Ed25519 signature over the canonical JSON of
+    `invoice`, exactly as a single `POST /invoices` body would be signed.
+    """
+    idempotency_key: str = Field(min_length=1)
+    key_id: str
+    signature: str
+    invoice: InvoiceCreate
+
+
+class InvoiceBatch(BaseModel):
+    items: list[InvoiceBatchItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+def _invoice_write(
+    payload: InvoiceCreate,
+    signer: OrgEntry,
+    from_org: OrgEntry,
+    to_org: OrgEntry,
+    idempotency_key: str,
+    signature: Optional[str],
+) -> AuditWrite:
+    """Describe one invoice creation for the audit appender (hashed payload + row)."""
+    invoice_dict: dict[str, Any] = {
+        "from_org": payload.from_org,
+        "to_org": payload.to_org,
+        "lines": payload.lines,
+        "total": payload.total,
+        "terms": payload.terms,
+        "status": "proposed",
+        "status_history": [
+            {"status": "proposed", "by": signer.urn}
+        ],
+        "signatures": payload.signatures,
+    }
+
+    def build(prev_hash: str | None, row_hash: str) -> Invoice:
+        return Invoice(
+            idempotency_key=idempotency_key,
+            from_org_id=from_org.id,
+            to_org_id=to_org.id,
+            lines=payload.lines,
+            total=payload.total,
+            terms=payload.terms,
+            status="proposed",
+            status_history=invoice_dict["status_history"],
+            signatures=payload.signatures,
+            prev_hash=prev_hash,
+            row_hash=row_hash,
+            # Set here rather than by the DB so appender hooks can read it
+            created_at=datetime.now(timezone.utc),
+        )
+
+    return AuditWrite(
+        op_type="create",
+        entity_type="invoice",
+        payload=invoice_dict,
+        build=build,
+        signature=signature,
+    )
+
+
 @router.post("")
 async def create_invoice(
     request: Request,
@@ -43,85 +122,242 @@ async def create_invoice(
         raise HTTPException(status_code=400, detail="Idempotency-Key header required")
 
     # Verify signature against request.state.canonical_body using org public key
-    org: Org = getattr(request.state, "org", None)
+    org: OrgEntry = getattr(request.state, "org", None)
     if not org:
         raise HTTPException(status_code=401, detail="Signature verification required")
 
-    # Idempotency check
-    existing = (
-        await session.execute(select(Invoice).where(Invoice.idempotency_key == idempotency_key))
-    ).scalar_one_or_none()
-    if existing:
-        return {"id": existing.id, "idempotent": True}
+    # Replays get the stored first response; first-time keys usually skip the DB here
+    fingerprint = request.state.signed.sha256_hex
+    stored = await idempotency_store.lookup("invoices", idempotency_key, session)
+    if stored is not None:
+        return _replay(stored, org, fingerprint)
 
-    # Resolve orgs by urn
-    from_org = (
-        await session.execute(select(Org).where(Org.urn == payload.from_org))
-    ).scalar_one_or_none()
-    to_org = (
-        await session.execute(select(Org).where(Org.urn == payload.to_org))
-    ).scalar_one_or_none()
+    # Resolve orgs by urn (cached registry; misses share one query)
+    orgs = await org_registry.get_many([payload.from_org, payload.to_org], session)
+    from_org = orgs.get(payload.from_org)
+    to_org = orgs.get(payload.to_org)
     if not from_org or not to_org:
         raise HTTPException(status_code=400, detail="Unknown from_org or to_org")
 
-    # Compute prev_hash from last AuditLog
-    last = (await session.execute(select(AuditLog).order_by(AuditLog.id.desc()).limit(1))).scalar_one_or_none()
-    prev_hash = last.row_hash if last else None
+    write = _invoice_write(
+        payload,
+        signer=org,
+        from_org=from_org,
+        to_org=to_org,
+        idempotency_key=idempotency_key,
+        signature=getattr(request.state, "signature_b64", None),
+    )
+    claim = IdempotencyClaim("invoices", idempotency_key, org.id, fingerprint)
+    write.context["idempotency"] = claim
 
-    invoice_dict: dict[str, Any] = {
-        "from_org": payload.from_org,
-        "to_org": payload.to_org,
-        "lines": payload.lines,
-        "total": payload.total,
-        "terms": payload.terms,
-        "status": "proposed",
-        "status_history": [
-            {"status": "proposed", "by": org.urn}
-        ],
-        "signatures": payload.signatures,
-    }
+    # Chain + commit via the group-commit appender (prev_hash is tracked in memory).
+    # Release our read connection first so queued writers don't starve the pool.
+    await session.close()
+    try:
+        await audit_appender.append(write)
+    except IntegrityError:
+        # Lost a race on the same Idempotency-Key, or the key predates the store
+        stored = await idempotency_store.lookup("invoices", idempotency_key, session, use_filter=False)
+        if stored is not None:
+            return _replay(stored, org, fingerprint)
+        existing = (
+            await session.execute(select(Invoice).where(Invoice.idempotency_key == idempotency_key))
+        ).scalar_one_or_none()
+        if not existing:
+            raise
+        return {"id": existing.id, "idempotent": True}
 
-    payload_hash, row_hash = compute_hash(invoice_dict, prev_hash)
+    return claim.response()
 
-    inv = Invoice(
-        idempotency_key=idempotency_key,
-        from_org_id=from_org.id,
-        to_org_id=to_org.id,
-        lines=payload.lines,
-        total=payload.total,
-        terms=payload.terms,
-        status="proposed",
-        status_history=invoice_dict["status_history"],
-        signatures=payload.signatures,
-        prev_hash=prev_hash,
-        row_hash=row_hash,
+
+def _same_invoice(
+    invoice: Invoice, payload: InvoiceCreate, signer: OrgEntry, from_org: OrgEntry, to_org: OrgEntry
+) -> bool:
+    """Whether a stored invoice is the one `signer` would create from `payload`."""
+    history = invoice.status_history or []
+    return (
+        bool(history)
+        and history[0].get("by") == signer.urn
+        and invoice.from_org_id == from_org.id
+        and invoice.to_org_id == to_org.id
+        and invoice.lines == payload.lines
+        and invoice.total == payload.total
+        and invoice.terms == payload.terms
+        and invoice.signatures == payload.signatures
     )
 
-    session.add(inv)
-    await session.flush()
 
-    audit = AuditLog(
-        prev_hash=prev_hash,
-        row_hash=row_hash,
-        op_type="create",
-        entity_type="invoice",
-        entity_id=str(inv.id),
-        payload_hash=payload_hash,
-        signature=getattr(request.state, "signature_b64", None),
+def _replay(stored: Any, org: OrgEntry, fingerprint: str) -> Any:
+    try:
+        return idempotency_store.replay(stored, org.id, fingerprint)
+    except IdempotencyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was used for a different request")
+
+
+@router.post(":batch")
+async def create_invoice_batch(
+    request: Request,
+    payload: InvoiceBatch,
+    session: AsyncSession = Depends(get_session),
+):
+    """Create many individually signed invoices in one request.
+
+    - The envelope is signed by the submitter like any other write; each item is
+      additionally verified against its own `key_id`.
+    - Orgs are resolved with one set-based query. Idempotency-Keys are resolved
+      only for items whose signature verified, and replay only for the same
+      signer and invoice body (an error otherwise), as on `POST /invoices`.
+    - All accepted items are chained in order and committed in one transaction,
+      each with its own stored response, so retrying an item here or on
+      `POST /invoices` replays it.
+    - Returns per-item results in request order; failures don't block other items.
+    \f
+    Item status is one of `created`, `idempotent` or `error` (with `detail`).
+    """
+    if not getattr(request.state, "org", None):
+        raise HTTPException(status_code=401, detail="Signature verification required")
+    raw_items = request.state.signed.body["items"]
+    items = payload.items
+    results: list[dict[str, Any]] = [
+        {"index": i, "idempotency_key": item.idempotency_key} for i, item in enumerate(items)
+    ]
+
+    urns = set()
+    for item in items:
+        urns.update((item.key_id, item.invoice.from_org, item.invoice.to_org))
+    orgs = await org_registry.get_many(urns, session)
+
+    candidates: list[tuple[int, OrgEntry, OrgEntry, OrgEntry]] = []
+    for i, item in enumerate(items):
+        result = results[i]
+        signer = orgs.get(item.key_id)
+        if not signer:
+            result.update(status="error", detail="Unknown key_id")
+            continue
+        from_org = orgs.get(item.invoice.from_org)
+        to_org = orgs.get(item.invoice.to_org)
+        if not from_org or not to_org:
+            result.update(status="error", detail="Unknown from_org or to_org")
+            continue
+        candidates.append((i, signer, from_org, to_org))
+
+    # Verify all item signatures in one batch on the crypto pool
+    valid = await crypto_pool.verify_batch(
+        [(raw_items[i]["invoice"], items[i].signature, signer.verify_key) for i, signer, _, _ in candidates]
     )
-    session.add(audit)
-    await session.commit()
+    verified = []
+    for (i, signer, from_org, to_org), ok in zip(candidates, valid):
+        if not ok:
+            results[i].update(status="error", detail="Invalid signature")
+            continue
+        verified.append((i, signer, from_org, to_org, sha256_hex(canonicalize_json(raw_items[i]["invoice"]))))
+
+    # Keys are resolved only for verified items, and replayed only to the org and
+    # body that first used them, exactly as on the single path.
+    legacy = []
+    for entry in verified:
+        i, signer, _, _, fingerprint = entry
+        stored = await idempotency_store.lookup("invoices", items[i].idempotency_key, session)
+        if stored is None:
+            legacy.append(entry)
+        elif stored.org_id != signer.id or stored.fingerprint != fingerprint:
+            results[i].update(status="error", detail="Idempotency-Key was used for a different request")
+        else:
+            results[i].update(status="idempotent", **json.loads(stored.body))
+    # Keys created before the store existed have only the invoice row to compare with
+    existing = {
+        inv.idempotency_key: inv
+        for inv in (
+            await session.execute(
+                select(Invoice).where(Invoice.idempotency_key.in_({items[e[0]].idempotency_key for e in legacy}))
+            )
+        ).scalars()
+    } if legacy else {}
+    await session.close()
 
-    return {"id": inv.id, "row_hash": row_hash}
+    # Dedupe keys only among verified items, so a forged item can't shadow a genuine one
+    seen: set[str] = set()
+    pending: list[tuple[int, OrgEntry, str, AuditWrite]] = []
+    for i, signer, from_org, to_org, fingerprint in legacy:
+        item = items[i]
+        key = item.idempotency_key
+        if key in existing:
+            if _same_invoice(existing[key], item.invoice, signer, from_org, to_org):
+                results[i].update(status="idempotent", id=existing[key].id)
+            else:
+                results[i].update(status="error", detail="Idempotency-Key was used for a different request")
+            continue
+        if key in seen:
+            results[i].update(status="error", detail="Duplicate Idempotency-Key in batch")
+            continue
+        seen.add(key)
+        write = _invoice_write(item.invoice, signer, from_org, to_org, key, item.signature)
+        # Stored per item, so a retry through either endpoint replays this result
+        write.context["idempotency"] = IdempotencyClaim("invoices", key, signer.id, fingerprint)
+        pending.append((i, signer, fingerprint, write))
+
+    if pending:
+        writes = [w for _, _, _, w in pending]
+        try:
+            receipts: list[Any] = await audit_appender.append_group(writes)
+        except IntegrityError:
+            # Lost a race on some key: fall back to per-item commits so the rest still land.
+            receipts = await asyncio.gather(
+                *[audit_appender.append(w) for w in writes], return_exceptions=True
+            )
+        for (i, signer, fingerprint, write), receipt in zip(pending, receipts):
+            claim = write.context["idempotency"]
+            if isinstance(receipt, IntegrityError):
+                stored = await idempotency_store.lookup("invoices", claim.key, session, use_filter=False)
+                if stored is None:
+                    results[i].update(status="error", detail="Idempotency-Key conflict; retry to fetch the existing invoice")
+                elif stored.org_id != signer.id or stored.fingerprint != fingerprint:
+                    results[i].update(status="error", detail="Idempotency-Key was used for a different request")
+                else:
+                    results[i].update(status="idempotent", **json.loads(stored.body))
+            elif isinstance(receipt, BaseException):
+                raise receipt
+            else:
+                results[i].update(status="created", **json.loads(claim.body))
+
+    counts = {"created": 0, "idempotent": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    return {"items": results, **counts}
 
 
 @router.get("")
 async def list_invoices(
-    limit: int = 50,
-    offset: int = 0,
-    session: AsyncSession = Depends(get_session),
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    from_org: Optional[str] = Query(None),
+    to_org: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    offset: int = Query(0, ge=0, description="Deprecated: use `after`"),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    res = await session.execute(select(Invoice).order_by(Invoice.id.desc()).limit(limit).offset(offset))
+    """Newest-first invoice listing with keyset pagination.
+
+    Every filter combination is served by an `(filter columns..., id)` index, so a
+    page costs the same whether it is the first or the millionth.
+    """
+    stmt = select(
+        Invoice.id, Invoice.from_org_id, Invoice.to_org_id, Invoice.total, Invoice.status, Invoice.row_hash
+    )
+    if from_org or to_org:
+        orgs = await org_registry.get_many([u for u in (from_org, to_org) if u], session)
+        for urn, column in ((from_org, Invoice.from_org_id), (to_org, Invoice.to_org_id)):
+            if urn:
+                if urn not in orgs:
+                    raise HTTPException(status_code=400, detail="Unknown from_org or to_org")
+                stmt = stmt.where(column == orgs[urn].id)
+    if status:
+        stmt = stmt.where(Invoice.status == status)
+    if after:
+        stmt = stmt.where(Invoice.id < decode_cursor(after))
+    elif offset:
+        stmt = stmt.offset(offset)
+    rows = (await session.execute(stmt.order_by(Invoice.id.desc()).limit(limit + 1))).all()
     items = [
         {
             "id": i.id,
@@ -131,16 +367,109 @@ async def list_invoices(
             "status": i.status,
             "row_hash": i.row_hash,
         }
-        for i in res.scalars().all()
+        for i in rows[:limit]
     ]
-    return {"items": items, "limit": limit, "offset": offset}
+    return {"items": items, "limit": limit, "offset": offset, "next_cursor": next_cursor([r.id for r in rows], limit)}
+
+
+def _event_dict(e: InvoiceStatusEvent) -> dict[str, Any]:
+    return {
+        "status": e.status,
+        "previous_status": e.previous_status,
+        "by": e.actor,
+        "note": e.note,
+        "seq": e.seq,
+        "at": e.created_at,
+        "row_hash": e.row_hash,
+    }
+
+
+@router.get("/status-events")
+async def list_status_events(
+    status: str = Query(..., description="Status entered, e.g. settled"),
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on the event time"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on the event time"),
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Invoices that entered `status` in [since, until), oldest first (index on status, created_at)."""
+    stmt = select(InvoiceStatusEvent).where(InvoiceStatusEvent.status == status)
+    if since is not None:
+        stmt = stmt.where(InvoiceStatusEvent.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(InvoiceStatusEvent.created_at < until)
+    if after:
+        stmt = stmt.where(InvoiceStatusEvent.id > decode_cursor(after))
+    rows = (await session.execute(stmt.order_by(InvoiceStatusEvent.id).limit(limit + 1))).scalars().all()
+    items = [{"invoice_id": e.invoice_id, **_event_dict(e)} for e in rows[:limit]]
+    return {"items": items, "limit": limit, "next_cursor": next_cursor([e.id for e in rows], limit)}
+
+
+class StatusChange(BaseModel):
+    # Optimistic concurrency: reject unless the invoice's latest event has this seq
+    expected_seq: Optional[int] = None
+    note: Optional[str] = Field(None, max_length=2000)
+
+
+@router.post("/{invoice_id}/{action}")
+async def change_invoice_status(
+    request: Request,
+    payload: StatusChange,
+    invoice_id: int,
+    action: str = Path(pattern=r"^(accept|settle|dispute)$"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Accept, settle or dispute an invoice: one status event plus one audit-chain append.
+
+    - accept: proposed -> accepted, by the to_org
+    - settle: accepted -> settled, by the from_org
+    - dispute: proposed/accepted -> disputed, by either party
+    """
+    org: OrgEntry = getattr(request.state, "org", None)
+    if not org:
+        raise HTTPException(status_code=401, detail="Signature verification required")
+
+    inv = await session.get(Invoice, invoice_id)
+    if not inv:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    t = TRANSITIONS[action]
+    parties = {"from_org": inv.from_org_id, "to_org": inv.to_org_id}
+    if org.id not in {parties[a] for a in t.actors}:
+        raise HTTPException(status_code=403, detail=f"Only the invoice's {' or '.join(t.actors)} can {action} it")
+
+    last_seq = (
+        await session.execute(
+            select(InvoiceStatusEvent.seq)
+            .where(InvoiceStatusEvent.invoice_id == invoice_id)
+            .order_by(InvoiceStatusEvent.seq.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none() or 0
+    if payload.expected_seq is not None and payload.expected_seq != last_seq:
+        raise HTTPException(status_code=409, detail=f"Invoice has changed (latest seq is {last_seq})")
+    if inv.status not in t.from_statuses:
+        raise HTTPException(status_code=409, detail=f"Cannot {action} a {inv.status} invoice")
+
+    write = transition_write(inv, action, org.urn, last_seq + 1, payload.note, getattr(request.state, "signature_b64", None))
+    await session.close()
+    try:
+        receipt = await audit_appender.append(write)
+    except (IntegrityError, StatusConflict):
+        raise HTTPException(status_code=409, detail="Invoice status changed concurrently; reload and retry")
+    return {"id": invoice_id, "status": t.status, "seq": last_seq + 1, "row_hash": receipt.row_hash}
 
 
 @router.get("/{invoice_id}")
-async def get_invoice(invoice_id: int, session: AsyncSession = Depends(get_session)):
+async def get_invoice(invoice_id: int, session: AsyncSession = Depends(get_read_session)):
     inv = (await session.execute(select(Invoice).where(Invoice.id == invoice_id))).scalar_one_or_none()
     if not inv:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    events = (
+        await session.execute(
+            select(InvoiceStatusEvent).where(InvoiceStatusEvent.invoice_id == invoice_id).order_by(InvoiceStatusEvent.seq)
+        )
+    ).scalars().all()
     return {
         "id": inv.id,
         "from_org_id": inv.from_org_id,
@@ -149,7 +478,8 @@ async def get_invoice(invoice_id: int, session: AsyncSession = Depends(get_sessi
         "total": inv.total,
         "terms": inv.terms,
         "status": inv.status,
-        "status_history": inv.status_history,
+        # Events when present; invoices created before the event table keep their JSON
+        "status_history": [_event_dict(e) for e in events] if events else inv.status_history,
         "signatures": inv.signatures,
         "prev_hash": inv.prev_hash,
         "row_hash": inv.row_hash,
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_session
+from ..models import Org, OrgBalance, OrgPosition
+from ..services.org_registry import org_registry
+from ..services.positions import balances_as_of
+from ..utils.pagination import decode_cursor, next_cursor
+
+
+router = APIRouter(tags=["positions"])
+
+
+def _amounts(receivable: int, payable: int) -> dict[str, Any]:
+    return {"receivable": receivable / 100, "payable": payable / 100, "net": (receivable - payable) / 100}
+
+
+def _utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+@router.get("/orgs/{urn}/position")
+async def org_position(
+    urn: str,
+    as_of: Optional[datetime] = Query(None, description="ISO timestamp; omit for the current position"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Net position of one org from open invoices; current reads include each counterparty."""
+    org = await org_registry.get(urn, session)
+    if not org:
+        raise HTTPException(status_code=404, detail="Org not found")
+
+    if as_of is not None:
+        rows = await balances_as_of(session, _utc(as_of), [org.id])
+        row = rows[0] if rows else None
+        return {
+            "org": urn,
+            "as_of": _utc(as_of).isoformat(),
+            **_amounts(row.receivable_cents if row else 0, row.payable_cents if row else 0),
+        }
+
+    balance = await session.get(OrgBalance, org.id)
+    stmt = (
+        select(OrgPosition, Org.urn)
+        .join(Org, Org.id == OrgPosition.counterparty_id)
+        .where(OrgPosition.org_id == org.id, OrgPosition.open_invoices != 0)
+        .order_by(OrgPosition.counterparty_id)
+    )
+    counterparties = [
+        {"org": cp_urn, **_amounts(p.receivable_cents, p.payable_cents), "open_invoices": p.open_invoices}
+        for p, cp_urn in (await session.execute(stmt)).all()
+    ]
+    return {
+        "org": urn,
+        "as_of": None,
+        **_amounts(balance.receivable_cents if balance else 0, balance.payable_cents if balance else 0),
+        "open_invoices": balance.open_invoices if balance else 0,
+        "counterparties": counterparties,
+    }
+
+
+@router.get("/positions")
+async def list_positions(
+    as_of: Optional[datetime] = Query(None, description="ISO timestamp; omit for current positions"),
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Every org's net position, ordered by org id."""
+    after_id = decode_cursor(after) if after else 0
+    if as_of is not None:
+        rows = await balances_as_of(session, _utc(as_of), after=after_id, limit=limit + 1)
+    else:
+        rows = list(
+            (
+                await session.execute(
+                    select(OrgBalance).where(OrgBalance.org_id > after_id).order_by(OrgBalance.org_id).limit(limit + 1)
+                )
+            ).scalars()
+        )
+    ids = [r.org_id for r in rows]
+    urns = {}
+    if ids:
+        urns = dict((await session.execute(select(Org.id, Org.urn).where(Org.id.in_(ids[:limit])))).all())
+    items = []
+    for r in rows[:limit]:
+        item = {"org": urns.get(r.org_id), **_amounts(r.receivable_cents, r.payable_cents)}
+        if as_of is None:
+            item["open_invoices"] = r.open_invoices
+        items.append(item)
+    return {
+        "as_of": _utc(as_of).isoformat() if as_of else None,
+        "items": items,
+        "limit": limit,
+        "next_cursor": next_cursor(ids, limit),
+    }
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import AsyncSessionFactory, get_session
+from ..services.replication import MAX_PARTS, audit_source, head, position_of, range_digests, stream_since
+
+
+router = APIRouter(prefix="/replication", tags=["replication"])
+
+
+@router.get("/head")
+async def replication_head(session: AsyncSession = Depends(get_session)):
+    """Id and row_hash of the newest audit entry (row_hash null when the log is empty)."""
+    return await head(session)
+
+
+@router.get("/since/{row_hash}")
+async def replication_since(
+    row_hash: str,
+    limit: int = Query(1000, ge=1, le=10000),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Stream the audit entries after `row_hash` (`genesis` for the first) as NDJSON.
+
+    - Oldest first, at most `limit` entries; fewer means the follower is caught up.
+    - Each line is the audit row plus `payload`, the entity record it wrote
+      (see `app/services/replication.py`).
+    - 404 when no entry has `row_hash`: the follower's chain and this node's
+      diverge; locate the split with `/replication/digest`.
+    """
+    after_id = await position_of(session, row_hash)
+    if after_id is None:
+        raise HTTPException(status_code=404, detail="Unknown row_hash")
+    await session.close()
+    return StreamingResponse(stream_since(AsyncSessionFactory, after_id, limit), media_type="application/x-ndjson")
+
+
+@router.get("/digest")
+async def replication_digest(
+    start: int = Query(1, ge=1),
+    end: int = Query(..., ge=1, description="Exclusive upper audit id"),
+    parts: int = Query(16, ge=1, le=MAX_PARTS),
+    session: AsyncSession = Depends(get_session),
+):
+    """Merkle roots of `parts` equal sub-ranges of audit ids [start, end), for anti-entropy."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be >= start")
+    return {"start": start, "end": end, "parts": await range_digests(session, audit_source, start, end, parts)}
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_session
+from ..models import Org
+from ..services import netting
+from ..services.org_registry import org_registry
+
+
+router = APIRouter(prefix="/settlements", tags=["settlements"])
+
+
+def _parse_period(period: str) -> tuple[datetime, datetime]:
+    try:
+        start = datetime.strptime(period, "%Y-%m").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid period format (expected YYYY-MM)")
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+def _split(value: Optional[str]) -> list[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+@router.get("/suggest")
+async def suggest_settlements(
+    participants: Optional[str] = Query(None, description="Comma-separated org URNs; default all orgs"),
+    period: Optional[str] = Query(None, description="YYYY-MM (invoice created_at, UTC)"),
+    statuses: str = Query(",".join(netting.OPEN_STATUSES), description="Invoice statuses treated as open"),
+    combines_limit: int = Query(20, ge=0, le=1000),
+    session: AsyncSession = Depends(get_session),
+):
+    """Minimal set of transfers that settles every open invoice in scope (PRD §11/§16)."""
+    org_ids = None
+    urns = _split(participants)
+    if urns:
+        orgs = await org_registry.get_many(urns, session)
+        unknown = sorted(set(urns) - set(orgs))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown org(s): {', '.join(unknown[:20])}")
+        org_ids = [o.id for o in orgs.values()]
+    start, end = _parse_period(period) if period else (None, None)
+
+    ids, debtors, creditors, cents = await netting.load_open_invoices(session, _split(statuses), org_ids, start, end)
+
+    def run():
+        result = netting.suggest(ids, debtors, creditors, cents)
+        combines = netting.trace(result, ids, debtors, creditors, limit=combines_limit) if combines_limit else None
+        return result, netting.check(result), combines
+
+    result, problems, combines = await asyncio.to_thread(run)
+
+    party_ids = set(result.from_ids.tolist()) | set(result.to_ids.tolist())
+    names = {}
+    if party_ids:
+        names = dict((await session.execute(select(Org.id, Org.urn).where(Org.id.in_(party_ids)))).all())
+
+    transfers = []
+    for i, (a, b, amount) in enumerate(zip(result.from_ids.tolist(), result.to_ids.tolist(), result.cents.tolist())):
+        item = {"from": names.get(a), "to": names.get(b), "amount": amount / 100}
+        if combines is not None:
+            item["combines"] = combines[i]
+        transfers.append(item)
+    transfers.sort(key=lambda t: -t["amount"])
+
+    original = result.invoice_count
+    reduction = 1 - result.transfer_count / original if original else 0.0
+    return {
+        "period": period,
+        "participants": result.orgs,
+        "original_transfers": original,
+        "optimized_transfers": result.transfer_count,
+        "savings": {"transfer_reduction": f"{reduction:.0%}"},
+        "gross_amount": result.gross_cents / 100,
+        "net_amount": result.net_cents / 100,
+        "conserved": not problems,
+        "problems": problems,
+        "transfers": transfers,
+    }
@@ -1,80 +1,151 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Optional
+from typing import Iterable
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, select
+from pydantic import BaseModel, Field
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
-from ..models import Attestation, Invoice, Org
+from ..models import NetworkTrust, Org, TrustEdge
+from ..services.org_registry import org_registry
+from ..services.replicas import get_read_session
+from ..services.trade_graph import trade_graph
+from ..services.trust_edges import EdgeFactors, decay_to, edge_factors
 
 
 router = APIRouter(prefix="/trust", tags=["trust"])
 
 
-def time_decay(ts: datetime, half_life_days: int = 180) -> float:
-    """Half-life decay so recent interactions count more.
-
-    Using an exponential decay: w = 0.5 ** (days / half_life)
-    """
-    now = datetime.now(timezone.utc)
-    days = (now - (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc))).days
-    return 0.5 ** (days / half_life_days)
-
-
 @router.get("/score")
 async def trust_score(
     from_org: str = Query(...),
     to_org: str = Query(...),
     include_factors: bool = Query(False),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    a = (await session.execute(select(Org).where(Org.urn == from_org))).scalar_one_or_none()
-    b = (await session.execute(select(Org).where(Org.urn == to_org))).scalar_one_or_none()
+    orgs = await org_registry.get_many([from_org, to_org], session)
+    a = orgs.get(from_org)
+    b = orgs.get(to_org)
     if not a or not b:
         raise HTTPException(status_code=400, detail="Unknown org(s)")
 
-    # Direct factor: sum of totals, weighted by time decay and simple status weight
-    invs = (
-        await session.execute(
-            select(Invoice).where(and_(Invoice.from_org_id == a.id, Invoice.to_org_id == b.id))
-        )
-    ).scalars().all()
-    if not invs:
-        direct = 0.0
-    else:
-        weight_for_status = {"settled": 1.0, "accepted": 0.7, "proposed": 0.4, "disputed": 0.1}
-        direct_numer = sum(i.total * time_decay(i.created_at) * weight_for_status.get(i.status, 0.3) for i in invs)
-        direct_denom = sum(i.total for i in invs) or 1.0
-        direct = min(1.0, max(0.0, direct_numer / direct_denom))
-
-    # Attestation factor: average confidence across attestations on those invoices
-    att = (
-        await session.execute(
-            select(Attestation).where(
-                and_(Attestation.subject_type == "invoice", Attestation.subject_id.in_([str(i.id) for i in invs]))
-            )
-        )
-    ).scalars().all()
-    if not att:
-        attest = 0.0
-    else:
-        vals = []
-        for arow in att:
-            confidences = [float(c.get("confidence", 1.0)) for c in arow.claims if isinstance(c, dict)]
-            vals.append((sum(confidences) / max(1, len(confidences))) * time_decay(arow.created_at) * arow.weight)
-        attest = min(1.0, sum(vals) / max(1, len(vals)))
+    # Direct factor: invoice totals weighted by time decay and status weight.
+    # Attestation factor: average decayed confidence * weight of attestations on
+    # those invoices. Both come precomputed from the pair's trust_edges row.
+    edge = await session.get(TrustEdge, (a.id, b.id))
+    # Network factor: EigenTrust standing of the target org (compute_network_trust)
+    testimony = await session.get(NetworkTrust, b.id)
+    network = testimony.score if testimony is not None else 0.0
+    return _score(edge_factors(edge, decay_to()), network, include_factors)
 
-    disputes = 0.0
-    network = 0.0
 
+def _score(f: EdgeFactors, network: float, include_factors: bool) -> dict:
+    direct, attest = f.direct, f.attestations
+    disputes = 0.0
     score = 0.4 * direct + 0.2 * attest + 0.2 * (1 - disputes) + 0.2 * network
-    confidence = "low" if len(invs) + len(att) < 2 else ("medium" if len(invs) + len(att) < 5 else "high")
+    n = f.invoice_count + f.attestation_count
+    confidence = "low" if n < 2 else ("medium" if n < 5 else "high")
     result = {"score": round(score, 4), "confidence": confidence}
     if include_factors:
-        result["factors"] = {"direct": round(direct, 4), "attestations": round(attest, 4), "disputes": disputes, "network": network}
+        result["factors"] = {"direct": round(direct, 4), "attestations": round(attest, 4), "disputes": disputes, "network": round(network, 4)}
     return result
 
 
+class Pair(BaseModel):
+    from_org: str
+    to_org: str
+
+
+class ScoresRequest(BaseModel):
+    pairs: list[Pair] = Field(min_length=1, max_length=1000)
+    include_factors: bool = False
+
+
+async def _networks(session: AsyncSession, org_ids: Iterable[int]) -> dict[int, float]:
+    ids = set(org_ids)
+    if not ids:
+        return {}
+    stmt = select(NetworkTrust.org_id, NetworkTrust.score).where(NetworkTrust.org_id.in_(ids))
+    return dict((await session.execute(stmt)).all())
+
+
+@router.post("/scores")
+async def trust_scores(body: ScoresRequest, session: AsyncSession = Depends(get_session)):
+    """Scores for many pairs in three queries (orgs, edges, network), in request order."""
+    orgs = await org_registry.get_many([u for p in body.pairs for u in (p.from_org, p.to_org)], session)
+    unknown = sorted({u for p in body.pairs for u in (p.from_org, p.to_org)} - set(orgs))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown org(s): {', '.join(unknown[:20])}")
+
+    keys = {(orgs[p.from_org].id, orgs[p.to_org].id) for p in body.pairs}
+    stmt = select(TrustEdge).where(tuple_(TrustEdge.from_org_id, TrustEdge.to_org_id).in_(keys))
+    edges = {(e.from_org_id, e.to_org_id): e for e in (await session.execute(stmt)).scalars()}
+    networks = await _networks(session, (k[1] for k in keys))
+
+    decay = decay_to()
+    items = []
+    for p in body.pairs:
+        key = (orgs[p.from_org].id, orgs[p.to_org].id)
+        result = _score(edge_factors(edges.get(key), decay), networks.get(key[1], 0.0), body.include_factors)
+        items.append({"from_org": p.from_org, "to_org": p.to_org, **result})
+    return {"items": items}
+
+
+@router.get("/scores")
+async def trust_scores_for_org(
+    from_org: str = Query(...),
+    include_factors: bool = Query(False),
+    limit: int = Query(500, ge=1, le=5000),
+    session: AsyncSession = Depends(get_session),
+):
+    """Scores from `from_org` to every org it has traded with, best first."""
+    a = await org_registry.get(from_org, session)
+    if not a:
+        raise HTTPException(status_code=400, detail="Unknown org(s)")
+
+    # One indexed range scan of the org's outgoing edges, with the target's URN
+    # and network testimony joined in
+    stmt = (
+        select(TrustEdge, Org.urn, NetworkTrust.score)
+        .join(Org, Org.id == TrustEdge.to_org_id)
+        .outerjoin(NetworkTrust, NetworkTrust.org_id == TrustEdge.to_org_id)
+        .where(TrustEdge.from_org_id == a.id)
+    )
+    decay = decay_to()
+    items = [
+        {"to_org": urn, **_score(edge_factors(edge, decay), network or 0.0, include_factors)}
+        for edge, urn, network in (await session.execute(stmt)).all()
+    ]
+    items.sort(key=lambda item: (-item["score"], item["to_org"]))
+    return {"from_org": from_org, "items": items[:limit], "total": len(items)}
+
+
+@router.get("/path")
+async def trust_path(
+    from_org: str = Query(...),
+    to_org: str = Query(...),
+    max_hops: int = Query(3, ge=1, le=3),
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_session),
+):
+    """Best trade paths from `from_org` to `to_org`, scored by product of edge weights."""
+    orgs = await org_registry.get_many([from_org, to_org], session)
+    a = orgs.get(from_org)
+    b = orgs.get(to_org)
+    if not a or not b:
+        raise HTTPException(status_code=400, detail="Unknown org(s)")
+
+    await trade_graph.ensure_loaded()
+    paths = trade_graph.top_paths(a.id, b.id, max_hops=max_hops, k=limit)
+    ids = {org_id for p in paths for org_id in p.nodes}
+    urns = {}
+    if ids:
+        urns = dict((await session.execute(select(Org.id, Org.urn).where(Org.id.in_(ids)))).all())
+    return {
+        "paths": [
+            {"orgs": [urns.get(i) for i in p.nodes], "combined_score": round(p.score, 6), "hops": len(p.nodes) - 1}
+            for p in paths
+        ]
+    }
@@ -0,0 +1,311 @@
+"""
+In-process audit-chain appender (group commit).
+
+Why this exists
+- Every signed write appends one `AuditLog` row chained to the previous head.
+  Reading the head with `SELECT ... ORDER BY id DESC LIMIT 1` per request costs a
+  round trip and lets two concurrent writers chain onto the same head (a fork).
+- The appender is the single writer for the chain in this process: it keeps the
+  head in memory, drains queued writes in arrival order and commits everything
+  that arrived during one flush window as a single transaction.
+
+Usage
+- Routers describe a write as an `AuditWrite` (payload to hash + a builder for the
+  entity row) and `await audit_appender.append(write)`; each caller gets its own
+  `AuditReceipt` with `row_hash` back once the batch has committed.
+- `append_group` commits several writes atomically and contiguously in the chain.
+- Hooks registered with `add_hook` run inside the batch transaction after the
+  entity and audit rows are flushed, so derived tables stay consistent with the chain.
+- Listeners registered with `add_listener` run after the commit succeeds, for
+  in-memory state that must never see rolled-back writes.
+- `services.hooks.install_hooks()` registers every hook and listener the app
+  uses; `app.main` calls it once.
+
+Failure handling
+- If a batch fails to commit, the head is reloaded from the DB and each job is
+  retried in its own transaction, so one bad write (e.g. a duplicate idempotency
+  key) only fails its own caller.
+
+Metrics
+- `icn_audit_append_seconds`: caller-seen latency, queueing included
+- `icn_audit_batch_commit_seconds` / `icn_audit_batch_writes`: per committed batch
+- `icn_audit_batch_failures_total`: batches that rolled back (then retried per job)
+
+Notes
+- One appender per database is assumed (single-node MVP). Multiple processes
+  writing the same chain need an external sequencer or DB-level locking.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import WriteSessionFactory
+from ..models import AuditLog
+from ..utils.crypto import canonicalize_json, chain_hash, sha256_hex
+from ..utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# (prev_hash, row_hash) -> ORM entity to insert alongside the audit row, or None
+EntityBuilder = Callable[[Optional[str], str], Any]
+Hook = Callable[[AsyncSession, list["AuditReceipt"]], Awaitable[None]]
+Listener = Callable[[list["AuditReceipt"]], None]
+
+append_duration = metrics.histogram("icn_audit_append_seconds", "Audit append latency seen by callers")
+batch_commit_duration = metrics.histogram("icn_audit_batch_commit_seconds", "Audit batch transaction time")
+batch_writes = metrics.histogram(
+    "icn_audit_batch_writes", "Writes per committed audit batch", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+batch_failures = metrics.counter("icn_audit_batch_failures_total", "Audit batches that failed to commit")
+
+
+@dataclass
+class AuditWrite:
+    """A pending write: the payload that gets hashed plus the entity row to store."""
+    op_type: str
+    entity_type: str
+    payload: Any
+    build: EntityBuilder
+    signature: Optional[str] = None
+    # Defaults to str(entity.id) once the entity has been flushed
+    entity_id: Optional[str] = None
+    # Precomputed sha256 hex of canonicalize_json(payload), when the caller has it
+    payload_hash: Optional[str] = None
+    # Free-form data for hooks (e.g. previous status + invoice snapshot on transitions)
+    context: dict = field(default_factory=dict)
+
+
+@dataclass
+class AuditReceipt:
+    """Result of a committed write, returned to the caller that submitted it."""
+    write: AuditWrite
+    entity: Any
+    entity_id: str
+    prev_hash: Optional[str]
+    row_hash: str
+    payload_hash: str
+    # Stored as AuditLog.timestamp; set here (not by the DB) so hooks can derive
+    # checkpoint leaves without reading the row back
+    timestamp: datetime
+    # canonicalize_json(payload), the bytes payload_hash was computed over;
+    # None when the caller supplied payload_hash
+    canonical: Optional[bytes] = None
+
+
+@dataclass
+class _Job:
+    writes: list[AuditWrite]
+    future: asyncio.Future
+
+
+class AuditAppender:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = WriteSessionFactory,
+        flush_interval: float = 0.0,
+        max_batch: int = 1000,
+    ):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._hooks: list[Hook] = []
+        self._listeners: list[Listener] = []
+        self._queue: Optional[asyncio.Queue[_Job]] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._head: Optional[str] = None
+        self._head_loaded = False
+        self.batches = 0
+        self.writes = 0
+
+    def add_hook(self, hook: Hook) -> None:
+        """Run `hook(session, receipts)` inside every batch transaction before commit."""
+        self._hooks.append(hook)
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call `listener(receipts)` after every committed batch (errors are logged, not raised)."""
+        self._listeners.append(listener)
+
+    def reset(self) -> None:
+        """Forget the cached head; it is reloaded from the DB on the next flush."""
+        self._head = None
+        self._head_loaded = False
+
+    async def append(self, write: AuditWrite) -> AuditReceipt:
+        return (await self.append_group([write]))[0]
+
+    async def append_group(self, writes: list[AuditWrite]) -> list[AuditReceipt]:
+        """Chain and commit `writes` atomically, in order, within one transaction."""
+        if not writes:
+            return []
+        self._ensure_started()
+        assert self._queue is not None and self._loop is not None
+        started = time.perf_counter()
+        future = self._loop.create_future()
+        self._queue.put_nowait(_Job(list(writes), future))
+        try:
+            return await future
+        finally:
+            append_duration.observe(time.perf_counter() - started)
+
+    async def close(self) -> None:
+        """Drain queued writes and stop the worker."""
+        if self._worker is None or self._queue is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # First use, or a new event loop (e.g. a fresh asyncio.run in scripts)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+        self.reset()
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            jobs = [await queue.get()]
+            # Let concurrent callers enqueue; whatever arrives joins this batch.
+            await asyncio.sleep(self.flush_interval)
+            size = len(jobs[0].writes)
+            while size < self.max_batch and not queue.empty():
+                job = queue.get_nowait()
+                jobs.append(job)
+                size += len(job.writes)
+            try:
+                await self._flush(jobs)
+            finally:
+                for _ in jobs:
+                    queue.task_done()
+
+    async def _flush(self, jobs: list[_Job]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await self._commit(jobs)
+        except Exception as exc:
+            batch_failures.inc()
+            self.reset()
+            if len(jobs) == 1:
+                if not jobs[0].future.done():
+                    jobs[0].future.set_exception(exc)
+                return
+            # Isolate the failing job(s): retry each in its own transaction.
+            for job in jobs:
+                await self._flush([job])
+            return
+        batch_commit_duration.observe(time.perf_counter() - started)
+        batch_writes.observe(sum(len(r) for r in results))
+        for job, receipts in zip(jobs, results):
+            if not job.future.done():
+                job.future.set_result(receipts)
+
+    async def _commit(self, jobs: list[_Job]) -> list[list[AuditReceipt]]:
+        async with self._session_factory() as session:
+            if not self._head_loaded:
+                self._head = (
+                    await session.execute(select(AuditLog.row_hash).order_by(AuditLog.id.desc()).limit(1))
+                ).scalar_one_or_none()
+                self._head_loaded = True
+
+            prev = self._head
+            results: list[list[AuditReceipt]] = []
+            receipts: list[AuditReceipt] = []
+            for job in jobs:
+                job_receipts = []
+                for w in job.writes:
+                    # Keep the canonical bytes for hooks (payload store) instead of hashing and discarding them
+                    canonical = None if w.payload_hash else canonicalize_json(w.payload)
+                    payload_hash = w.payload_hash or sha256_hex(canonical)
+                    row_hash = chain_hash(prev, payload_hash)
+                    entity = w.build(prev, row_hash)
+                    job_receipts.append(
+                        AuditReceipt(
+                            write=w,
+                            entity=entity,
+                            entity_id=w.entity_id or "",
+                            prev_hash=prev,
+                            row_hash=row_hash,
+                            payload_hash=payload_hash,
+                            timestamp=datetime.now(timezone.utc),
+                            canonical=canonical,
+                        )
+                    )
+                    prev = row_hash
+                results.append(job_receipts)
+                receipts.extend(job_receipts)
+
+            entities = [r.entity for r in receipts if r.entity is not None]
+            if entities:
+                session.add_all(entities)
+                await session.flush()
+
+            # Audit rows need no generated values back: one executemany, no RETURNING.
+            for r in receipts:
+                if not r.entity_id:
+                    r.entity_id = str(r.entity.id)
+            await session.execute(
+                insert(AuditLog),
+                [
+                    {
+                        "prev_hash": r.prev_hash,
+                        "row_hash": r.row_hash,
+                        "op_type": r.write.op_type,
+                        "entity_type": r.write.entity_type,
+                        "entity_id": r.entity_id,
+                        "payload_hash": r.payload_hash,
+                        "signature": r.write.signature,
+                        "timestamp": r.timestamp,
+                    }
+                    for r in receipts
+                ],
+            )
+
+            for hook in self._hooks:
+                await hook(session, receipts)
+            await session.commit()
+
+        self._head = prev
+        self.batches += 1
+        self.writes += len(receipts)
+        for listener in self._listeners:
+            try:
+                listener(receipts)
+            except Exception:
+                logger.exception("audit appender listener failed")
+        return results
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# Process-wide appender; the flush window and batch cap are tunable via env.
+audit_appender = AuditAppender(
+    flush_interval=_env_float("AUDIT_FLUSH_INTERVAL_MS", 0.0) / 1000.0,
+    max_batch=int(_env_float("AUDIT_MAX_BATCH", 1000)),
+)
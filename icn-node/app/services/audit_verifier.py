@@ -0,0 +1,171 @@
+"""
+Streaming audit-chain verifier with a persisted watermark.
+
+What is checked, per row in id order
+- link: `prev_hash` equals the previous row's `row_hash` (None for the genesis row)
+- hash: `row_hash == sha256(prev_hash || payload_hash)` is recomputed, so an edited
+  row is caught even when its links were rewritten to match
+
+How it scales
+- Rows are read in keyset chunks (`id > last ORDER BY id LIMIT chunk_size`) of
+  four narrow columns; memory is bounded by one chunk regardless of log size.
+- `verify_incremental()` resumes from the `audit_watermarks` row ("verified up to
+  id X with hash H"), re-checks only that one anchor row, verifies whatever was
+  appended since and advances the watermark. On an already-verified log this is
+  two indexed lookups.
+- `verify_range(start_id, end_id)` checks an arbitrary slice, anchored on the row
+  just before `start_id`; it never moves the watermark.
+
+Failures report the first broken row (id, reason, expected vs actual) and leave
+the watermark where it was, so the next run fails the same way until repaired.
+Watermark writes go through the write session factory (SQLite's single writer).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionFactory, WriteSessionFactory
+from ..models import AuditLog, AuditWatermark
+from ..utils.crypto import chain_hash
+
+
+WATERMARK_NAME = "audit_chain"
+
+
+@dataclass
+class BrokenRow:
+    id: int
+    reason: str  # "prev_hash_mismatch" | "row_hash_mismatch" | "watermark_mismatch"
+    expected: Optional[str]
+    actual: Optional[str]
+
+
+@dataclass
+class VerifyResult:
+    ok: bool
+    start_id: int
+    end_id: Optional[int]
+    checked: int
+    last_id: Optional[int]
+    last_hash: Optional[str]
+    first_broken: Optional[BrokenRow] = None
+    elapsed_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out["elapsed_ms"] = round(self.elapsed_ms, 3)
+        return out
+
+
+class AuditVerifier:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionFactory,
+        chunk_size: int = 10000,
+        write_session_factory: async_sessionmaker[AsyncSession] = WriteSessionFactory,
+    ):
+        self._session_factory = session_factory
+        self._write_session_factory = write_session_factory
+        self.chunk_size = chunk_size
+        self._lock = asyncio.Lock()
+
+    async def verify_range(self, start_id: int = 1, end_id: Optional[int] = None) -> VerifyResult:
+        """Verify rows with `start_id <= id <= end_id` (open-ended if `end_id` is None)."""
+        async with self._session_factory() as session:
+            prev = (
+                await session.execute(
+                    select(AuditLog.row_hash).where(AuditLog.id < start_id).order_by(AuditLog.id.desc()).limit(1)
+                )
+            ).scalar_one_or_none()
+        return await self._scan(start_id - 1, prev, end_id)
+
+    async def verify_incremental(self) -> tuple[VerifyResult, AuditWatermark]:
+        """Verify rows appended since the watermark and advance it on success.
+
+        Returns the result for the new rows and the (possibly updated) watermark.
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            async with self._session_factory() as session:
+                mark = await session.get(AuditWatermark, WATERMARK_NAME)
+                if mark is None:
+                    mark = AuditWatermark(name=WATERMARK_NAME, verified_up_to_id=0, row_hash=None, row_count=0)
+                elif mark.verified_up_to_id:
+                    # The anchor itself must still hold, or everything after it is suspect.
+                    anchor = await session.get(AuditLog, mark.verified_up_to_id)
+                    actual = anchor.row_hash if anchor is not None else None
+                    if actual != mark.row_hash:
+                        broken = BrokenRow(mark.verified_up_to_id, "watermark_mismatch", mark.row_hash, actual)
+                        result = VerifyResult(
+                            ok=False,
+                            start_id=mark.verified_up_to_id,
+                            end_id=None,
+                            checked=0,
+                            last_id=mark.verified_up_to_id,
+                            last_hash=mark.row_hash,
+                            first_broken=broken,
+                            elapsed_ms=(time.perf_counter() - started) * 1000.0,
+                        )
+                        return result, mark
+
+            result = await self._scan(mark.verified_up_to_id, mark.row_hash, None)
+            if result.ok and result.checked:
+                async with self._write_session_factory() as session:
+                    mark = await session.merge(mark)
+                    mark.verified_up_to_id = result.last_id
+                    mark.row_hash = result.last_hash
+                    mark.row_count = mark.row_count + result.checked
+                    await session.commit()
+            result.elapsed_ms = (time.perf_counter() - started) * 1000.0
+            return result, mark
+
+    async def reset_watermark(self) -> None:
+        """Drop the watermark so the next incremental run re-verifies from genesis."""
+        async with self._lock, self._write_session_factory() as session:
+            mark = await session.get(AuditWatermark, WATERMARK_NAME)
+            if mark is not None:
+                await session.delete(mark)
+                await session.commit()
+
+    async def _scan(self, after_id: int, prev: Optional[str], end_id: Optional[int]) -> VerifyResult:
+        started = time.perf_counter()
+        result = VerifyResult(
+            ok=True, start_id=after_id + 1, end_id=end_id, checked=0, last_id=after_id or None, last_hash=prev
+        )
+        cols = (AuditLog.id, AuditLog.prev_hash, AuditLog.row_hash, AuditLog.payload_hash)
+        last_id = after_id
+        while True:
+            stmt = select(*cols).where(AuditLog.id > last_id)
+            if end_id is not None:
+                stmt = stmt.where(AuditLog.id <= end_id)
+            async with self._session_factory() as session:
+                rows = (await session.execute(stmt.order_by(AuditLog.id.asc()).limit(self.chunk_size))).all()
+            for row_id, prev_hash, row_hash, payload_hash in rows:
+                if prev_hash != prev:
+                    result.first_broken = BrokenRow(row_id, "prev_hash_mismatch", prev, prev_hash)
+                elif chain_hash(prev, payload_hash) != row_hash:
+                    result.first_broken = BrokenRow(row_id, "row_hash_mismatch", chain_hash(prev, payload_hash), row_hash)
+                if result.first_broken is not None:
+                    result.ok = False
+                    result.elapsed_ms = (time.perf_counter() - started) * 1000.0
+                    return result
+                prev = row_hash
+                result.checked += 1
+                result.last_id, result.last_hash = row_id, row_hash
+            if len(rows) < self.chunk_size:
+                break
+            last_id = rows[-1][0]
+            # Long scans share the loop with request handlers.
+            await asyncio.sleep(0)
+        result.elapsed_ms = (time.perf_counter() - started) * 1000.0
+        return result
+
+
+audit_verifier = AuditVerifier(chunk_size=int(os.getenv("AUDIT_VERIFY_CHUNK", "10000")))
@@ -0,0 +1,171 @@
+"""
+Per-day rolling Merkle frontier for checkpoints.
+
+Why this exists
+- Generating or verifying a checkpoint used to load every audit row of the day,
+  rebuild each leaf string and recompute the root: time and memory grow with
+  daily volume.
+- An appender hook now folds each new audit row into its day's frontier
+  (`checkpoint_frontiers`, O(log n) peaks) inside the same transaction as the
+  row itself. Closing a day is then reading one row and folding ~log2(n) peaks.
+
+Leaves (merkle v2)
+- Day boundaries are `[00:00, next day 00:00)` UTC.
+- Timestamps are serialized as timezone-aware UTC ISO 8601, so the leaf is the
+  same whether the driver hands back an aware (Postgres) or naive (SQLite) value.
+- v1 checkpoints keep their original serialization and inclusive 23:59:59 end;
+  they are only ever verified by a full rescan.
+
+Independent audits
+- `scan_frontier` recomputes the day from `audit_log` without touching the
+  stored frontier; the checkpoint endpoints expose it as `?full=true`.
+- Only the appender hook writes `checkpoint_frontiers`. A request-side rewrite
+  could miss a batch committed between its scan and its UPDATE, and the hook
+  would then keep extending the stale peaks.
+"""
+from __future__ import annotations
+
+from datetime import date as Date, datetime, time, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import AuditLog, CheckpointFrontier
+from ..utils.merkle import MERKLE_V1, MERKLE_V2, MerkleFrontier, leaf_hash
+from .audit import AuditReceipt
+
+
+FRONTIER_MERKLE_VERSION = MERKLE_V2
+
+LEAF_COLUMNS = (
+    AuditLog.id,
+    AuditLog.prev_hash,
+    AuditLog.row_hash,
+    AuditLog.op_type,
+    AuditLog.entity_type,
+    AuditLog.entity_id,
+    AuditLog.payload_hash,
+    AuditLog.timestamp,
+)
+
+
+def as_utc(ts: datetime) -> datetime:
+    """Aware UTC datetime; naive values (SQLite) are stored as UTC already."""
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def leaf_data(
+    prev_hash: Optional[str],
+    row_hash: Optional[str],
+    op_type: str,
+    entity_type: str,
+    entity_id: str,
+    payload_hash: str,
+    timestamp: datetime,
+    version: int = FRONTIER_MERKLE_VERSION,
+) -> bytes:
+    """Serialized leaf (PRD §11):
+    prev_hash || row_hash || op_type || entity_type || entity_id || payload_hash || timestamp
+    """
+    ts = timestamp.isoformat() if version == MERKLE_V1 else as_utc(timestamp).isoformat()
+    return f"{prev_hash or ''}|{row_hash or ''}|{op_type}|{entity_type}|{entity_id}|{payload_hash}|{ts}".encode("utf-8")
+
+
+def audit_leaf_data(a: Any, version: int = FRONTIER_MERKLE_VERSION) -> bytes:
+    return leaf_data(a.prev_hash, a.row_hash, a.op_type, a.entity_type, a.entity_id, a.payload_hash, a.timestamp, version)
+
+
+def day_bounds(d: Date, version: int = FRONTIER_MERKLE_VERSION) -> Any:
+    """Timestamp predicate selecting day `d` under `version`'s boundary rules."""
+    start = datetime.combine(d, time.min, tzinfo=timezone.utc)
+    if version == MERKLE_V1:
+        end = datetime(d.year, d.month, d.day, 23, 59, 59, tzinfo=timezone.utc)
+        return and_(AuditLog.timestamp >= start, AuditLog.timestamp <= end)
+    return and_(AuditLog.timestamp >= start, AuditLog.timestamp < start + timedelta(days=1))
+
+
+async def day_rows(session: AsyncSession, d: Date, version: int = FRONTIER_MERKLE_VERSION) -> list[Any]:
+    """All leaf columns of day `d`, in chain order."""
+    return (
+        await session.execute(select(*LEAF_COLUMNS).where(day_bounds(d, version)).order_by(AuditLog.id.asc()))
+    ).all()
+
+
+def _frontier(row: CheckpointFrontier) -> MerkleFrontier:
+    return MerkleFrontier(row.leaf_count, row.peaks, row.merkle_version)
+
+
+async def get_frontier(session: AsyncSession, d: Date) -> Optional[tuple[CheckpointFrontier, MerkleFrontier]]:
+    row = await session.get(CheckpointFrontier, d)
+    if row is None:
+        return None
+    return row, _frontier(row)
+
+
+async def scan_frontier(session: AsyncSession, d: Date) -> tuple[MerkleFrontier, Optional[str]]:
+    """Day `d`'s frontier and last row_hash, recomputed from `audit_log`; nothing is stored."""
+    frontier = MerkleFrontier(version=FRONTIER_MERKLE_VERSION)
+    last_row_hash = None
+    rows = await session.stream(
+        select(*LEAF_COLUMNS).where(day_bounds(d)).order_by(AuditLog.id.asc()).execution_options(yield_per=10000)
+    )
+    async for partition in rows.partitions():
+        frontier.extend(leaf_hash(audit_leaf_data(a), FRONTIER_MERKLE_VERSION) for a in partition)
+        last_row_hash = partition[-1].row_hash
+    return frontier, last_row_hash
+
+
+async def rebuild_frontier(session: AsyncSession, d: Date) -> tuple[CheckpointFrontier, MerkleFrontier]:
+    """Recompute day `d`'s frontier and store it (caller commits).
+
+    Only safe inside the appender's transaction, which serialises it with every
+    other frontier update; requests use `scan_frontier`.
+    """
+    frontier, last_row_hash = await scan_frontier(session, d)
+    row = await session.get(CheckpointFrontier, d)
+    if row is None:
+        row = CheckpointFrontier(day=d)
+        session.add(row)
+    row.merkle_version = FRONTIER_MERKLE_VERSION
+    row.leaf_count = frontier.count
+    row.peaks = frontier.peaks_bytes()
+    row.last_row_hash = last_row_hash
+    await session.flush()
+    return row, frontier
+
+
+async def frontier_hook(session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+    """Audit appender hook: fold the batch's rows into their days' frontiers."""
+    by_day: dict[Date, list[AuditReceipt]] = {}
+    for r in receipts:
+        by_day.setdefault(as_utc(r.timestamp).date(), []).append(r)
+
+    for d, day_receipts in by_day.items():
+        row = await session.get(CheckpointFrontier, d)
+        if row is None:
+            # First batch of the day (or first since the table appeared): the
+            # batch's rows are already flushed, so a rebuild includes them.
+            await rebuild_frontier(session, d)
+            continue
+        frontier = _frontier(row)
+        frontier.extend(
+            leaf_hash(
+                leaf_data(
+                    r.prev_hash,
+                    r.row_hash,
+                    r.write.op_type,
+                    r.write.entity_type,
+                    r.entity_id,
+                    r.payload_hash,
+                    r.timestamp,
+                ),
+                row.merkle_version,
+            )
+            for r in day_receipts
+        )
+        row.leaf_count = frontier.count
+        row.peaks = frontier.peaks_bytes()
+        row.last_row_hash = day_receipts[-1].row_hash
@@ -0,0 +1,44 @@
+"""
+Registration of every audit appender hook and listener.
+
+Why this exists
+- Derived tables (frontier, idempotency keys, invoice lines, status events,
+  trust edges, positions, rollups, payloads) are maintained by hooks inside the
+  append transaction. Registering them as an import side effect made the set
+  depend on which modules happened to be imported first.
+- `install_hooks()` registers them all, in one fixed order, from the one place
+  that owns the appender's wiring (`app.main`, which benches and demos import).
+
+Order
+- Hooks run in the order below. Listeners run after commit: the idempotency
+  cache first, then the in-memory trade graph.
+"""
+from __future__ import annotations
+
+from .audit import AuditAppender, audit_appender
+from .checkpoint_frontier import frontier_hook
+from .idempotency import idempotency_store
+from .invoice_lines import invoice_lines_hook
+from .invoice_status import status_events_hook
+from .payload_store import payload_store
+from .positions import positions_hook
+from .rollups import rollups_hook
+from .trade_graph import trade_graph
+from .trust_edges import trust_edges_hook
+
+
+def install_hooks(appender: AuditAppender = audit_appender) -> None:
+    """Register every derived-table hook and post-commit listener on `appender`. Call once."""
+    for hook in (
+        frontier_hook,
+        idempotency_store.hook,
+        invoice_lines_hook,
+        status_events_hook,
+        trust_edges_hook,
+        positions_hook,
+        rollups_hook,
+        payload_store.hook,
+    ):
+        appender.add_hook(hook)
+    appender.add_listener(idempotency_store.on_commit)
+    appender.add_listener(trade_graph.on_commit)
@@ -0,0 +1,254 @@
+"""
+Idempotency store: (scope, Idempotency-Key) -> request fingerprint -> stored response.
+
+Why this exists
+- `POST /invoices` used to `SELECT` on `Invoice.idempotency_key` before any
+  work, and a retry got `{"id", "idempotent": true}` back instead of the
+  original response. Attestations had no idempotency at all.
+- Retries from flaky field links now get the byte-identical first response,
+  and a key reused for a different body (or by a different org) is refused.
+
+Lookup path (`lookup`)
+1. In-memory LRU of recent records (replays usually arrive within seconds).
+2. Bloom filter of every live key: "definitely absent" skips the DB, so a
+   first-time key costs no query at all.
+3. Otherwise one primary-key read; found records join the LRU.
+Until the filter has loaded (one background scan of live keys on first use)
+step 2 is skipped.
+
+Write path
+- Routers attach an `IdempotencyClaim` to the `AuditWrite`
+  (`context["idempotency"]`). An audit appender hook renders each claimed
+  receipt's response, inserts the records in the write's own transaction and
+  adds the keys to the filter; the router returns `claim.body`, so the first
+  response and its replays share the same bytes.
+- The (scope, key) primary key is the real guard: a concurrent duplicate fails
+  its batch with IntegrityError, and the router replays the winner's record.
+
+Expiry
+- Records live `IDEMPOTENCY_TTL_SECONDS` (default 7 days). Expired records read
+  as absent; the hook deletes expired rows for the keys it inserts, and all
+  expired rows at most every `IDEMPOTENCY_PURGE_SECONDS`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.responses import Response
+
+from ..db import AsyncSessionFactory
+from ..models import IdempotencyKey
+from ..utils.bloom import BloomFilter
+from ..utils.metrics import metrics
+from .audit import AuditReceipt
+from .checkpoint_frontier import as_utc
+
+
+logger = logging.getLogger(__name__)
+
+lookups = metrics.counter(
+    "icn_idempotency_lookups_total",
+    "Idempotency-Key lookups, by where they were answered (cache, filter, db_hit, db_miss)",
+    ("source",),
+)
+
+
+def default_response(receipt: AuditReceipt) -> dict[str, Any]:
+    return {"id": receipt.entity.id, "row_hash": receipt.row_hash}
+
+
+@dataclass
+class IdempotencyClaim:
+    """A keyed write in flight; `body` is set by the hook before commit."""
+    scope: str
+    key: str
+    org_id: int
+    fingerprint: str
+    render: Callable[[AuditReceipt], Any] = default_response
+    status_code: int = 200
+    body: Optional[bytes] = None
+
+    def response(self) -> Response:
+        return Response(content=self.body, status_code=self.status_code, media_type="application/json")
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    org_id: int
+    fingerprint: str
+    status_code: int
+    body: bytes
+    expires_at: datetime
+
+
+class IdempotencyMismatch(Exception):
+    """The key was first used by another org or with a different request body."""
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionFactory,
+        ttl: float = 7 * 86400.0,
+        cache_size: int = 10_000,
+        filter_capacity: int = 1_000_000,
+        purge_interval: float = 3600.0,
+    ):
+        self._session_factory = session_factory
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.purge_interval = purge_interval
+        self._cache: OrderedDict[tuple[str, str], StoredResponse] = OrderedDict()
+        self._filter = BloomFilter(filter_capacity)
+        self._filter_ready = False
+        self._loading: Optional[asyncio.Task] = None
+        self._load_retry_at = 0.0
+        self._last_purge = time.monotonic()
+
+    @staticmethod
+    def _member(scope: str, key: str) -> str:
+        return f"{scope}\x00{key}"
+
+    async def lookup(
+        self, scope: str, key: str, session: AsyncSession, use_filter: bool = True
+    ) -> Optional[StoredResponse]:
+        """The live stored response for (scope, key), or None."""
+        now = datetime.now(timezone.utc)
+        cached = self._cache.get((scope, key))
+        if cached is not None:
+            if cached.expires_at > now:
+                self._cache.move_to_end((scope, key))
+                lookups.inc("cache")
+                return cached
+            del self._cache[(scope, key)]
+
+        self._ensure_filter()
+        if use_filter and self._filter_ready and self._member(scope, key) not in self._filter:
+            lookups.inc("filter")
+            return None
+
+        row = await session.get(IdempotencyKey, (scope, key))
+        if row is None or as_utc(row.expires_at) <= now:
+            lookups.inc("db_miss")
+            return None
+        lookups.inc("db_hit")
+        stored = StoredResponse(row.org_id, row.fingerprint, row.status_code, row.response, as_utc(row.expires_at))
+        self._remember(scope, key, stored)
+        return stored
+
+    def replay(self, stored: StoredResponse, org_id: int, fingerprint: str) -> Response:
+        """The stored response, if this request is the same one that created it."""
+        if stored.org_id != org_id or stored.fingerprint != fingerprint:
+            raise IdempotencyMismatch()
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    def _remember(self, scope: str, key: str, stored: StoredResponse) -> None:
+        self._cache[(scope, key)] = stored
+        self._cache.move_to_end((scope, key))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _ensure_filter(self) -> None:
+        if self._filter_ready or (self._loading is not None and not self._loading.done()):
+            return
+        if time.monotonic() < self._load_retry_at:
+            return
+        self._loading = asyncio.get_running_loop().create_task(self._load_filter())
+
+    async def _load_filter(self) -> None:
+        try:
+            async with self._session_factory() as session:
+                result = await session.stream(
+                    select(IdempotencyKey.scope, IdempotencyKey.key)
+                    .where(IdempotencyKey.expires_at > datetime.now(timezone.utc))
+                    .execution_options(yield_per=50000)
+                )
+                async for part in result.partitions():
+                    for scope, key in part:
+                        self._filter.add(self._member(scope, key))
+            self._filter_ready = True
+        except Exception:
+            self._load_retry_at = time.monotonic() + 60.0
+            logger.exception("idempotency filter load failed; lookups fall back to the DB")
+
+    async def hook(self, session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+        """Audit appender hook: store the rendered response of every claimed write."""
+        claimed = [(r, r.write.context["idempotency"]) for r in receipts if "idempotency" in r.write.context]
+        if not claimed:
+            return
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl)
+        rows = []
+        for receipt, claim in claimed:
+            claim.body = JSONResponse(claim.render(receipt)).body
+            rows.append({
+                "scope": claim.scope,
+                "key": claim.key,
+                "org_id": claim.org_id,
+                "fingerprint": claim.fingerprint,
+                "status_code": claim.status_code,
+                "response": claim.body,
+                "created_at": now,
+                "expires_at": expires_at,
+            })
+        expired = delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now)
+        if time.monotonic() - self._last_purge >= self.purge_interval:
+            self._last_purge = time.monotonic()
+        else:
+            expired = expired.where(
+                tuple_(IdempotencyKey.scope, IdempotencyKey.key).in_([(c.scope, c.key) for _, c in claimed])
+            )
+        await session.execute(expired)
+        await session.execute(insert(IdempotencyKey), rows)
+        # Before commit: a rolled-back key only costs a false positive later
+        for _, claim in claimed:
+            self._filter.add(self._member(claim.scope, claim.key))
+
+    def on_commit(self, receipts: list[AuditReceipt]) -> None:
+        """Audit appender listener: committed responses are the likeliest replays."""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        for r in receipts:
+            claim = r.write.context.get("idempotency")
+            if claim is not None and claim.body is not None:
+                stored = StoredResponse(claim.org_id, claim.fingerprint, claim.status_code, claim.body, expires_at)
+                self._remember(claim.scope, claim.key, stored)
+
+    def reset(self) -> None:
+        self._cache.clear()
+        self._filter.clear()
+        self._filter_ready = False
+        self._loading = None
+
+    def stats(self) -> dict:
+        return {
+            "cache_size": len(self._cache),
+            "cache_max_size": self.cache_size,
+            "filter_ready": self._filter_ready,
+            "filter_keys": self._filter.count,
+            "filter_capacity": self._filter.capacity,
+            "ttl_seconds": self.ttl,
+            "lookups": {s: int(lookups.value(s)) for s in ("cache", "filter", "db_hit", "db_miss")},
+        }
+
+
+idempotency_store = IdempotencyStore(
+    ttl=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(7 * 86400))),
+    cache_size=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+    filter_capacity=int(os.getenv("IDEMPOTENCY_FILTER_CAPACITY", "1000000")),
+    purge_interval=float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "3600")),
+)
@@ -0,0 +1,86 @@
+"""
+Typed invoice line items (`invoice_lines`), for aggregates that run in SQL.
+
+Why this exists
+- `Invoice.lines` is free-form JSON and `total` is a float, so per-SKU volume
+  and unit-price trends meant loading every invoice into Python.
+- An audit appender hook writes one `InvoiceLine` row per line for each new
+  invoice in the batch, as a single bulk INSERT in the write's own
+  transaction. Existing invoices were backfilled by migration `b1d6e8f24a57`.
+
+Parsing
+- `qty`/`unit_price` become `Decimal`; `amount` is qty * unit_price rounded to
+  cents, or the line's own `amount` when price or quantity is missing.
+- Values that aren't numbers, or don't fit their column (`NUMERIC(18, 4)`
+  for qty/unit_price, `NUMERIC(18, 2)` for amount), are stored as NULL rather
+  than failing the invoice; `lines` JSON stays the signed source of truth.
+"""
+from __future__ import annotations
+
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import InvoiceLine
+from .audit import AuditReceipt
+
+
+def to_decimal(value: Any) -> Optional[Decimal]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        d = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+    return d if d.is_finite() else None
+
+
+def fit(value: Optional[Decimal], precision: int, scale: int) -> Optional[Decimal]:
+    """`value` rounded to `scale` places, or None if it overflows NUMERIC(precision, scale)."""
+    if value is None:
+        return None
+    try:
+        d = value.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_EVEN)
+    except InvalidOperation:
+        return None
+    return d if d.adjusted() < precision - scale else None
+
+
+def _text(value: Any, size: int) -> Optional[str]:
+    return None if value is None else str(value)[:size]
+
+
+def line_rows(invoice: Any, created_at: Any) -> list[dict[str, Any]]:
+    """`invoice_lines` rows for one invoice (anything with id, org ids and lines)."""
+    rows = []
+    for line_no, line in enumerate(invoice.lines or [], start=1):
+        if not isinstance(line, dict):
+            continue
+        qty = to_decimal(line.get("qty"))
+        unit_price = to_decimal(line.get("unit_price"))
+        amount = qty * unit_price if qty is not None and unit_price is not None else to_decimal(line.get("amount"))
+        rows.append({
+            "invoice_id": invoice.id,
+            "line_no": line_no,
+            "from_org_id": invoice.from_org_id,
+            "to_org_id": invoice.to_org_id,
+            "sku": _text(line.get("sku"), 255),
+            "unit": _text(line.get("unit"), 64),
+            "qty": fit(qty, 18, 4),
+            "unit_price": fit(unit_price, 18, 4),
+            "amount": fit(amount, 18, 2),
+            "created_at": created_at,
+        })
+    return rows
+
+
+async def invoice_lines_hook(session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+    """Audit appender hook: one bulk insert of the lines of every invoice created in the batch."""
+    rows = []
+    for r in receipts:
+        if r.write.entity_type == "invoice" and r.write.op_type == "create" and r.entity is not None:
+            rows.extend(line_rows(r.entity, r.entity.created_at))
+    if rows:
+        await session.execute(insert(InvoiceLine), rows)
@@ -0,0 +1,139 @@
+"""
+Invoice lifecycle on an append-only event table (`invoice_status_events`).
+
+Why this exists
+- `Invoice.status_history` is a JSON list, so every transition would rewrite
+  the whole blob (and hash it into the audit payload). Questions like "which
+  invoices became settled this week" would also mean scanning JSON.
+- Each transition is now one small audit write: the chained payload is just
+  the change, and its entity row is one `InvoiceStatusEvent`. The invoice's
+  current `status` column is updated in the same transaction.
+
+Transition writes
+- `op_type` is the action (accept/settle/dispute), `entity_type` is "invoice",
+  and `entity_id` is the invoice id.
+- `context["previous_status"]` holds the status being left, and
+  `context["invoice"]` holds an `InvoiceSnapshot` after the change.
+  Derived-table hooks (trust_edges, positions) read the invoice from that
+  snapshot instead of from `receipt.entity`.
+
+Concurrency
+- Callers pass the next `seq`. The (invoice_id, seq) unique constraint, plus a
+  compare-and-set `UPDATE ... WHERE status = previous`, make a transition that
+  raced another one fail; the router reports that as 409.
+- Invoice creation writes event seq 1 through the same hook.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Invoice, InvoiceStatusEvent
+from .audit import AuditReceipt, AuditWrite
+
+
+@dataclass(frozen=True)
+class Transition:
+    status: str
+    from_statuses: tuple[str, ...]
+    # Which party may perform it: "from_org" (issuer/creditor), "to_org" (payer)
+    actors: tuple[str, ...]
+
+
+TRANSITIONS = {
+    "accept": Transition("accepted", ("proposed",), ("to_org",)),
+    "settle": Transition("settled", ("accepted",), ("from_org",)),
+    "dispute": Transition("disputed", ("proposed", "accepted"), ("from_org", "to_org")),
+}
+
+
+@dataclass(frozen=True)
+class InvoiceSnapshot:
+    id: int
+    from_org_id: int
+    to_org_id: int
+    total: float
+    status: str
+    created_at: datetime
+
+
+class StatusConflict(Exception):
+    """The invoice's status changed between the read and the transition commit."""
+
+
+def transition_write(
+    invoice: Invoice, action: str, actor: str, seq: int, note: Optional[str], signature: Optional[str]
+) -> AuditWrite:
+    """Describe one lifecycle transition for the audit appender."""
+    t = TRANSITIONS[action]
+    previous = invoice.status
+    payload = {
+        "invoice_id": invoice.id,
+        "action": action,
+        "status": t.status,
+        "previous_status": previous,
+        "seq": seq,
+        "by": actor,
+        "note": note,
+    }
+    snapshot = InvoiceSnapshot(
+        invoice.id, invoice.from_org_id, invoice.to_org_id, invoice.total, t.status, invoice.created_at
+    )
+
+    def build(prev_hash: Optional[str], row_hash: str) -> InvoiceStatusEvent:
+        return InvoiceStatusEvent(
+            invoice_id=invoice.id,
+            seq=seq,
+            status=t.status,
+            previous_status=previous,
+            actor=actor,
+            note=note,
+            row_hash=row_hash,
+            created_at=datetime.now(timezone.utc),
+        )
+
+    return AuditWrite(
+        op_type=action,
+        entity_type="invoice",
+        payload=payload,
+        build=build,
+        signature=signature,
+        entity_id=str(invoice.id),
+        context={"previous_status": previous, "invoice": snapshot},
+    )
+
+
+async def status_events_hook(session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+    """Audit appender hook: seq 1 events for new invoices; CAS status updates for transitions."""
+    created = []
+    for r in receipts:
+        e, w = r.entity, r.write
+        if w.entity_type != "invoice" or e is None:
+            continue
+        if w.op_type == "create":
+            history = e.status_history or [{}]
+            created.append({
+                "invoice_id": e.id,
+                "seq": 1,
+                "status": e.status,
+                "previous_status": None,
+                "actor": history[0].get("by"),
+                "note": None,
+                "row_hash": r.row_hash,
+                "created_at": r.timestamp,
+            })
+        elif "invoice" in w.context:
+            inv = w.context["invoice"]
+            result = await session.execute(
+                update(Invoice)
+                .where(Invoice.id == inv.id, Invoice.status == w.context["previous_status"])
+                .values(status=inv.status)
+            )
+            if result.rowcount != 1:
+                raise StatusConflict(f"invoice {inv.id} is no longer {w.context['previous_status']}")
+    if created:
+        await session.execute(insert(InvoiceStatusEvent), created)
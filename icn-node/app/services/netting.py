@@ -0,0 +1,233 @@
+"""
+Multilateral netting engine (`GET /settlements/suggest`).
+
+Input
+- Open invoices as flat arrays: invoice id, debtor org id, creditor org id and
+  amount in integer cents. The invoice's `to_org` owes `total` to its `from_org`.
+  Integer cents keep every sum exact, so conservation checks are equalities.
+
+Algorithm (vectorised, O(m + n log n) for m invoices over n orgs)
+1. Net positions: one `bincount` per side over org ids
+   (net = receivable - payable). Netting by position cancels every cycle
+   implicitly, so no cycle enumeration is needed.
+2. Exact matches: a debtor and creditor with identical |net| settle with one
+   transfer. They are paired by amount with a sorted search.
+3. Remaining positions: debtors and creditors are each sorted by size and laid
+   end to end on the line [0, total owed]. Every breakpoint of the union of
+   their cumulative sums starts one transfer, from the debtor covering that
+   segment to the creditor covering it. That gives at most
+   (debtors + creditors - 1) transfers, and nobody both pays and receives.
+
+Traceability
+- `trace` maps each suggested transfer to the invoices it directly combines,
+  i.e. open invoices between the same debtor and creditor. Every org's full list
+  of discharged invoices is the input filtered by org.
+
+Correctness
+- `check` recomputes each org's position from the transfers alone and compares
+  it with the invoice-derived net. It also checks that every amount is positive
+  and that total transferred equals total owed.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Invoice
+
+
+OPEN_STATUSES = ("proposed", "accepted")
+# float64 bincount sums integers exactly below 2^53
+_EXACT_FLOAT_LIMIT = 2 ** 53
+
+
+def to_cents(totals: np.ndarray) -> np.ndarray:
+    return np.rint(np.asarray(totals, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _sum_by(keys: np.ndarray, cents: np.ndarray, size: int) -> np.ndarray:
+    if cents.size == 0 or int(np.abs(cents).sum()) < _EXACT_FLOAT_LIMIT:
+        return np.rint(np.bincount(keys, weights=cents, minlength=size)).astype(np.int64)
+    out = np.zeros(size, dtype=np.int64)
+    np.add.at(out, keys, cents)
+    return out
+
+
+async def load_open_invoices(
+    session: AsyncSession,
+    statuses: Iterable[str] = OPEN_STATUSES,
+    org_ids: Optional[Iterable[int]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk: int = 100000,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(invoice ids, debtor org ids, creditor org ids, cents), streamed into arrays.
+
+    `org_ids` keeps invoices with both parties in the set; `start`/`end` bound
+    `created_at` as [start, end).
+    """
+    stmt = select(Invoice.id, Invoice.to_org_id, Invoice.from_org_id, Invoice.total).where(
+        Invoice.status.in_(list(statuses))
+    )
+    if org_ids is not None:
+        ids = list(org_ids)
+        stmt = stmt.where(Invoice.from_org_id.in_(ids), Invoice.to_org_id.in_(ids))
+    if start is not None:
+        stmt = stmt.where(Invoice.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Invoice.created_at < end)
+    parts: list[np.ndarray] = []
+    result = await session.stream(stmt.execution_options(yield_per=chunk))
+    async for rows in result.partitions():
+        parts.append(np.array(rows, dtype=np.float64))
+    data = np.concatenate(parts) if parts else np.zeros((0, 4))
+    ints = data[:, :3].astype(np.int64)
+    return ints[:, 0], ints[:, 1], ints[:, 2], to_cents(data[:, 3])
+
+
+def net_positions(debtors: np.ndarray, creditors: np.ndarray, cents: np.ndarray) -> np.ndarray:
+    """Net cents per org id (index = org id): receivable - payable."""
+    size = int(max(debtors.max(initial=-1), creditors.max(initial=-1))) + 1
+    return _sum_by(creditors, cents, size) - _sum_by(debtors, cents, size)
+
+
+@dataclass
+class NettingResult:
+    net: np.ndarray             # cents per org id
+    from_ids: np.ndarray        # transfer payer org ids
+    to_ids: np.ndarray          # transfer payee org ids
+    cents: np.ndarray           # transfer amounts
+    invoice_count: int
+    gross_cents: int
+    exact_matches: int
+    elapsed: float
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def transfer_count(self) -> int:
+        return len(self.cents)
+
+    @property
+    def net_cents(self) -> int:
+        return int(self.net[self.net > 0].sum())
+
+    @property
+    def orgs(self) -> int:
+        return int(np.count_nonzero(self.net))
+
+
+def suggest(
+    invoice_ids: np.ndarray, debtors: np.ndarray, creditors: np.ndarray, cents: np.ndarray
+) -> NettingResult:
+    """Minimal-transfer settlement of the given open invoices (ids are org ids)."""
+    started = time.perf_counter()
+    timings: dict[str, float] = {}
+    net = net_positions(debtors, creditors, cents)
+    timings["net_ms"] = (time.perf_counter() - started) * 1000
+
+    t = time.perf_counter()
+    d_ids = np.flatnonzero(net < 0)
+    c_ids = np.flatnonzero(net > 0)
+    d_amt = -net[d_ids]
+    c_amt = net[c_ids]
+
+    # 2. Exact matches: the r-th debtor owing `a` pairs with the r-th creditor owed `a`
+    d_order = np.argsort(d_amt, kind="stable")
+    c_order = np.argsort(c_amt, kind="stable")
+    d_sorted, c_sorted = d_amt[d_order], c_amt[c_order]
+    lo = np.searchsorted(c_sorted, d_sorted, side="left")
+    hi = np.searchsorted(c_sorted, d_sorted, side="right")
+    rank = np.arange(len(d_sorted)) - np.searchsorted(d_sorted, d_sorted, side="left")
+    matched = rank < hi - lo
+    m_d = d_order[matched]
+    m_c = c_order[(lo + rank)[matched]]
+    rest_d = np.ones(len(d_ids), dtype=bool)
+    rest_d[m_d] = False
+    rest_c = np.ones(len(c_ids), dtype=bool)
+    rest_c[m_c] = False
+
+    # 3. Merge the cumulative sums of the remaining debtors and creditors (largest first)
+    rd_ids, rd_amt = d_ids[rest_d], d_amt[rest_d]
+    rc_ids, rc_amt = c_ids[rest_c], c_amt[rest_c]
+    rd = np.argsort(-rd_amt, kind="stable")
+    rc = np.argsort(-rc_amt, kind="stable")
+    rd_ids, rd_amt, rc_ids, rc_amt = rd_ids[rd], rd_amt[rd], rc_ids[rc], rc_amt[rc]
+    cum_d, cum_c = np.cumsum(rd_amt), np.cumsum(rc_amt)
+    points = np.union1d(cum_d, cum_c)
+    seg = np.diff(points, prepend=0)
+    seg_d = np.searchsorted(cum_d, points, side="left")
+    seg_c = np.searchsorted(cum_c, points, side="left")
+
+    from_ids = np.concatenate([d_ids[m_d], rd_ids[seg_d]])
+    to_ids = np.concatenate([c_ids[m_c], rc_ids[seg_c]])
+    amounts = np.concatenate([d_amt[m_d], seg])
+    timings["transfers_ms"] = (time.perf_counter() - t) * 1000
+
+    return NettingResult(
+        net=net,
+        from_ids=from_ids,
+        to_ids=to_ids,
+        cents=amounts,
+        invoice_count=len(invoice_ids),
+        gross_cents=int(cents.sum()),
+        exact_matches=int(matched.sum()),
+        elapsed=time.perf_counter() - started,
+        timings=timings,
+    )
+
+
+def check(result: NettingResult) -> list[str]:
+    """Conservation problems in `result` (empty when every balance is preserved)."""
+    problems = []
+    if result.transfer_count and int(result.cents.min()) <= 0:
+        problems.append("non-positive transfer amount")
+    if np.any(result.from_ids == result.to_ids):
+        problems.append("transfer from an org to itself")
+    if result.transfer_count:
+        size = max(len(result.net), int(result.from_ids.max()) + 1, int(result.to_ids.max()) + 1)
+        settled = _sum_by(result.to_ids, result.cents, size) - _sum_by(result.from_ids, result.cents, size)
+    else:
+        size = len(result.net)
+        settled = np.zeros(size, dtype=np.int64)
+    net = np.zeros(size, dtype=np.int64)
+    net[:len(result.net)] = result.net
+    mismatched = np.flatnonzero(settled != net)
+    if len(mismatched):
+        problems.append(f"{len(mismatched)} org balance(s) not conserved, e.g. org {int(mismatched[0])}")
+    if int(result.cents.sum()) != result.net_cents:
+        problems.append("total transferred differs from total net owed")
+    payers, payees = np.unique(result.from_ids), np.unique(result.to_ids)
+    if np.intersect1d(payers, payees).size:
+        problems.append("an org both pays and receives")
+    return problems
+
+
+def trace(
+    result: NettingResult,
+    invoice_ids: np.ndarray,
+    debtors: np.ndarray,
+    creditors: np.ndarray,
+    limit: Optional[int] = None,
+) -> list[list[int]]:
+    """Per transfer, ids of open invoices from the same debtor to the same creditor."""
+    if not result.transfer_count:
+        return []
+    base = np.int64(max(len(result.net), int(creditors.max(initial=0)) + 1))
+    keys = debtors.astype(np.int64) * base + creditors
+    wanted = result.from_ids.astype(np.int64) * base + result.to_ids
+    hit = np.isin(keys, wanted)
+    hit_keys, hit_ids = keys[hit], invoice_ids[hit]
+    order = np.lexsort((hit_ids, hit_keys))
+    hit_keys, hit_ids = hit_keys[order], hit_ids[order]
+    starts = np.searchsorted(hit_keys, wanted, side="left")
+    ends = np.searchsorted(hit_keys, wanted, side="right")
+    if limit is not None:
+        ends = np.minimum(ends, starts + limit)
+    ids = hit_ids.tolist()
+    return [ids[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
@@ -0,0 +1,142 @@
+"""
+Shared org key registry: URN -> (org id, prebuilt Ed25519 VerifyKey).
+
+Why this exists
+- Every signed write needs the signer's public key, and most handlers resolve
+  org URNs to ids. Without a cache each request pays one `SELECT ... FROM orgs`
+  per URN plus a base64 decode and `VerifyKey` construction.
+
+Behaviour
+- Bounded LRU with a TTL; entries are immutable snapshots (`OrgEntry`).
+- Unknown URNs are never cached, so a newly seeded org is visible immediately.
+- Any ORM update/delete of an `Org` in this process invalidates its entry; other
+  writers (e.g. another node process) are covered by the TTL or `invalidate()`.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from nacl import signing
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionFactory
+from ..models import Org
+from ..utils.crypto import load_verify_key
+
+
+@dataclass(frozen=True)
+class OrgEntry:
+    id: int
+    urn: str
+    name: str
+    public_key: str
+    verify_key: signing.VerifyKey
+
+
+class OrgRegistry:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionFactory,
+        max_size: int = 10_000,
+        ttl: float = 300.0,
+    ):
+        self._session_factory = session_factory
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, OrgEntry]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, urn: str) -> Optional[OrgEntry]:
+        item = self._entries.get(urn)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self._entries[urn]
+            return None
+        self._entries.move_to_end(urn)
+        return entry
+
+    def _store(self, org: Org) -> OrgEntry:
+        entry = OrgEntry(
+            id=org.id,
+            urn=org.urn,
+            name=org.name,
+            public_key=org.public_key,
+            verify_key=load_verify_key(org.public_key),
+        )
+        self._entries[org.urn] = (time.monotonic() + self.ttl, entry)
+        self._entries.move_to_end(org.urn)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def get(self, urn: str, session: Optional[AsyncSession] = None) -> Optional[OrgEntry]:
+        """Return the org for `urn`, or None if it does not exist."""
+        return (await self.get_many([urn], session)).get(urn)
+
+    async def get_many(
+        self, urns: Iterable[str], session: Optional[AsyncSession] = None
+    ) -> dict[str, OrgEntry]:
+        """Resolve many URNs; cache misses are fetched with a single IN query."""
+        found: dict[str, OrgEntry] = {}
+        missing: set[str] = set()
+        for urn in urns:
+            if urn in found or urn in missing:
+                continue
+            entry = self._lookup(urn)
+            if entry is None:
+                missing.add(urn)
+                self.misses += 1
+            else:
+                found[urn] = entry
+                self.hits += 1
+        if missing:
+            stmt = select(Org).where(Org.urn.in_(missing))
+            if session is not None:
+                orgs = (await session.execute(stmt)).scalars().all()
+            else:
+                async with self._session_factory() as s:
+                    orgs = (await s.execute(stmt)).scalars().all()
+            for org in orgs:
+                found[org.urn] = self._store(org)
+        return found
+
+    def invalidate(self, urn: Optional[str] = None) -> None:
+        """Drop one entry (e.g. after a key rotation), or everything when `urn` is None."""
+        if urn is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(urn, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+org_registry = OrgRegistry(
+    max_size=int(os.getenv("ORG_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("ORG_CACHE_TTL_SECONDS", "300")),
+)
+
+
+@event.listens_for(Org, "after_update")
+@event.listens_for(Org, "after_delete")
+def _invalidate_org(mapper, connection, target: Org) -> None:
+    # Keys or ids changed in this process: never serve the stale VerifyKey.
+    org_registry.invalidate(target.urn)
+    for old_urn in inspect(target).attrs.urn.history.deleted or ():
+        org_registry.invalidate(old_urn)
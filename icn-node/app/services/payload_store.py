@@ -0,0 +1,330 @@
+"""
+Content-addressed store of audit payloads: payload_hash -> canonical bytes.
+
+Why this exists
+- `audit_log` keeps only payload_hash. The bytes it was computed over (e.g. the
+  `invoice_dict` built in `create_invoice`) were discarded, so nobody could
+  re-hash an entry, replay it or ship it to a mirror.
+- An audit appender hook now stores each entry's canonical bytes (kept on the
+  receipt by the appender, so nothing is serialised twice) in the entry's own
+  transaction. Identical payloads (e.g. a repeated attestation) share one row.
+
+Format
+- One zstd frame per payload, without checksum or dictionary id (the row
+  records `dict_id`; content-addressing already detects corruption, and reads
+  re-hash the bytes).
+- `PAYLOAD_ZSTD_DICTS`: comma-separated dictionary files
+  (`python -m app.train_payload_dict`). The first compresses new payloads;
+  all of them stay loaded for reading, so a new dictionary can be rolled in.
+  Small JSON payloads compress about 3x smaller with one than without (see
+  `python -m bench.payload_store`).
+
+Backends
+- Default: frames in `audit_payloads.data`.
+- `PAYLOAD_STORE_DIR`: frames appended to segment files `segment-NNNNNN.zst`
+  in that directory (rolled at `PAYLOAD_SEGMENT_MB`, default 256), and
+  `audit_payloads` holds only (segment, offset). Frames are written and
+  fsynced (`PAYLOAD_SEGMENT_FSYNC`, default 1) before the transaction commits,
+  so a committed row never points past the end of a segment; a rolled-back
+  batch leaves unreferenced bytes behind, never a dangling row. So does a
+  payload another process stored between the "known" check and the insert:
+  the insert skips existing hashes and the earlier row stays authoritative.
+- Several processes may share the directory (uvicorn workers,
+  `python -m app.follow_peer`): appends hold an `flock` on `segments.lock`
+  and take offsets from the file's end, never from a size cached in memory.
+
+Reads
+- `get_many` answers a list of hashes with one query per 1000, reads each
+  segment file once per batch in offset order, and checks every payload
+  re-hashes to its key (`PayloadCorrupt` otherwise, as for a frame that is
+  truncated or fails to decompress).
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+import zstandard
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import insert_ignore
+from ..models import AuditLog, AuditPayload
+from ..utils.crypto import canonicalize_json, sha256_hex
+from .audit import AuditReceipt
+
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 1000
+
+
+class PayloadError(Exception):
+    """A stored payload can't be read with this store's configuration."""
+
+
+class PayloadCorrupt(PayloadError):
+    """A stored payload no longer hashes to its payload_hash."""
+
+    def __init__(self, payload_hash: str):
+        super().__init__(f"payload {payload_hash} does not match its hash")
+        self.payload_hash = payload_hash
+
+
+class PayloadCodec:
+    def __init__(self, level: int = 3, dictionaries: Sequence[bytes] = ()):
+        self.level = level
+        dicts = [zstandard.ZstdCompressionDict(d) for d in dictionaries]
+        self.dict_id = dicts[0].dict_id() if dicts else 0
+        if dicts:
+            dicts[0].precompute_compress(level=level)
+        self._compressor = zstandard.ZstdCompressor(
+            level=level,
+            dict_data=dicts[0] if dicts else None,
+            write_checksum=False,
+            write_content_size=True,
+            write_dict_id=False,
+        )
+        self._decompressors = {0: zstandard.ZstdDecompressor()}
+        for d in dicts:
+            self._decompressors[d.dict_id()] = zstandard.ZstdDecompressor(dict_data=d)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, frame: bytes, dict_id: int) -> bytes:
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            raise PayloadError(f"zstd dictionary {dict_id} is not loaded (PAYLOAD_ZSTD_DICTS)")
+        return decompressor.decompress(frame)
+
+
+class SegmentFiles:
+    """Append-only segment files; positions are (segment number, byte offset)."""
+
+    def __init__(self, directory: str, segment_bytes: int = 256 << 20, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        numbers = [
+            int(name[8:14]) for name in os.listdir(directory) if name.startswith("segment-") and name.endswith(".zst")
+        ]
+        self.current = max(numbers, default=1)
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.zst")
+
+    def append(self, frames: Sequence[bytes]) -> list[tuple[int, int]]:
+        positions = []
+        with open(os.path.join(self.directory, "segments.lock"), "ab") as lock:
+            # Exclusive across processes and threads; released when `lock` closes
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            while os.path.exists(self.path(self.current + 1)):  # rolled by another process
+                self.current += 1
+            f = open(self.path(self.current), "ab")
+            try:
+                size = f.seek(0, os.SEEK_END)
+                for frame in frames:
+                    if size and size + len(frame) > self.segment_bytes:
+                        self._sync(f)
+                        f.close()
+                        self.current += 1
+                        f = open(self.path(self.current), "ab")
+                        size = f.seek(0, os.SEEK_END)
+                    positions.append((self.current, size))
+                    f.write(frame)
+                    size += len(frame)
+                self._sync(f)
+            finally:
+                f.close()
+        return positions
+
+    def _sync(self, f: Any) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def read(self, locations: Sequence[tuple[int, int, int]]) -> list[bytes]:
+        """Frames at (segment, offset, length), in input order; one open per segment."""
+        out: list[Optional[bytes]] = [None] * len(locations)
+        by_segment: dict[int, list[int]] = defaultdict(list)
+        for i, (segment, _, _) in enumerate(locations):
+            by_segment[segment].append(i)
+        for segment, indexes in by_segment.items():
+            fd = os.open(self.path(segment), os.O_RDONLY)
+            try:
+                for i in sorted(indexes, key=lambda i: locations[i][1]):
+                    _, offset, length = locations[i]
+                    out[i] = os.pread(fd, length, offset)
+            finally:
+                os.close(fd)
+        return out  # type: ignore[return-value]
+
+
+class PayloadStore:
+    def __init__(self, codec: Optional[PayloadCodec] = None, segments: Optional[SegmentFiles] = None):
+        self.codec = codec or PayloadCodec()
+        self.segments = segments
+
+    async def put_many(self, session: AsyncSession, payloads: dict[str, bytes]) -> None:
+        """Store canonical bytes by payload_hash in `session`'s transaction; known hashes are skipped."""
+        if not payloads:
+            return
+        items = list(payloads.items())
+        if self.segments is not None:
+            # Only new payloads may reach the segment files
+            known = set()
+            for i in range(0, len(items), READ_CHUNK):
+                hashes = [h for h, _ in items[i:i + READ_CHUNK]]
+                known.update(
+                    (await session.execute(select(AuditPayload.payload_hash).where(AuditPayload.payload_hash.in_(hashes))))
+                    .scalars()
+                )
+            items = [(h, data) for h, data in items if h not in known]
+            if not items:
+                return
+        now = datetime.now(timezone.utc)
+        frames = [self.codec.compress(data) for _, data in items]
+        rows = [
+            {
+                "payload_hash": h,
+                "raw_size": len(data),
+                "stored_size": len(frame),
+                "dict_id": self.codec.dict_id,
+                "data": frame,
+                "segment": None,
+                "segment_offset": None,
+                "created_at": now,
+            }
+            for (h, data), frame in zip(items, frames)
+        ]
+        if self.segments is None:
+            await insert_ignore(session, AuditPayload, rows, ("payload_hash",))
+            return
+        positions = await asyncio.to_thread(self.segments.append, frames)
+        for row, (segment, offset) in zip(rows, positions):
+            row.update(data=None, segment=segment, segment_offset=offset)
+        # Another process may have stored the same hash since the check: keep its row
+        await insert_ignore(session, AuditPayload, rows, ("payload_hash",))
+
+    async def get_many(self, session: AsyncSession, hashes: Sequence[str], verify: bool = True) -> dict[str, bytes]:
+        """payload_hash -> canonical bytes for the stored ones among `hashes`."""
+        unique = list(dict.fromkeys(hashes))
+        out: dict[str, bytes] = {}
+        for i in range(0, len(unique), READ_CHUNK):
+            rows = (
+                await session.execute(
+                    select(
+                        AuditPayload.payload_hash,
+                        AuditPayload.dict_id,
+                        AuditPayload.data,
+                        AuditPayload.segment,
+                        AuditPayload.segment_offset,
+                        AuditPayload.stored_size,
+                    ).where(AuditPayload.payload_hash.in_(unique[i:i + READ_CHUNK]))
+                )
+            ).all()
+            frames = {r.payload_hash: r.data for r in rows if r.data is not None}
+            in_files = [r for r in rows if r.data is None]
+            if in_files:
+                if self.segments is None:
+                    raise PayloadError("payloads are stored in segment files but PAYLOAD_STORE_DIR is not set")
+                locations = [(r.segment, r.segment_offset, r.stored_size) for r in in_files]
+                read = await asyncio.to_thread(self.segments.read, locations)
+                frames.update(zip((r.payload_hash for r in in_files), read))
+            for r in rows:
+                frame = frames[r.payload_hash]
+                if len(frame) != r.stored_size:
+                    raise PayloadCorrupt(r.payload_hash)
+                try:
+                    data = self.codec.decompress(frame, r.dict_id)
+                except zstandard.ZstdError:
+                    raise PayloadCorrupt(r.payload_hash) from None
+                if verify and sha256_hex(data) != r.payload_hash:
+                    raise PayloadCorrupt(r.payload_hash)
+                out[r.payload_hash] = data
+        return out
+
+    async def get(self, session: AsyncSession, payload_hash: str) -> Optional[bytes]:
+        return (await self.get_many(session, [payload_hash])).get(payload_hash)
+
+    async def hook(self, session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+        """Audit appender hook: store every entry's canonical payload bytes."""
+        payloads = {}
+        for r in receipts:
+            data = r.canonical
+            if data is None:
+                data = canonicalize_json(r.write.payload)
+                if sha256_hex(data) != r.payload_hash:
+                    # The caller's precomputed hash covers other bytes; storing these would fail every read
+                    logger.warning("payload of %s %s does not match its payload_hash; not stored", r.write.entity_type, r.entity_id)
+                    continue
+            payloads[r.payload_hash] = data
+        await self.put_many(session, payloads)
+
+    async def stats(self, session: AsyncSession) -> dict[str, Any]:
+        """Stored size, compression ratio and cost per million audit entries."""
+        entries, raw, stored = (
+            await session.execute(
+                select(func.count(), func.coalesce(func.sum(AuditPayload.raw_size), 0), func.coalesce(func.sum(AuditPayload.stored_size), 0))
+            )
+        ).one()
+        audit_entries = (await session.execute(select(func.count()).select_from(AuditLog))).scalar() or 0
+        missing = (
+            await session.execute(
+                select(func.count())
+                .select_from(AuditLog)
+                .outerjoin(AuditPayload, AuditPayload.payload_hash == AuditLog.payload_hash)
+                .where(AuditPayload.payload_hash.is_(None))
+            )
+        ).scalar() or 0
+        covered = audit_entries - missing
+        out = {
+            "backend": "segments" if self.segments is not None else "db",
+            "zstd_level": self.codec.level,
+            "dict_id": self.codec.dict_id,
+            "payloads": entries,
+            "raw_bytes": int(raw),
+            "stored_bytes": int(stored),
+            "ratio": round(raw / stored, 2) if stored else None,
+            "audit_entries": audit_entries,
+            "audit_entries_without_payload": missing,
+            "stored_bytes_per_million_entries": round(stored / covered * 1e6) if covered else None,
+        }
+        if self.segments is not None:
+            files = [n for n in os.listdir(self.segments.directory) if n.startswith("segment-")]
+            out["segment_files"] = len(files)
+            out["segment_bytes_on_disk"] = sum(os.path.getsize(os.path.join(self.segments.directory, n)) for n in files)
+        return out
+
+
+def _dictionaries() -> list[bytes]:
+    out = []
+    for path in os.getenv("PAYLOAD_ZSTD_DICTS", "").split(","):
+        if path.strip():
+            with open(path.strip(), "rb") as f:
+                out.append(f.read())
+    return out
+
+
+def _segments() -> Optional[SegmentFiles]:
+    directory = os.getenv("PAYLOAD_STORE_DIR")
+    if not directory:
+        return None
+    return SegmentFiles(
+        directory,
+        segment_bytes=int(os.getenv("PAYLOAD_SEGMENT_MB", "256")) << 20,
+        fsync=os.getenv("PAYLOAD_SEGMENT_FSYNC", "1") not in ("0", "false", "no"),
+    )
+
+
+payload_store = PayloadStore(
+    PayloadCodec(level=int(os.getenv("PAYLOAD_ZSTD_LEVEL", "3")), dictionaries=_dictionaries()),
+    _segments(),
+)
@@ -0,0 +1,254 @@
+"""
+Running net-position ledger (`org_balances`, `org_positions`, `position_journal`).
+
+Why this exists
+- Exposure and settlement questions ("what does org X owe, net?") otherwise
+  sum every invoice the org is party to.
+- An audit appender hook folds each invoice create and each status change into
+  the ledger inside the write's own transaction:
+  - `org_balances`: receivable/payable per org (primary-key read)
+  - `org_positions`: the same per (org, counterparty)
+  - `position_journal`: one append-only row per org per change, carrying the
+    org's balance after it, so a position as of any time is the org's latest
+    row at or before that time (one `(org_id, created_at)` index probe per org)
+
+Rules
+- Only open invoices count (`netting.OPEN_STATUSES`). The invoice's to_org owes
+  `total` to its from_org, and amounts are integer cents.
+- A status change (`context["previous_status"]`, invoice snapshot in
+  `context["invoice"]`) that leaves or re-enters the open set removes or
+  re-adds the invoice.
+
+Consistency
+- `python -m app.reconcile_positions` recomputes the ledger from `invoices` and
+  reports drift; `--fix` rewrites `org_balances`/`org_positions` and journals
+  a correction row per drifted org so `as_of` reads stay continuous. It locks
+  the ledger tables, so invoice writes wait for it rather than racing it.
+- The hook reads balances `FOR UPDATE` (Postgres): concurrent appends for the
+  same org serialize, so each journal row's balance-after is exact.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import lock_for_rebuild, upsert_increment
+from ..models import Invoice, Org, OrgBalance, OrgPosition, PositionJournal
+from .audit import AuditReceipt
+from .netting import OPEN_STATUSES
+
+
+SUM_COLUMNS = ("receivable_cents", "payable_cents", "open_invoices")
+
+
+def to_cents(total: float) -> int:
+    return int(round(total * 100))
+
+
+def is_open(status: Optional[str]) -> bool:
+    return status in OPEN_STATUSES
+
+
+def _empty() -> dict[str, int]:
+    return dict.fromkeys(SUM_COLUMNS, 0)
+
+
+def _add(
+    orgs: dict[int, dict[str, int]],
+    pairs: dict[tuple[int, int], dict[str, int]],
+    debtor: int,
+    creditor: int,
+    cents: int,
+    count: int,
+) -> None:
+    """Apply one open invoice (count=1) or its removal (count=-1, cents negated)."""
+    orgs[creditor]["receivable_cents"] += cents
+    orgs[creditor]["open_invoices"] += count
+    orgs[debtor]["payable_cents"] += cents
+    orgs[debtor]["open_invoices"] += count
+    pairs[(creditor, debtor)]["receivable_cents"] += cents
+    pairs[(creditor, debtor)]["open_invoices"] += count
+    pairs[(debtor, creditor)]["payable_cents"] += cents
+    pairs[(debtor, creditor)]["open_invoices"] += count
+
+
+async def positions_hook(session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+    """Audit appender hook: fold invoice creates and status changes into the ledger."""
+    changes = []
+    for r in receipts:
+        e, w = r.entity, r.write
+        if w.entity_type != "invoice" or e is None:
+            continue
+        if w.op_type == "create":
+            was_open, inv = False, e
+        elif "previous_status" in w.context:
+            was_open, inv = is_open(w.context["previous_status"]), w.context["invoice"]
+        else:
+            continue
+        now_open = is_open(inv.status)
+        if was_open != now_open:
+            sign = 1 if now_open else -1
+            changes.append((inv.to_org_id, inv.from_org_id, sign * to_cents(inv.total), sign, inv.id, r.timestamp))
+    if not changes:
+        return
+
+    org_ids = {c[0] for c in changes} | {c[1] for c in changes}
+    balances = {
+        row.org_id: [row.receivable_cents, row.payable_cents]
+        for row in await session.execute(
+            select(OrgBalance.org_id, OrgBalance.receivable_cents, OrgBalance.payable_cents)
+            .where(OrgBalance.org_id.in_(org_ids))
+            .order_by(OrgBalance.org_id)
+            .with_for_update()
+        )
+    }
+    orgs: dict[int, dict[str, int]] = defaultdict(_empty)
+    pairs: dict[tuple[int, int], dict[str, int]] = defaultdict(_empty)
+    journal = []
+    for debtor, creditor, cents, count, invoice_id, ts in changes:
+        _add(orgs, pairs, debtor, creditor, cents, count)
+        for org_id, receivable, payable in ((creditor, cents, 0), (debtor, 0, cents)):
+            bal = balances.setdefault(org_id, [0, 0])
+            bal[0] += receivable
+            bal[1] += payable
+            journal.append({
+                "org_id": org_id,
+                "invoice_id": invoice_id,
+                "receivable_delta": receivable,
+                "payable_delta": payable,
+                "receivable_cents": bal[0],
+                "payable_cents": bal[1],
+                "created_at": ts,
+            })
+
+    await upsert_increment(session, OrgBalance, [{"org_id": k, **v} for k, v in orgs.items()], ("org_id",), SUM_COLUMNS)
+    await upsert_increment(
+        session,
+        OrgPosition,
+        [{"org_id": k[0], "counterparty_id": k[1], **v} for k, v in pairs.items()],
+        ("org_id", "counterparty_id"),
+        SUM_COLUMNS,
+    )
+    await session.execute(insert(PositionJournal), journal)
+
+
+async def balances_as_of(
+    session: AsyncSession, as_of: datetime, org_ids: Optional[list[int]] = None, after: int = 0, limit: Optional[int] = None
+) -> list[Any]:
+    """Each org's latest journal row at or before `as_of` (org_id > after, by org_id).
+
+    Walks `orgs` by id and probes `ix_position_journal_org_id_created_at` once
+    per org (newest row at or before `as_of`, ties to the highest id), so a page
+    costs `limit` probes plus the orgs with no row yet, not a journal scan.
+    """
+    latest = (
+        select(PositionJournal.id)
+        .where(PositionJournal.org_id == Org.id, PositionJournal.created_at <= as_of)
+        .order_by(PositionJournal.created_at.desc(), PositionJournal.id.desc())
+        .limit(1)
+        .correlate(Org)
+        .scalar_subquery()
+    )
+    heads = select(Org.id.label("org_id"), latest.label("journal_id")).where(Org.id > after)
+    if org_ids is not None:
+        heads = heads.where(Org.id.in_(org_ids))
+    heads = heads.subquery()
+    stmt = (
+        select(PositionJournal)
+        .join(heads, PositionJournal.id == heads.c.journal_id)
+        .order_by(heads.c.org_id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list((await session.execute(stmt)).scalars())
+
+
+async def compute_positions(session: AsyncSession, chunk: int = 10000) -> dict[tuple[int, int], dict[str, int]]:
+    """Full computation of `org_positions` from open invoices (streamed)."""
+    orgs: dict[int, dict[str, int]] = defaultdict(_empty)
+    pairs: dict[tuple[int, int], dict[str, int]] = defaultdict(_empty)
+    result = await session.stream(
+        select(Invoice.from_org_id, Invoice.to_org_id, Invoice.total)
+        .where(Invoice.status.in_(OPEN_STATUSES))
+        .execution_options(yield_per=chunk)
+    )
+    async for part in result.partitions():
+        for i in part:
+            _add(orgs, pairs, i.to_org_id, i.from_org_id, to_cents(i.total), 1)
+    return pairs
+
+
+def _totals(pairs: dict[tuple[int, int], dict[str, int]]) -> dict[int, dict[str, int]]:
+    orgs: dict[int, dict[str, int]] = defaultdict(_empty)
+    for (org_id, _), v in pairs.items():
+        for col in SUM_COLUMNS:
+            orgs[org_id][col] += v[col]
+    return orgs
+
+
+async def check(session: AsyncSession) -> list[dict[str, Any]]:
+    """Differences between the stored ledger and the full computation."""
+    expected_pairs = {k: v for k, v in (await compute_positions(session)).items() if any(v.values())}
+    expected_orgs = {k: v for k, v in _totals(expected_pairs).items() if any(v.values())}
+    stored_pairs = {
+        (p.org_id, p.counterparty_id): p for p in (await session.execute(select(OrgPosition))).scalars()
+    }
+    stored_orgs = {b.org_id: b for b in (await session.execute(select(OrgBalance))).scalars()}
+    problems = []
+    for table, expected, stored in (("org_balances", expected_orgs, stored_orgs), ("org_positions", expected_pairs, stored_pairs)):
+        for key in sorted(set(expected) | set(stored)):
+            want, have = expected.get(key), stored.get(key)
+            for col in SUM_COLUMNS:
+                a = want[col] if want else 0
+                b = getattr(have, col) if have is not None else 0
+                if a != b:
+                    problems.append({"table": table, "key": key, "column": col, "expected": a, "stored": b})
+    return problems
+
+
+async def rebuild(session: AsyncSession) -> int:
+    """Replace the current-position tables with the full computation (caller commits).
+
+    Orgs whose balance changes get a correction journal row (invoice_id NULL).
+    Returns the number of corrected orgs.
+
+    Locks the ledger tables first (`db.lock_for_rebuild`). The hook reads
+    balances `FOR UPDATE`, which waits on that lock, so an append either
+    commits before the recomputation reads or journals against the rebuilt
+    balances afterwards.
+    """
+    await lock_for_rebuild(session, OrgBalance, OrgPosition, PositionJournal)
+    pairs = {k: v for k, v in (await compute_positions(session)).items() if any(v.values())}
+    orgs = {k: v for k, v in _totals(pairs).items() if any(v.values())}
+    stored = {
+        b.org_id: (b.receivable_cents, b.payable_cents)
+        for b in (await session.execute(select(OrgBalance))).scalars()
+    }
+    now = datetime.now(timezone.utc)
+    journal = []
+    for org_id in sorted(set(orgs) | set(stored)):
+        want = orgs.get(org_id, _empty())
+        have = stored.get(org_id, (0, 0))
+        if (want["receivable_cents"], want["payable_cents"]) != have:
+            journal.append({
+                "org_id": org_id,
+                "invoice_id": None,
+                "receivable_delta": want["receivable_cents"] - have[0],
+                "payable_delta": want["payable_cents"] - have[1],
+                "receivable_cents": want["receivable_cents"],
+                "payable_cents": want["payable_cents"],
+                "created_at": now,
+            })
+
+    await session.execute(delete(OrgPosition))
+    await session.execute(delete(OrgBalance))
+    pair_rows = [{"org_id": k[0], "counterparty_id": k[1], **v} for k, v in pairs.items()]
+    org_rows = [{"org_id": k, **v} for k, v in orgs.items()]
+    for model, rows in ((OrgPosition, pair_rows), (OrgBalance, org_rows), (PositionJournal, journal)):
+        for i in range(0, len(rows), 10000):
+            await session.execute(insert(model), rows[i:i + 10000])
+    return len(journal)
@@ -0,0 +1,194 @@
+"""
+Read routing: send read-only routes to replicas, within a staleness bound.
+
+Why this exists
+- Every GET (invoice listings, trust scores, checkpoint verification, exports)
+  ran on the primary, competing with the audit appender for connections.
+- `get_read_session` gives read-only routes a session on a replica from
+  `DATABASE_REPLICA_URLS`, round-robin; with no replicas configured it is
+  `get_session`.
+
+Staleness
+- The audit log is append-only and every write appends to it, so
+  `max(audit_log.id)` is a replica's replication position. Each replica's head
+  is compared with the primary's at most every `DB_REPLICA_CHECK_MS`
+  (default 1000) by a background check.
+- `DB_REPLICA_MAX_LAG` (entries, unset = any lag) bounds staleness: a replica
+  more than that many audit entries behind the primary, or one that failed its
+  last check, receives no reads. With no eligible replica reads go to the
+  primary, as they do before the first check completes.
+- Heads are only trusted while fresh: a replica (or a primary head) last
+  checked more than 2 * `DB_REPLICA_CHECK_MS` ago is ineligible until a check
+  completes, so reads after an idle period, or while checks hang, go to the
+  primary. Each head query is bounded by `check_interval` (`asyncio.wait_for`).
+- Writes must not use `get_read_session`: replica SQLite files are opened
+  query-only, and Postgres replicas refuse writes.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from ..db import AsyncSessionFactory, create_replica_engine, replica_urls
+from ..models import AuditLog
+from ..utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+reads = metrics.counter(
+    "icn_read_sessions_total",
+    "Sessions handed to read-only routes, by target (replica, primary)",
+    ("target",),
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    sessions: async_sessionmaker[AsyncSession]
+    head: Optional[int] = None
+    healthy: bool = False
+    checked_at: float = 0.0
+
+
+async def _audit_head(sessions: async_sessionmaker[AsyncSession]) -> int:
+    async with sessions() as session:
+        return (await session.execute(select(func.max(AuditLog.id)))).scalar() or 0
+
+
+class ReadRouter:
+    def __init__(
+        self,
+        primary: async_sessionmaker[AsyncSession] = AsyncSessionFactory,
+        urls: Optional[list[str]] = None,
+        max_lag: Optional[int] = None,
+        check_interval: float = 1.0,
+    ):
+        self.primary = primary
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replicas = [
+            Replica(
+                name=f"replica-{i}",
+                engine=(engine := create_replica_engine(url)),
+                sessions=async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession),
+            )
+            for i, url in enumerate(urls or [])
+        ]
+        self.primary_head: Optional[int] = None
+        self.primary_checked_at = 0.0
+        self._next = itertools.count()
+        self._checking: Optional[asyncio.Task] = None
+        self._checked_at = 0.0
+
+    def eligible(self) -> list[Replica]:
+        """Replicas that passed a recent check and are within the lag bound."""
+        now = time.monotonic()
+        fresh = 2 * self.check_interval
+        primary_known = self.primary_head is not None and now - self.primary_checked_at <= fresh
+        out = []
+        for r in self.replicas:
+            if not r.healthy or r.head is None or now - r.checked_at > fresh:
+                continue
+            if self.max_lag is not None and (not primary_known or self.primary_head - r.head > self.max_lag):
+                continue
+            out.append(r)
+        return out
+
+    def pick(self) -> async_sessionmaker[AsyncSession]:
+        """Session factory for one read: the next eligible replica, else the primary."""
+        if not self.replicas:
+            return self.primary
+        self._ensure_checked()
+        candidates = self.eligible()
+        if not candidates:
+            reads.inc("primary")
+            return self.primary
+        reads.inc("replica")
+        return candidates[next(self._next) % len(candidates)].sessions
+
+    def _ensure_checked(self) -> None:
+        if self._checking is not None and not self._checking.done():
+            return
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        self._checked_at = time.monotonic()
+        self._checking = asyncio.get_running_loop().create_task(self.check())
+
+    async def check(self) -> None:
+        """Refresh the primary's and every replica's audit head."""
+        # Replicas first: a head read before the primary's can only look staler, never fresher
+        await asyncio.gather(*[self._check_replica(r) for r in self.replicas])
+        try:
+            self.primary_head = await asyncio.wait_for(_audit_head(self.primary), self.check_interval)
+            self.primary_checked_at = time.monotonic()
+        except Exception:
+            logger.exception("primary audit head check failed")
+
+    async def _check_replica(self, r: Replica) -> None:
+        try:
+            r.head = await asyncio.wait_for(_audit_head(r.sessions), self.check_interval)
+        except Exception:
+            if r.healthy:
+                logger.exception("read replica %s failed its check; routing reads elsewhere", r.name)
+            r.healthy = False
+            return
+        r.healthy = True
+        r.checked_at = time.monotonic()
+
+    def stats(self) -> dict:
+        eligible = {r.name for r in self.eligible()}
+        return {
+            "primary_head": self.primary_head,
+            "max_lag": self.max_lag,
+            "check_interval_seconds": self.check_interval,
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "head": r.head,
+                    "lag": None if r.head is None or self.primary_head is None else self.primary_head - r.head,
+                    "checked_age_seconds": round(time.monotonic() - r.checked_at, 3) if r.checked_at else None,
+                    "eligible": r.name in eligible,
+                }
+                for r in self.replicas
+            ],
+            "reads": {t: int(reads.value(t)) for t in ("replica", "primary")},
+        }
+
+    async def close(self) -> None:
+        for r in self.replicas:
+            await r.engine.dispose()
+
+
+def _max_lag() -> Optional[int]:
+    value = os.getenv("DB_REPLICA_MAX_LAG", "").strip()
+    return int(value) if value else None
+
+
+read_router = ReadRouter(
+    urls=replica_urls(),
+    max_lag=_max_lag(),
+    check_interval=float(os.getenv("DB_REPLICA_CHECK_MS", "1000")) / 1000.0,
+)
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency for read-only routes: a replica session within the staleness bound."""
+    async with read_router.pick()() as session:
+        yield session
+
+
+async def get_read_sessions() -> async_sessionmaker[AsyncSession]:
+    """FastAPI dependency for streaming reads that open their own sessions (exports)."""
+    return read_router.pick()
@@ -0,0 +1,398 @@
+"""
+Pull-based audit log replication between nodes, with Merkle anti-entropy.
+
+Protocol (served by `routers/replication.py`)
+- `GET /replication/head`: id and row_hash of the newest audit entry.
+- `GET /replication/since/{row_hash}`: the entries after the one with that
+  row_hash (`genesis` for the first), oldest first, as NDJSON read in pages of
+  `BATCH`; each entry carries its canonical payload and entity record.
+  404 when the node has no entry with that row_hash.
+- `GET /replication/digest?start=&end=&parts=`: Merkle roots of `parts` equal
+  id sub-ranges of [start, end). Leaves are `leaf_hash("{id}:{row_hash}")`,
+  so a moved entry differs as much as a changed one.
+
+Follower (`Follower`, run by `python -m app.follow_peer`)
+- Keeps each peer's chain in `mirrored_audit_log`, never in this node's own
+  `audit_log`, and pulls from its mirror head. Every entry must have a higher
+  id than the one before, link to it (prev_hash) and hash to its row_hash
+  (sha256(prev_hash || payload_hash)); a batch is applied in one transaction.
+- When the peer doesn't know the mirror head, one side's history was
+  rewritten. `find_divergence` compares range digests, narrowing `parts` ways
+  per round trip, to the first differing id: O(log_parts n) round trips
+  instead of a re-download. With `repair` the mirror is cut there and
+  re-pulled; otherwise the follower stops with `Diverged` (a failed mirror check).
+
+Payloads
+- `canonical` is the exact payload text payload_hash was computed over, from
+  the payload store (null for entries appended before it existed). The
+  follower re-hashes it and keeps it in its own payload store.
+- `payload` is the entity record the entry wrote: the invoice (create), the
+  status event (other invoice ops, matched by row_hash) or the attestation.
+  Org ids are node-local and are replaced by URNs (`from_org`, `to_org`,
+  `attestor_org`).
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Callable, Optional
+
+import httpx
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models import Attestation, AuditLog, Invoice, InvoiceStatusEvent, MirroredAuditEntry, Org
+from ..utils.crypto import chain_hash, sha256_hex
+from ..utils.merkle import MerkleFrontier, leaf_hash
+from .checkpoint_frontier import as_utc
+from .payload_store import payload_store
+
+
+GENESIS = "genesis"
+BATCH = 1000
+MAX_PARTS = 256
+
+ENTRY_COLUMNS = (
+    "id", "prev_hash", "row_hash", "op_type", "entity_type", "entity_id", "payload_hash", "signature", "timestamp",
+)
+ORG_COLUMNS = {"from_org_id": "from_org", "to_org_id": "to_org", "attestor_org_id": "attestor_org"}
+
+
+class ReplicationError(Exception):
+    """The peer served entries that don't form a valid chain."""
+
+
+class Diverged(Exception):
+    """The mirror and the peer disagree from `audit_id` on."""
+
+    def __init__(self, audit_id: Optional[int]):
+        super().__init__(f"mirror diverges from the peer at audit id {audit_id}")
+        self.audit_id = audit_id
+
+
+# --- serving -----------------------------------------------------------------
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _record(entity: Any, urns: dict[int, str]) -> dict[str, Any]:
+    out = {}
+    for column in entity.__table__.columns:
+        value = getattr(entity, column.key)
+        if column.key in ORG_COLUMNS:
+            out[ORG_COLUMNS[column.key]] = urns.get(value)
+        else:
+            out[column.key] = value
+    return out
+
+
+def _int_ids(rows: list[Any], entity_type: str, op_type: Optional[str] = None) -> set[int]:
+    return {
+        int(r.entity_id)
+        for r in rows
+        if r.entity_type == entity_type and (op_type is None or r.op_type == op_type) and r.entity_id.isdigit()
+    }
+
+
+async def payloads(session: AsyncSession, rows: list[Any]) -> dict[int, dict[str, Any]]:
+    """Audit id -> entity record for one page of audit rows (three lookups, one org query)."""
+    invoice_ids = _int_ids(rows, "invoice", "create")
+    event_hashes = {r.row_hash for r in rows if r.entity_type == "invoice" and r.op_type != "create"}
+    event_invoice_ids = {
+        int(r.entity_id) for r in rows if r.entity_type == "invoice" and r.op_type != "create" and r.entity_id.isdigit()
+    }
+    attestation_ids = _int_ids(rows, "attestation")
+    invoices = (
+        {i.id: i for i in (await session.execute(select(Invoice).where(Invoice.id.in_(invoice_ids)))).scalars()}
+        if invoice_ids else {}
+    )
+    # row_hash isn't indexed on status events: fetch the invoices' events through the
+    # (invoice_id, seq) key and match the entries' row_hash here
+    events = (
+        {
+            e.row_hash: e
+            for e in (
+                await session.execute(
+                    select(InvoiceStatusEvent).where(InvoiceStatusEvent.invoice_id.in_(event_invoice_ids))
+                )
+            ).scalars()
+            if e.row_hash in event_hashes
+        }
+        if event_invoice_ids else {}
+    )
+    attestations = (
+        {
+            a.id: a
+            for a in (await session.execute(select(Attestation).where(Attestation.id.in_(attestation_ids)))).scalars()
+        }
+        if attestation_ids else {}
+    )
+
+    found: dict[int, Any] = {}
+    for r in rows:
+        if r.entity_type == "invoice" and r.op_type == "create":
+            entity = invoices.get(int(r.entity_id)) if r.entity_id.isdigit() else None
+        elif r.entity_type == "invoice":
+            entity = events.get(r.row_hash)
+        elif r.entity_type == "attestation":
+            entity = attestations.get(int(r.entity_id)) if r.entity_id.isdigit() else None
+        else:
+            entity = None
+        if entity is not None:
+            found[r.id] = entity
+
+    org_ids = {getattr(e, c) for e in found.values() for c in ORG_COLUMNS if hasattr(e, c)}
+    urns = (
+        dict((await session.execute(select(Org.id, Org.urn).where(Org.id.in_(org_ids)))).all()) if org_ids else {}
+    )
+    return {audit_id: _record(entity, urns) for audit_id, entity in found.items()}
+
+
+async def position_of(session: AsyncSession, row_hash: str) -> Optional[int]:
+    """Audit id of the entry with `row_hash` (0 for genesis), or None if unknown."""
+    if row_hash == GENESIS:
+        return 0
+    return (
+        await session.execute(select(AuditLog.id).where(AuditLog.row_hash == row_hash).order_by(AuditLog.id).limit(1))
+    ).scalar_one_or_none()
+
+
+async def head(session: AsyncSession) -> dict[str, Any]:
+    row = (await session.execute(select(AuditLog.id, AuditLog.row_hash).order_by(AuditLog.id.desc()).limit(1))).first()
+    return {"id": row.id if row else 0, "row_hash": row.row_hash if row else None}
+
+
+async def stream_since(
+    session_factory: async_sessionmaker[AsyncSession], after_id: int, limit: int
+) -> AsyncIterator[bytes]:
+    """NDJSON of up to `limit` entries with id > after_id, one chunk per page of `BATCH`."""
+    columns = [getattr(AuditLog, c) for c in ENTRY_COLUMNS]
+    dumps = json.JSONEncoder(separators=(",", ":"), default=_json_default).encode
+    sent = 0
+    async with session_factory() as session:
+        while sent < limit:
+            page = min(BATCH, limit - sent)
+            rows = (
+                await session.execute(select(*columns).where(AuditLog.id > after_id).order_by(AuditLog.id).limit(page))
+            ).all()
+            if not rows:
+                return
+            records = await payloads(session, rows)
+            canonical = await payload_store.get_many(session, [r.payload_hash for r in rows])
+            yield "".join(
+                dumps({
+                    **{c: getattr(r, c) for c in ENTRY_COLUMNS},
+                    "canonical": canonical[r.payload_hash].decode("utf-8") if r.payload_hash in canonical else None,
+                    "payload": records.get(r.id),
+                }) + "\n"
+                for r in rows
+            ).encode("utf-8")
+            sent += len(rows)
+            after_id = rows[-1].id
+            if len(rows) < page:
+                return
+
+
+# --- anti-entropy ------------------------------------------------------------
+
+
+def split(start: int, end: int, parts: int) -> list[tuple[int, int]]:
+    """[start, end) cut into at most `parts` contiguous, near-equal id ranges."""
+    if end <= start:
+        return []
+    step = math.ceil((end - start) / max(1, parts))
+    return [(lo, min(lo + step, end)) for lo in range(start, end, step)]
+
+
+def leaf(audit_id: int, row_hash: str) -> bytes:
+    return leaf_hash(f"{audit_id}:{row_hash}".encode("utf-8"))
+
+
+# (lo, hi) -> statement selecting (id, row_hash) with lo <= id < hi, ordered by id
+RangeSource = Callable[[int, int], Any]
+
+
+def audit_source(lo: int, hi: int) -> Any:
+    return select(AuditLog.id, AuditLog.row_hash).where(AuditLog.id >= lo, AuditLog.id < hi).order_by(AuditLog.id)
+
+
+def mirror_source(peer: str) -> RangeSource:
+    def source(lo: int, hi: int) -> Any:
+        return (
+            select(MirroredAuditEntry.id, MirroredAuditEntry.row_hash)
+            .where(MirroredAuditEntry.peer == peer, MirroredAuditEntry.id >= lo, MirroredAuditEntry.id < hi)
+            .order_by(MirroredAuditEntry.id)
+        )
+    return source
+
+
+async def range_digests(
+    session: AsyncSession, source: RangeSource, start: int, end: int, parts: int
+) -> list[dict[str, Any]]:
+    """One pass over [start, end): {start, end, count, root} per sub-range.
+
+    Frontiers keep O(log n) digests per sub-range, so memory stays flat however
+    large the range.
+    """
+    bounds = split(start, end, parts)
+    frontiers = [MerkleFrontier() for _ in bounds]
+    if bounds:
+        step = bounds[0][1] - bounds[0][0]
+        result = await session.stream(source(start, end).execution_options(yield_per=10000))
+        async for part in result.partitions():
+            for audit_id, row_hash in part:
+                frontiers[(audit_id - start) // step].append(leaf(audit_id, row_hash))
+    return [
+        {"start": lo, "end": hi, "count": f.count, "root": f.root_hex or None}
+        for (lo, hi), f in zip(bounds, frontiers)
+    ]
+
+
+# --- following ---------------------------------------------------------------
+
+
+@dataclass
+class SyncResult:
+    applied: int = 0
+    requests: int = 0
+    head_id: int = 0
+    head: Optional[str] = None
+    diverged_at: Optional[int] = None
+    repaired: bool = False
+
+
+class Follower:
+    """Mirror one peer's audit chain into `mirrored_audit_log`."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        session_factory: async_sessionmaker[AsyncSession],
+        peer: str,
+        batch: int = BATCH,
+        parts: int = 16,
+    ):
+        self.client = client
+        self._session_factory = session_factory
+        self.peer = peer
+        self.batch = batch
+        self.parts = max(2, min(parts, MAX_PARTS))
+        self.round_trips = 0
+
+    async def mirror_head(self) -> tuple[int, Optional[str]]:
+        async with self._session_factory() as session:
+            row = (
+                await session.execute(
+                    select(MirroredAuditEntry.id, MirroredAuditEntry.row_hash)
+                    .where(MirroredAuditEntry.peer == self.peer)
+                    .order_by(MirroredAuditEntry.id.desc())
+                    .limit(1)
+                )
+            ).first()
+        return (row.id, row.row_hash) if row else (0, None)
+
+    async def pull(self) -> int:
+        """Fetch and apply one batch after the mirror head; returns entries applied."""
+        head_id, head_hash = await self.mirror_head()
+        entries = []
+        self.round_trips += 1
+        async with self.client.stream(
+            "GET", f"/replication/since/{head_hash or GENESIS}", params={"limit": self.batch}
+        ) as response:
+            if response.status_code == 404:
+                raise Diverged(None)
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    entries.append(json.loads(line))
+        if not entries:
+            return 0
+
+        rows = []
+        canonical = {}
+        received_at = datetime.now(timezone.utc)
+        for e in entries:
+            if e["id"] <= head_id:
+                raise ReplicationError(f"entry {e['id']} does not follow id {head_id}")
+            if e["prev_hash"] != head_hash:
+                raise ReplicationError(f"entry {e['id']} does not link to {head_hash}")
+            if chain_hash(e["prev_hash"], e["payload_hash"]) != e["row_hash"]:
+                raise ReplicationError(f"entry {e['id']} row_hash does not match its payload_hash")
+            text = e.pop("canonical", None)
+            if text is not None:
+                data = text.encode("utf-8")
+                if sha256_hex(data) != e["payload_hash"]:
+                    raise ReplicationError(f"entry {e['id']} payload does not match its payload_hash")
+                canonical[e["payload_hash"]] = data
+            rows.append({
+                **e,
+                "peer": self.peer,
+                "timestamp": as_utc(datetime.fromisoformat(e["timestamp"])),
+                "received_at": received_at,
+            })
+            head_id, head_hash = e["id"], e["row_hash"]
+        async with self._session_factory() as session:
+            await session.execute(insert(MirroredAuditEntry), rows)
+            await payload_store.put_many(session, canonical)
+            await session.commit()
+        return len(rows)
+
+    async def peer_digests(self, start: int, end: int) -> list[dict[str, Any]]:
+        self.round_trips += 1
+        response = await self.client.get(
+            "/replication/digest", params={"start": start, "end": end, "parts": self.parts}
+        )
+        response.raise_for_status()
+        return response.json()["parts"]
+
+    async def find_divergence(self) -> Optional[int]:
+        """First mirrored audit id whose entry differs from (or is missing on) the peer."""
+        head_id, _ = await self.mirror_head()
+        lo, hi = 1, head_id + 1
+        source = mirror_source(self.peer)
+        while hi - lo > 0:
+            remote = await self.peer_digests(lo, hi)
+            async with self._session_factory() as session:
+                local = await range_digests(session, source, lo, hi, self.parts)
+            differing = next((r for r, m in zip(remote, local) if r != m), None)
+            if differing is None:
+                return None
+            if differing["end"] - differing["start"] == 1:
+                return differing["start"]
+            lo, hi = differing["start"], differing["end"]
+        return None
+
+    async def truncate(self, from_id: int) -> None:
+        async with self._session_factory() as session:
+            await session.execute(
+                delete(MirroredAuditEntry).where(MirroredAuditEntry.peer == self.peer, MirroredAuditEntry.id >= from_id)
+            )
+            await session.commit()
+
+    async def sync(self, repair: bool = False) -> SyncResult:
+        """Pull until caught up. On divergence, locate it; cut the mirror there if `repair`."""
+        result = SyncResult()
+        start = self.round_trips
+        while True:
+            try:
+                applied = await self.pull()
+            except Diverged:
+                at = await self.find_divergence()
+                result.diverged_at = at
+                if not repair or at is None or result.repaired:
+                    raise Diverged(at)
+                await self.truncate(at)
+                result.repaired = True
+                continue
+            result.applied += applied
+            if applied < self.batch:
+                break
+        result.requests = self.round_trips - start
+        result.head_id, result.head = await self.mirror_head()
+        return result
@@ -0,0 +1,262 @@
+"""
+Daily analytics rollups (`daily_rollups`), one row per (UTC day, org).
+
+Why this exists
+- The PRD §13 transaction metrics (invoices_created_daily, total_value_daily,
+  attestations_per_invoice, dispute_rate, active orgs) would otherwise scan
+  `invoices`, `attestations` and the status events on every dashboard load.
+- An audit appender hook folds each committed invoice, attestation and
+  dispute/settle transition into its day's counters with one
+  `INSERT ... ON CONFLICT DO UPDATE` per batch. `GET /analytics/daily` reads
+  only this table.
+
+Counting rules
+- The day is the UTC date of the entity's `created_at` (invoice, attestation,
+  status event), so live folding and the backfill agree.
+- Invoices count for both parties (`*_issued` for from_org, `*_received` for
+  to_org); network totals use the issued side only. Values are integer cents.
+- An org is active on a day when it has a row for it.
+
+Backfill
+- `python -m app.backfill_rollups` clears the table and rebuilds it from
+  history. Id ranges of each source table are read by parallel workers, and
+  each chunk's partial counters are added with the same upsert the hook uses.
+  `--check` compares the stored table with a recomputation instead.
+- Writes that commit while a backfill runs may be counted twice or not at all;
+  rebuild with writes paused, or re-run `--check` afterwards.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db import upsert_increment
+from ..models import Attestation, DailyRollup, Invoice, InvoiceStatusEvent
+from .audit import AuditReceipt
+from .checkpoint_frontier import as_utc
+
+
+SUM_COLUMNS = (
+    "invoices_issued",
+    "invoices_received",
+    "value_issued_cents",
+    "value_received_cents",
+    "attestations_made",
+    "disputes_issued",
+    "disputes_received",
+    "settlements_issued",
+    "settlements_received",
+)
+# Status event -> (issuer column, receiver column)
+STATUS_COLUMNS = {
+    "disputed": ("disputes_issued", "disputes_received"),
+    "settled": ("settlements_issued", "settlements_received"),
+}
+
+Counters = dict[tuple[date, int], dict[str, int]]
+
+
+def _empty() -> dict[str, int]:
+    return dict.fromkeys(SUM_COLUMNS, 0)
+
+
+def _day(ts: datetime) -> date:
+    return as_utc(ts).date()
+
+
+def fold_invoice(acc: Counters, created_at: datetime, from_org_id: int, to_org_id: int, total: float) -> None:
+    day, cents = _day(created_at), int(round(total * 100))
+    issuer, receiver = acc[(day, from_org_id)], acc[(day, to_org_id)]
+    issuer["invoices_issued"] += 1
+    issuer["value_issued_cents"] += cents
+    receiver["invoices_received"] += 1
+    receiver["value_received_cents"] += cents
+
+
+def fold_status(acc: Counters, created_at: datetime, from_org_id: int, to_org_id: int, status: str) -> None:
+    columns = STATUS_COLUMNS.get(status)
+    if columns is None:
+        return
+    day = _day(created_at)
+    acc[(day, from_org_id)][columns[0]] += 1
+    acc[(day, to_org_id)][columns[1]] += 1
+
+
+def fold_attestation(acc: Counters, created_at: datetime, attestor_org_id: int) -> None:
+    acc[(_day(created_at), attestor_org_id)]["attestations_made"] += 1
+
+
+async def apply(session: AsyncSession, acc: Counters) -> None:
+    """Add `acc` onto the stored rollups (keys sorted, so concurrent upserts lock in one order)."""
+    rows = [{"day": k[0], "org_id": k[1], **acc[k]} for k in sorted(acc)]
+    for i in range(0, len(rows), 5000):
+        await upsert_increment(session, DailyRollup, rows[i:i + 5000], ("day", "org_id"), SUM_COLUMNS)
+
+
+async def rollups_hook(session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+    """Audit appender hook: fold invoice creates, attestations and dispute/settle transitions."""
+    acc: Counters = defaultdict(_empty)
+    for r in receipts:
+        e, w = r.entity, r.write
+        if e is None:
+            continue
+        if w.entity_type == "invoice" and w.op_type == "create":
+            fold_invoice(acc, e.created_at, e.from_org_id, e.to_org_id, e.total)
+        elif w.entity_type == "invoice" and "invoice" in w.context:
+            inv = w.context["invoice"]
+            fold_status(acc, e.created_at, inv.from_org_id, inv.to_org_id, inv.status)
+        elif w.entity_type == "attestation" and w.op_type == "create":
+            fold_attestation(acc, e.created_at, e.attestor_org_id)
+    if acc:
+        await apply(session, acc)
+
+
+def _invoice_rows(lo: int, hi: int) -> Any:
+    return select(Invoice.created_at, Invoice.from_org_id, Invoice.to_org_id, Invoice.total).where(
+        Invoice.id >= lo, Invoice.id < hi
+    )
+
+
+def _status_rows(lo: int, hi: int) -> Any:
+    return (
+        select(InvoiceStatusEvent.created_at, Invoice.from_org_id, Invoice.to_org_id, InvoiceStatusEvent.status)
+        .join(Invoice, Invoice.id == InvoiceStatusEvent.invoice_id)
+        .where(InvoiceStatusEvent.id >= lo, InvoiceStatusEvent.id < hi, InvoiceStatusEvent.status.in_(STATUS_COLUMNS))
+    )
+
+
+def _attestation_rows(lo: int, hi: int) -> Any:
+    return select(Attestation.created_at, Attestation.attestor_org_id).where(Attestation.id >= lo, Attestation.id < hi)
+
+
+# Backfill sources: (table, statement for one id range [lo, hi), fold)
+SOURCES = (
+    (Invoice, _invoice_rows, fold_invoice),
+    (InvoiceStatusEvent, _status_rows, fold_status),
+    (Attestation, _attestation_rows, fold_attestation),
+)
+
+
+async def _chunks(session: AsyncSession, chunk: int) -> list[tuple[Any, Any, int, int]]:
+    jobs = []
+    for model, rows, fold in SOURCES:
+        top = (await session.execute(select(func.max(model.id)))).scalar() or 0
+        jobs.extend((rows, fold, lo, min(lo + chunk, top + 1)) for lo in range(1, top + 1, chunk))
+    return jobs
+
+
+async def _compute(session_factory: async_sessionmaker[AsyncSession], rows: Any, fold: Any, lo: int, hi: int) -> Counters:
+    acc: Counters = defaultdict(_empty)
+    async with session_factory() as session:
+        result = await session.stream(rows(lo, hi).execution_options(yield_per=10000))
+        async for part in result.partitions():
+            for row in part:
+                fold(acc, *row)
+    return acc
+
+
+async def _run_chunks(
+    session_factory: async_sessionmaker[AsyncSession],
+    jobs: list[tuple[Any, Any, int, int]],
+    workers: int,
+    done: Any,
+) -> None:
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def run(job: tuple[Any, Any, int, int]) -> None:
+        async with semaphore:
+            await done(await _compute(session_factory, *job))
+
+    await asyncio.gather(*[run(job) for job in jobs])
+
+
+async def backfill(
+    session_factory: async_sessionmaker[AsyncSession],
+    workers: int = 4,
+    chunk: int = 50000,
+    write_session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+) -> int:
+    """Rebuild `daily_rollups` from history; returns the number of chunks processed.
+
+    Chunks are read on `session_factory`; writes use `write_session_factory`
+    (default: the same), which should be SQLite's single writer.
+    """
+    writes = write_session_factory or session_factory
+    async with writes() as session:
+        await session.execute(delete(DailyRollup))
+        jobs = await _chunks(session, chunk)
+        await session.commit()
+
+    # Reads run in parallel; each chunk's counters commit on their own, one writer at a time
+    write_lock = asyncio.Lock()
+
+    async def write(acc: Counters) -> None:
+        async with write_lock, writes() as session:
+            await apply(session, acc)
+            await session.commit()
+
+    await _run_chunks(session_factory, jobs, workers, write)
+    return len(jobs)
+
+
+async def check(
+    session_factory: async_sessionmaker[AsyncSession], workers: int = 4, chunk: int = 50000
+) -> list[dict[str, Any]]:
+    """Differences between the stored rollups and a full recomputation."""
+    expected: Counters = defaultdict(_empty)
+
+    async def merge(acc: Counters) -> None:
+        for key, counts in acc.items():
+            for col, n in counts.items():
+                expected[key][col] += n
+
+    async with session_factory() as session:
+        jobs = await _chunks(session, chunk)
+    await _run_chunks(session_factory, jobs, workers, merge)
+
+    async with session_factory() as session:
+        stored = {(r.day, r.org_id): r for r in (await session.execute(select(DailyRollup))).scalars()}
+    problems = []
+    for key in sorted(set(expected) | set(stored)):
+        want, have = expected.get(key), stored.get(key)
+        for col in SUM_COLUMNS:
+            a = want[col] if want else 0
+            b = getattr(have, col) if have is not None else 0
+            if a != b:
+                problems.append({"day": key[0], "org_id": key[1], "column": col, "expected": a, "stored": b})
+    return problems
+
+
+async def daily_rows(
+    session: AsyncSession, start: date, end: date, org_id: Optional[int] = None
+) -> list[Any]:
+    """Rollup rows for days in [start, end]: one org's rows, or network totals per day."""
+    if org_id is not None:
+        stmt = (
+            select(DailyRollup)
+            .where(DailyRollup.org_id == org_id, DailyRollup.day >= start, DailyRollup.day <= end)
+            .order_by(DailyRollup.day)
+        )
+        return list((await session.execute(stmt)).scalars())
+    stmt = (
+        select(
+            DailyRollup.day,
+            *[func.sum(getattr(DailyRollup, c)).label(c) for c in SUM_COLUMNS],
+            func.count().label("active_orgs"),
+        )
+        .where(DailyRollup.day >= start, DailyRollup.day <= end)
+        .group_by(DailyRollup.day)
+        .order_by(DailyRollup.day)
+    )
+    return list((await session.execute(stmt)).all())
+
+
+async def active_orgs(session: AsyncSession, start: date, end: date) -> int:
+    """Distinct orgs with any activity in [start, end] (e.g. weekly_active_orgs)."""
+    stmt = select(func.count(func.distinct(DailyRollup.org_id))).where(DailyRollup.day >= start, DailyRollup.day <= end)
+    return int((await session.execute(stmt)).scalar() or 0)
@@ -0,0 +1,355 @@
+"""
+In-memory org trade graph for multi-hop trust paths (`GET /trust/path`).
+
+Representation
+- Orgs get dense integer indexes; edges (from_org -> to_org, one per
+  `trust_edges` row) live in two CSR structures (outgoing and incoming):
+  `indptr` int64, `indices` int32 sorted within each row, `weights` float32.
+  5M edges take ~80 MB for both directions.
+- Edge weight is the pair's local trust score (direct, attestation and dispute
+  factors, no network term) rescaled to [0, 1]; a path's combined score is the
+  product of its edge weights.
+
+Freshness
+- The full graph is loaded from `trust_edges` on first use and rebuilt in the
+  background every `TRADE_GRAPH_REFRESH_SECONDS` (weights decay over time).
+- New trading pairs arrive between rebuilds through an audit appender listener
+  (after commit) into a small delta adjacency that searches consult alongside
+  the CSR arrays; the delta is folded in at the next rebuild.
+- A rebuild builds the new arrays in a worker thread and swaps them in on the
+  event loop in one step. Pairs committed while it was reading are replayed
+  onto the new delta (pairs the snapshot already holds are skipped).
+
+Search (`top_paths`)
+- Bidirectional and vectorised: the out-neighbours of the source and the
+  in-neighbours of the target are scattered into dense weight vectors, so 2-hop
+  paths are a masked multiply and 3-hop paths expand only the smaller side by one
+  CSR gather. Hubs are bounded by a beam of the `beam` heaviest frontier nodes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import AsyncSessionFactory
+from ..models import TrustEdge
+from .audit import AuditReceipt
+from .trust_edges import decay_to, status_weight
+
+
+logger = logging.getLogger(__name__)
+
+# Weight of the local (non-network) part of a trust score: 0.4 + 0.2 + 0.2
+_LOCAL_SCORE_MAX = 0.8
+
+
+def edge_weights(
+    invoice_count: np.ndarray,
+    total_sum: np.ndarray,
+    direct_weighted: np.ndarray,
+    attestation_count: np.ndarray,
+    attest_weighted: np.ndarray,
+    decay: float,
+) -> np.ndarray:
+    """Vectorised `trust_edges.edge_factors` -> local score rescaled to [0, 1]."""
+    denom = np.where(total_sum == 0, 1.0, total_sum)
+    direct = np.where(invoice_count > 0, np.clip(direct_weighted * decay / denom, 0.0, 1.0), 0.0)
+    attest = np.where(
+        attestation_count > 0, np.minimum(1.0, attest_weighted * decay / np.maximum(attestation_count, 1)), 0.0
+    )
+    disputes = 0.0
+    return ((0.4 * direct + 0.2 * attest + 0.2 * (1 - disputes)) / _LOCAL_SCORE_MAX).astype(np.float32)
+
+
+async def load_edges(session: AsyncSession) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Every `trust_edges` row as (from_org_ids, to_org_ids, weights) arrays."""
+    cols = (
+        TrustEdge.from_org_id, TrustEdge.to_org_id, TrustEdge.invoice_count, TrustEdge.total_sum,
+        TrustEdge.direct_weighted, TrustEdge.attestation_count, TrustEdge.attest_weighted,
+    )
+    parts: list[np.ndarray] = []
+    result = await session.stream(select(*cols).execution_options(yield_per=100000))
+    async for rows in result.partitions():
+        parts.append(np.array(rows, dtype=np.float64))
+    data = np.concatenate(parts) if parts else np.zeros((0, len(cols)))
+    weights = edge_weights(*(data[:, i] for i in range(2, 7)), decay=decay_to())
+    return data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), weights
+
+
+@dataclass
+class CSR:
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    @classmethod
+    def build(cls, n: int, src: np.ndarray, dst: np.ndarray, w: np.ndarray) -> "CSR":
+        order = np.lexsort((dst, src))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(indptr, dst[order].astype(np.int32), w[order].astype(np.float32))
+
+    @property
+    def n(self) -> int:
+        return len(self.indptr) - 1
+
+    def row(self, u: int) -> tuple[np.ndarray, np.ndarray]:
+        if u >= self.n:
+            return self.indices[:0], self.weights[:0]
+        s, e = self.indptr[u], self.indptr[u + 1]
+        return self.indices[s:e], self.weights[s:e]
+
+    def has(self, u: int, v: int) -> bool:
+        idx, _ = self.row(u)
+        i = np.searchsorted(idx, v)
+        return bool(i < len(idx) and idx[i] == v)
+
+    def gather(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All edges leaving `nodes`: (position in `nodes`, neighbour, weight)."""
+        # Delta-only orgs (index >= n) have no CSR row; positions still refer to `nodes`
+        pos = np.flatnonzero(nodes < self.n)
+        nodes = nodes[pos]
+        starts = self.indptr[nodes]
+        lens = self.indptr[nodes + 1] - starts
+        total = int(lens.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, self.indices[:0], self.weights[:0]
+        owner = np.repeat(pos, lens)
+        offsets = np.repeat(starts - (np.cumsum(lens) - lens), lens) + np.arange(total)
+        return owner, self.indices[offsets], self.weights[offsets]
+
+
+@dataclass
+class Path:
+    nodes: tuple[int, ...]  # org ids, source first
+    score: float
+
+
+class TradeGraph:
+    def __init__(self, refresh_seconds: float = 3600.0, max_delta: int = 50000, beam: int = 4096):
+        self.refresh_seconds = refresh_seconds
+        self.max_delta = max_delta
+        self.beam = beam
+        self.org_ids: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.index: dict[int, int] = {}
+        self.out = CSR(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+        self.inc = self.out
+        self.out_delta: dict[int, dict[int, float]] = {}
+        self.in_delta: dict[int, dict[int, float]] = {}
+        self.delta_edges = 0
+        self.loaded_at: Optional[float] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._reloading: Optional[asyncio.Task] = None
+        self._since_snapshot: Optional[list[tuple[int, int, float]]] = None
+
+    # -- construction -------------------------------------------------------
+
+    @staticmethod
+    def build(
+        from_ids: np.ndarray, to_ids: np.ndarray, weights: np.ndarray
+    ) -> tuple[np.ndarray, dict[int, int], CSR, CSR]:
+        """(org_ids, index, out, inc) for the given edges (org ids, not indexes); touches no state."""
+        org_ids, inverse = np.unique(np.concatenate([from_ids, to_ids]), return_inverse=True)
+        n, m = len(org_ids), len(from_ids)
+        src, dst = inverse[:m].astype(np.int32), inverse[m:].astype(np.int32)
+        out = CSR.build(n, src, dst, weights)
+        inc = CSR.build(n, dst, src, weights)
+        return org_ids, dict(zip(org_ids.tolist(), range(n))), out, inc
+
+    def swap(self, built: tuple[np.ndarray, dict[int, int], CSR, CSR]) -> None:
+        """Install a `build` result and clear the delta (call on the event loop)."""
+        self.org_ids, self.index, self.out, self.inc = built
+        self.out_delta, self.in_delta, self.delta_edges = {}, {}, 0
+        self.loaded_at = time.monotonic()
+
+    def set_edges(self, from_ids: np.ndarray, to_ids: np.ndarray, weights: np.ndarray) -> None:
+        """Replace the graph with the given edges (org ids, not indexes)."""
+        self.swap(self.build(from_ids, to_ids, weights))
+
+    @classmethod
+    def from_edges(cls, from_ids: np.ndarray, to_ids: np.ndarray, weights: np.ndarray, **kwargs) -> "TradeGraph":
+        graph = cls(**kwargs)
+        graph.set_edges(from_ids, to_ids, weights)
+        return graph
+
+    async def load(self) -> None:
+        """(Re)build from `trust_edges`; the CSR build runs off the event loop."""
+        self._since_snapshot = []
+        try:
+            async with AsyncSessionFactory() as session:
+                edges = await load_edges(session)
+            built = await asyncio.to_thread(self.build, *edges)
+            since = self._since_snapshot
+        finally:
+            self._since_snapshot = None
+        self.swap(built)
+        for from_id, to_id, weight in since:
+            self.add_edge(from_id, to_id, weight)
+
+    async def ensure_loaded(self) -> None:
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        if self.loaded_at is None:
+            async with self._load_lock:
+                if self.loaded_at is None:
+                    await self.load()
+            return
+        stale = time.monotonic() - self.loaded_at > self.refresh_seconds or self.delta_edges > self.max_delta
+        if stale and (self._reloading is None or self._reloading.done()):
+            self._reloading = asyncio.get_running_loop().create_task(self._background_reload())
+
+    async def _background_reload(self) -> None:
+        try:
+            async with self._load_lock:  # type: ignore[union-attr]
+                await self.load()
+        except Exception:
+            logger.exception("trade graph reload failed")
+
+    def _node(self, org_id: int) -> int:
+        idx = self.index.get(org_id)
+        if idx is None:
+            idx = len(self.index)
+            self.index[org_id] = idx
+            self.org_ids = np.append(self.org_ids, org_id)
+        return idx
+
+    def add_edge(self, from_id: int, to_id: int, weight: float) -> None:
+        """Record a new trading pair between rebuilds (existing pairs are left as is)."""
+        u, v = self._node(from_id), self._node(to_id)
+        if self.out.has(u, v) or v in self.out_delta.get(u, ()):
+            return
+        self.out_delta.setdefault(u, {})[v] = weight
+        self.in_delta.setdefault(v, {})[u] = weight
+        self.delta_edges += 1
+
+    def on_commit(self, receipts: list[AuditReceipt]) -> None:
+        """Audit appender listener: add pairs from newly committed invoices."""
+        if self.loaded_at is None and self._since_snapshot is None:
+            return  # the first load reads them from trust_edges
+        for r in receipts:
+            e = r.entity
+            if r.write.entity_type == "invoice" and r.write.op_type == "create" and e is not None:
+                # A single invoice's direct factor is its status weight
+                weight = (0.4 * status_weight(e.status) + 0.2) / _LOCAL_SCORE_MAX
+                if self._since_snapshot is not None:
+                    # A load is reading trust_edges; it may or may not see this pair
+                    self._since_snapshot.append((e.from_org_id, e.to_org_id, weight))
+                if self.loaded_at is not None:
+                    self.add_edge(e.from_org_id, e.to_org_id, weight)
+
+    # -- search -------------------------------------------------------------
+
+    def _with_delta(self, csr: CSR, delta: dict[int, dict[int, float]], u: int) -> tuple[np.ndarray, np.ndarray]:
+        idx, w = csr.row(u)
+        extra = delta.get(u)
+        if extra:
+            idx = np.concatenate([idx, np.fromiter(extra.keys(), dtype=np.int32, count=len(extra))])
+            w = np.concatenate([w, np.fromiter(extra.values(), dtype=np.float32, count=len(extra))])
+        return idx, w
+
+    def _gather(
+        self, csr: CSR, delta: dict[int, dict[int, float]], nodes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        owner, nbr, w = csr.gather(nodes)
+        if delta:
+            extra = [(pos, v, wt) for pos, u in enumerate(nodes.tolist()) for v, wt in delta.get(u, {}).items()]
+            if extra:
+                e_owner, e_nbr, e_w = zip(*extra)
+                owner = np.concatenate([owner, np.array(e_owner, dtype=np.int64)])
+                nbr = np.concatenate([nbr, np.array(e_nbr, dtype=np.int32)])
+                w = np.concatenate([w, np.array(e_w, dtype=np.float32)])
+        return owner, nbr, w
+
+    def _beam(self, idx: np.ndarray, w: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if len(idx) <= self.beam:
+            return idx, w
+        keep = np.argpartition(-w, self.beam)[:self.beam]
+        return idx[keep], w[keep]
+
+    def top_paths(self, from_id: int, to_id: int, max_hops: int = 3, k: int = 10) -> list[Path]:
+        """Best `k` simple paths of 1..max_hops edges, by product of edge weights."""
+        a, b = self.index.get(from_id), self.index.get(to_id)
+        if a is None or b is None or a == b:
+            return []
+        n = len(self.index)
+        f_idx, f_w = self._with_delta(self.out, self.out_delta, a)
+        b_idx, b_w = self._with_delta(self.inc, self.in_delta, b)
+        fw = np.zeros(n, dtype=np.float32)
+        fw[f_idx] = f_w
+        bw = np.zeros(n, dtype=np.float32)
+        bw[b_idx] = b_w
+
+        cand_paths: list[np.ndarray] = []  # rows of node indexes, padded with -1
+        cand_scores: list[np.ndarray] = []
+
+        if fw[b] > 0:
+            cand_paths.append(np.array([[a, b, -1, -1]]))
+            cand_scores.append(np.array([fw[b]]))
+
+        if max_hops >= 2:
+            mids = f_idx[(bw[f_idx] > 0) & (f_idx != a) & (f_idx != b)]
+            if len(mids):
+                rows = np.full((len(mids), 4), -1)
+                rows[:, 0], rows[:, 1], rows[:, 2] = a, mids, b
+                cand_paths.append(rows)
+                cand_scores.append(fw[mids] * bw[mids])
+
+        if max_hops >= 3:
+            f_mask = (f_idx != a) & (f_idx != b)
+            b_mask = (b_idx != a) & (b_idx != b)
+            front, front_w = self._beam(f_idx[f_mask], f_w[f_mask])
+            back, back_w = self._beam(b_idx[b_mask], b_w[b_mask])
+            if len(front) and len(back):
+                if len(front) <= len(back):
+                    owner, m2, w = self._gather(self.out, self.out_delta, front)
+                    m1 = front[owner]
+                    scores = front_w[owner] * w * bw[m2]
+                else:
+                    owner, m1, w = self._gather(self.inc, self.in_delta, back)
+                    m2 = back[owner]
+                    scores = fw[m1] * w * back_w[owner]
+                ok = (scores > 0) & (m1 != m2) & (m2 != a) & (m1 != b)
+                if ok.any():
+                    m1, m2, scores = m1[ok], m2[ok], scores[ok]
+                    rows = np.empty((len(m1), 4), dtype=np.int64)
+                    rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3] = a, m1, m2, b
+                    cand_paths.append(rows)
+                    cand_scores.append(scores)
+
+        if not cand_scores:
+            return []
+        paths = np.concatenate(cand_paths)
+        scores = np.concatenate(cand_scores).astype(np.float64)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            paths, scores = paths[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        org_ids = self.org_ids
+        return [
+            Path(tuple(int(org_ids[i]) for i in paths[j] if i >= 0), float(scores[j]))
+            for j in order
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "orgs": len(self.index),
+            "edges": int(len(self.out.indices)) + self.delta_edges,
+            "delta_edges": self.delta_edges,
+            "loaded_age_s": None if self.loaded_at is None else round(time.monotonic() - self.loaded_at, 1),
+        }
+
+
+trade_graph = TradeGraph(
+    refresh_seconds=float(os.getenv("TRADE_GRAPH_REFRESH_SECONDS", "3600")),
+    max_delta=int(os.getenv("TRADE_GRAPH_MAX_DELTA", "50000")),
+    beam=int(os.getenv("TRADE_GRAPH_BEAM", "4096")),
+)
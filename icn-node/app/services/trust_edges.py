@@ -0,0 +1,214 @@
+"""
+Incrementally maintained pairwise trust aggregates (`trust_edges`).
+
+Why this exists
+- `/trust/score` used to load every invoice between two orgs plus every
+  attestation on them and decay each row in Python. Busy trading pairs meant
+  thousands of rows per request.
+- An audit appender hook now folds each invoice, attestation and status change
+  into one `TrustEdge` row per (from_org, to_org), inside the write's own
+  transaction; a score is a single primary-key read.
+
+Decay representation
+- Exponential decay with half-life h days: a weight w recorded at time t is worth
+  w * 2^(-(now - t) / h) at `now`. Writing that as
+  w * 2^((t - EPOCH) / h) * 2^(-(now - EPOCH) / h) turns the stored sum into a
+  plain running total of `w * growth(t)`, which the hook can increment with an
+  upsert. Reading multiplies by `decay_to(now)` once.
+- Decay uses fractional days (the per-row code truncated to whole days).
+- Doubles cover ~1000 half-lives (~500 years at h=180) from EPOCH.
+
+Consistency
+- `rebuild(session)` recomputes every edge from invoices and attestations (the
+  full computation) under a table lock that holds off concurrent appends, and `python -m app.rebuild_trust --check` diffs it against
+  the stored aggregates.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import lock_for_rebuild, upsert_increment
+from ..models import Attestation, Invoice, TrustEdge
+from .audit import AuditReceipt
+
+
+HALF_LIFE_DAYS = 180.0
+DECAY_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+STATUS_WEIGHTS = {"settled": 1.0, "accepted": 0.7, "proposed": 0.4, "disputed": 0.1}
+DEFAULT_STATUS_WEIGHT = 0.3
+
+KEY_COLUMNS = ("from_org_id", "to_org_id")
+SUM_COLUMNS = ("invoice_count", "total_sum", "direct_weighted", "attestation_count", "attest_weighted")
+
+
+def _days_since_epoch(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - DECAY_EPOCH).total_seconds() / 86400.0
+
+
+def growth(ts: datetime) -> float:
+    """2^((ts - EPOCH) / half_life): the stored form of a weight recorded at `ts`."""
+    return math.pow(2.0, _days_since_epoch(ts) / HALF_LIFE_DAYS)
+
+
+def decay_to(now: Optional[datetime] = None) -> float:
+    """Factor that brings stored sums forward to `now`."""
+    return math.pow(2.0, -_days_since_epoch(now or datetime.now(timezone.utc)) / HALF_LIFE_DAYS)
+
+
+def status_weight(status: Optional[str]) -> float:
+    return STATUS_WEIGHTS.get(status or "", DEFAULT_STATUS_WEIGHT)
+
+
+def claim_confidence(claims: Any) -> float:
+    """Average `confidence` over dict claims (1.0 when unspecified); 0 if none."""
+    confidences = [float(c.get("confidence", 1.0)) for c in (claims or []) if isinstance(c, dict)]
+    return sum(confidences) / max(1, len(confidences))
+
+
+@dataclass
+class EdgeFactors:
+    direct: float
+    attestations: float
+    invoice_count: int
+    attestation_count: int
+
+
+def edge_factors(edge: Any, decay: float) -> EdgeFactors:
+    """Direct and attestation factors of one edge row (or None) at a `decay_to` factor."""
+    if edge is None:
+        return EdgeFactors(0.0, 0.0, 0, 0)
+    direct = 0.0
+    if edge.invoice_count:
+        direct = min(1.0, max(0.0, edge.direct_weighted * decay / (edge.total_sum or 1.0)))
+    attest = 0.0
+    if edge.attestation_count:
+        attest = min(1.0, edge.attest_weighted * decay / edge.attestation_count)
+    return EdgeFactors(direct, attest, edge.invoice_count, edge.attestation_count)
+
+
+def _empty() -> dict[str, float]:
+    return dict.fromkeys(SUM_COLUMNS, 0)
+
+
+def _add_invoice(d: dict[str, float], total: float, status: Optional[str], created_at: datetime) -> None:
+    d["invoice_count"] += 1
+    d["total_sum"] += total
+    d["direct_weighted"] += total * status_weight(status) * growth(created_at)
+
+
+def _add_attestation(d: dict[str, float], claims: Any, weight: float, created_at: datetime) -> None:
+    d["attestation_count"] += 1
+    d["attest_weighted"] += claim_confidence(claims) * weight * growth(created_at)
+
+
+def _invoice_ids(attestations: Iterable[Any]) -> set[int]:
+    return {int(a.subject_id) for a in attestations if a.subject_type == "invoice" and a.subject_id.isdigit()}
+
+
+async def trust_edges_hook(session: AsyncSession, receipts: list[AuditReceipt]) -> None:
+    """Audit appender hook: fold a committed batch into `trust_edges`.
+
+    - invoice create: count, total and status-weighted decayed total
+    - invoice status change (`context["previous_status"]`, `context["invoice"]`):
+      re-weight that invoice
+    - attestation create on an invoice: count and decayed confidence * weight
+    """
+    deltas: dict[tuple[int, int], dict[str, float]] = defaultdict(_empty)
+    attestations = []
+    for r in receipts:
+        e, w = r.entity, r.write
+        if w.entity_type == "invoice" and e is not None:
+            if w.op_type == "create":
+                _add_invoice(deltas[(e.from_org_id, e.to_org_id)], e.total, e.status, e.created_at)
+            elif "previous_status" in w.context:
+                inv = w.context["invoice"]
+                delta = status_weight(inv.status) - status_weight(w.context["previous_status"])
+                deltas[(inv.from_org_id, inv.to_org_id)]["direct_weighted"] += inv.total * delta * growth(inv.created_at)
+        elif w.entity_type == "attestation" and w.op_type == "create" and e is not None:
+            attestations.append(e)
+
+    ids = _invoice_ids(attestations)
+    if ids:
+        pairs = {
+            row.id: (row.from_org_id, row.to_org_id)
+            for row in await session.execute(
+                select(Invoice.id, Invoice.from_org_id, Invoice.to_org_id).where(Invoice.id.in_(ids))
+            )
+        }
+        for a in attestations:
+            pair = pairs.get(int(a.subject_id)) if a.subject_id.isdigit() else None
+            if a.subject_type == "invoice" and pair is not None:
+                _add_attestation(deltas[pair], a.claims, a.weight, a.created_at)
+
+    await upsert_increment(
+        session,
+        TrustEdge,
+        [{"from_org_id": k[0], "to_org_id": k[1], **v} for k, v in deltas.items()],
+        KEY_COLUMNS,
+        SUM_COLUMNS,
+    )
+
+
+async def compute_edges(session: AsyncSession, chunk: int = 10000) -> dict[tuple[int, int], dict[str, float]]:
+    """Full computation of every edge from `invoices` and `attestations` (streamed)."""
+    edges: dict[tuple[int, int], dict[str, float]] = defaultdict(_empty)
+    pairs: dict[int, tuple[int, int]] = {}
+    invoices = await session.stream(
+        select(Invoice.id, Invoice.from_org_id, Invoice.to_org_id, Invoice.total, Invoice.status, Invoice.created_at)
+        .execution_options(yield_per=chunk)
+    )
+    async for part in invoices.partitions():
+        for i in part:
+            pairs[i.id] = (i.from_org_id, i.to_org_id)
+            _add_invoice(edges[pairs[i.id]], i.total, i.status, i.created_at)
+    attestations = await session.stream(
+        select(Attestation.subject_type, Attestation.subject_id, Attestation.claims, Attestation.weight, Attestation.created_at)
+        .where(Attestation.subject_type == "invoice")
+        .execution_options(yield_per=chunk)
+    )
+    async for part in attestations.partitions():
+        for a in part:
+            pair = pairs.get(int(a.subject_id)) if a.subject_id.isdigit() else None
+            if pair is not None:
+                _add_attestation(edges[pair], a.claims, a.weight, a.created_at)
+    return edges
+
+
+async def check(session: AsyncSession, rel_tol: float = 1e-9) -> list[dict[str, Any]]:
+    """Differences between stored `trust_edges` and the full computation."""
+    expected = await compute_edges(session)
+    stored = {(e.from_org_id, e.to_org_id): e for e in (await session.execute(select(TrustEdge))).scalars()}
+    problems = []
+    for key in sorted(set(expected) | set(stored)):
+        want, have = expected.get(key), stored.get(key)
+        for col in SUM_COLUMNS:
+            a = want[col] if want else 0
+            b = getattr(have, col) if have is not None else 0
+            if not math.isclose(a, b, rel_tol=rel_tol, abs_tol=1e-9):
+                problems.append({"from_org_id": key[0], "to_org_id": key[1], "column": col, "expected": a, "stored": b})
+    return problems
+
+
+async def rebuild(session: AsyncSession) -> int:
+    """Replace `trust_edges` with the full computation (caller commits); returns edge count.
+
+    Locks `trust_edges` first (`db.lock_for_rebuild`), so an append that lands
+    during the rebuild either commits before the recomputation reads or waits
+    and increments the rebuilt rows.
+    """
+    await lock_for_rebuild(session, TrustEdge)
+    edges = await compute_edges(session)
+    await session.execute(delete(TrustEdge))
+    rows = [{"from_org_id": k[0], "to_org_id": k[1], **v} for k, v in edges.items()]
+    for i in range(0, len(rows), 10000):
+        await session.execute(insert(TrustEdge), rows[i:i + 10000])
+    return len(rows)
@@ -0,0 +1,49 @@
+"""
+Train a zstd dictionary from the newest stored audit payloads.
+
+    python -m app.train_payload_dict payloads-1.dict
+    python -m app.train_payload_dict payloads-2.dict --samples 50000 --size 65536
+
+Put the new file first in PAYLOAD_ZSTD_DICTS (keep older dictionaries listed
+after it so payloads compressed with them stay readable).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+import zstandard
+from sqlalchemy import select
+
+from .db import AsyncSessionFactory
+from .models import AuditPayload
+from .services.payload_store import payload_store
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with AsyncSessionFactory() as session:
+        hashes = list(
+            (
+                await session.execute(
+                    select(AuditPayload.payload_hash).order_by(AuditPayload.created_at.desc()).limit(args.samples)
+                )
+            ).scalars()
+        )
+        samples = list((await payload_store.get_many(session, hashes)).values())
+    if len(samples) < 100:
+        print(f"only {len(samples)} stored payloads; need at least 100 to train a dictionary")
+        return 1
+    dictionary = zstandard.train_dictionary(args.size, samples, level=payload_store.codec.level)
+    with open(args.output, "wb") as f:
+        f.write(dictionary.as_bytes())
+    print(f"wrote {args.output}: dict_id {dictionary.dict_id()}, {len(dictionary.as_bytes())} bytes from {len(samples)} payloads")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="dictionary file to write")
+    parser.add_argument("--samples", type=int, default=20000, help="newest payloads to train on")
+    parser.add_argument("--size", type=int, default=16384, help="dictionary size in bytes")
+    sys.exit(asyncio.run(main(parser.parse_args())))
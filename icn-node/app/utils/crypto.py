@@ -24,20 +24,27 @@ def sha256_hex(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
-def compute_hash(data: Any, prev_hash: str | None) -> Tuple[str, str]:
+def chain_hash(prev_hash: str | None, payload_hash: str) -> str:
+    """row_hash = sha256(prev_hash || payload_hash) where prev_hash may be empty string."""
+    prev = (prev_hash or "").encode("utf-8")
+    return sha256_hex(prev + payload_hash.encode("utf-8"))
+
+
+def compute_hash(data: Any, prev_hash: str | None, payload_hash: str | None = None) -> Tuple[str, str]:
     """
     Compute payload hash and row hash.
     - payload_hash = sha256(canonicalize_json(data))
     - row_hash = sha256(prev_hash || payload_hash) where prev_hash may be empty string
     Returns (payload_hash, row_hash)
 
+    Pass `payload_hash` when the canonical digest of `data` is already known
+    (e.g. the signed request body) to skip re-serializing it.
+
     This creates a simple append-only chain across writes (see PRD §6/§11).
     """
-    payload_bytes = canonicalize_json(data)
-    payload_hash = sha256_hex(payload_bytes)
-    prev = (prev_hash or "").encode("utf-8")
-    row_hash = sha256_hex(prev + payload_hash.encode("utf-8"))
-    return payload_hash, row_hash
+    if payload_hash is None:
+        payload_hash = sha256_hex(canonicalize_json(data))
+    return payload_hash, chain_hash(prev_hash, payload_hash)
 
 
 def generate_keypair() -> Tuple[str, str]:
@@ -57,33 +64,38 @@ def sign_data(data: Any, private_key_b64: str) -> str:
     return base64.b64encode(signed.signature).decode("ascii")
 
 
-def verify_signature(data: Any, signature_b64: str, public_key_b64: str) -> bool:
-    """Verify Ed25519 signature (base64) over canonicalized data using public key (base64)."""
-    vk = signing.VerifyKey(base64.b64decode(public_key_b64))
+def load_verify_key(public_key_b64: str) -> signing.VerifyKey:
+    """Decode a base64 Ed25519 public key once so callers can cache the VerifyKey."""
+    return signing.VerifyKey(base64.b64decode(public_key_b64))
+
+
+def verify_signature_bytes(message: bytes, signature_b64: str, public_key: str | signing.VerifyKey) -> bool:
+    """Verify Ed25519 signature (base64) over already-canonical bytes.
+
+    `public_key` is either a base64 public key or a prebuilt `VerifyKey`.
+    Malformed signatures (bad base64, wrong length) verify as False.
+    """
+    vk = public_key if isinstance(public_key, signing.VerifyKey) else load_verify_key(public_key)
     try:
-        vk.verify(canonicalize_json(data), base64.b64decode(signature_b64))
+        vk.verify(message, base64.b64decode(signature_b64))
         return True
-    except BadSignatureError:
+    except (BadSignatureError, ValueError):
         return False
 
 
+def verify_signature(data: Any, signature_b64: str, public_key: str | signing.VerifyKey) -> bool:
+    """Verify Ed25519 signature (base64) over canonicalized data."""
+    return verify_signature_bytes(canonicalize_json(data), signature_b64, public_key)
+
+
 def merkle_root(leaves: list[str]) -> str:
     """Compute a simple binary Merkle root from hex-encoded leaf hashes.
     If odd number of nodes at a level, promote the last one.
     Returns hex string; empty string for no leaves.
-    """
-    if not leaves:
-        return ""
-    level = leaves[:]
-    while len(level) > 1:
-        next_level: list[str] = []
-        for i in range(0, len(level), 2):
-            if i + 1 < len(level):
-                combined = (level[i] + level[i + 1]).encode("utf-8")
-                next_level.append(sha256_hex(combined))
-            else:
-                next_level.append(level[i])
-        level = next_level
-    return level[0]
 
+    This is the v1 (legacy) encoding of `utils.merkle.MerkleTree`; use the tree
+    directly for v2 roots or inclusion proofs.
+    """
+    from .merkle import MERKLE_V1, MerkleTree
 
+    return MerkleTree.from_hex(leaves, MERKLE_V1).root_hex
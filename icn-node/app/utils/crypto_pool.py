@@ -0,0 +1,161 @@
+"""
+Ed25519 work off the event loop.
+
+Why this exists
+- `verify_signature` is CPU work; run inline in the middleware it stalls every
+  other coroutine while libsodium runs. PyNaCl calls libsodium through cffi, which
+  releases the GIL, so verifications on a thread pool run in parallel with the
+  event loop and with each other.
+
+API
+- `await crypto_pool.verify(message, signature_b64, key)` for one canonical message
+- `await crypto_pool.sign(data, private_key_b64)` returns a base64 signature
+- `await crypto_pool.verify_batch([(payload, signature_b64, key), ...])` splits many
+  triples into chunks across the workers (bulk endpoints, offline chain audits);
+  payloads may be canonical bytes or JSON-able objects
+
+Metrics (`stats()`)
+- queue depth / in flight, verification counts, and p50/p95 verification latency
+  as seen by callers (queue wait included), against the PRD §13
+  `signature_verification_time_p95` target of 50ms.
+- The same latencies feed `icn_signature_verification_seconds{kind}` and
+  `icn_signature_verifications_total{result}` at `/metrics`.
+
+Set `CRYPTO_WORKERS=0` to run everything inline (useful for debugging).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence, Tuple, TypeVar
+
+from nacl import signing
+
+from .crypto import canonicalize_json, sign_data, verify_signature_bytes
+from .metrics import metrics
+
+
+T = TypeVar("T")
+VerifyItem = Tuple[Any, str, "str | signing.VerifyKey"]
+
+SIGNATURE_VERIFICATION_P95_TARGET_MS = 50.0
+
+verification_duration = metrics.histogram(
+    "icn_signature_verification_seconds",
+    "Signature verification latency per call, queue wait included",
+    ("kind",),
+)
+verifications = metrics.counter(
+    "icn_signature_verifications_total",
+    "Signatures verified, by result",
+    ("result",),
+)
+
+
+class CryptoPool:
+    def __init__(self, workers: int, latency_window: int = 4096, batch_chunk: int = 256):
+        self.workers = workers
+        self.batch_chunk = batch_chunk
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self.verified = 0
+        self.failed = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="icn-crypto")
+        return self._executor
+
+    def _tracked(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def _submit(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.workers <= 0:
+            return fn(*args)
+        with self._lock:
+            self._queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), self._tracked, fn, *args)
+
+    def _record(self, started: float, results: Sequence[bool], kind: str) -> None:
+        elapsed = time.perf_counter() - started
+        self._latencies.append(elapsed * 1000.0)
+        verification_duration.observe(elapsed, kind)
+        ok = sum(1 for r in results if r)
+        self.verified += ok
+        self.failed += len(results) - ok
+        verifications.inc("ok", amount=ok)
+        if len(results) > ok:
+            verifications.inc("failed", amount=len(results) - ok)
+
+    async def verify(self, message: bytes, signature_b64: str, public_key: "str | signing.VerifyKey") -> bool:
+        """Verify a signature over already-canonical bytes on the pool."""
+        started = time.perf_counter()
+        ok = await self._submit(verify_signature_bytes, message, signature_b64, public_key)
+        self._record(started, [ok], "single")
+        return ok
+
+    async def sign(self, data: Any, private_key_b64: str) -> str:
+        return await self._submit(sign_data, data, private_key_b64)
+
+    async def verify_batch(self, items: Sequence[VerifyItem]) -> list[bool]:
+        """Verify many (payload, signature_b64, key) triples; results keep input order."""
+        if not items:
+            return []
+        started = time.perf_counter()
+        chunks = [items[i:i + self.batch_chunk] for i in range(0, len(items), self.batch_chunk)]
+        parts = await asyncio.gather(*[self._submit(_verify_chunk, chunk) for chunk in chunks])
+        results = [ok for part in parts for ok in part]
+        self._record(started, results, "batch")
+        return results
+
+    def stats(self) -> dict:
+        window = sorted(self._latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not window:
+                return None
+            return round(window[min(len(window) - 1, int(p * len(window)))], 3)
+
+        with self._lock:
+            queued, running = self._queued, self._running
+        return {
+            "workers": self.workers,
+            "queue_depth": queued,
+            "in_flight": running,
+            "verified": self.verified,
+            "failed": self.failed,
+            "verify_p50_ms": pct(0.50),
+            "signature_verification_time_p95_ms": pct(0.95),
+            "p95_target_ms": SIGNATURE_VERIFICATION_P95_TARGET_MS,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def _verify_chunk(chunk: Sequence[VerifyItem]) -> list[bool]:
+    out = []
+    for payload, signature_b64, key in chunk:
+        message = payload if isinstance(payload, (bytes, bytearray)) else canonicalize_json(payload)
+        out.append(verify_signature_bytes(message, signature_b64, key))
+    return out
+
+
+crypto_pool = CryptoPool(workers=int(os.getenv("CRYPTO_WORKERS", str(min(8, os.cpu_count() or 1)))))
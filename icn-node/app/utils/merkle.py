@@ -0,0 +1,182 @@
+"""
+Binary Merkle tree over raw 32-byte SHA-256 digests, with inclusion proofs.
+
+Layout
+- Each level is one contiguous `bytes` buffer of `n * 32` digests; level 0 holds
+  the leaves, the last level holds the root. Sibling pairs are adjacent 64-byte
+  slices, so a level is built with a single pass of `hashlib` calls.
+- An odd node at the end of a level is promoted unchanged (same shape as the
+  original `utils.crypto.merkle_root`).
+
+Versions (stored per checkpoint as `merkle_version`)
+- v1 (legacy): leaf = sha256(leaf_bytes); node = sha256(utf8(hex(left) + hex(right))).
+  Bit-for-bit what `merkle_root` produced, so existing checkpoints still verify.
+- v2: leaf = sha256(0x00 || leaf_bytes); node = sha256(0x01 || left || right).
+  Domain-separated (a leaf can't be passed off as an inner node) and hashes 65
+  raw bytes per node instead of 128 hex characters.
+
+Proofs
+- `tree.proof(i)` lists `(position, sibling_digest)` from the leaf upwards, where
+  position says which side the sibling is on; promoted levels contribute nothing.
+- `verify_proof(leaf, proof, root, version)` needs only the leaf, the proof and
+  the root, i.e. O(log n) data instead of the whole day.
+
+Frontier
+- `MerkleFrontier` is the append-only form of the same tree: one peak per set bit
+  of the leaf count (largest subtree first). Appending is a binary-counter carry,
+  O(log n); folding the peaks right-to-left gives exactly `MerkleTree(...).root`,
+  because promoting the odd node is what leaves the smaller subtrees on the right.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable, Literal, Sequence, Tuple
+
+MERKLE_V1 = 1
+MERKLE_V2 = 2
+DIGEST_SIZE = 32
+
+Side = Literal["left", "right"]
+ProofStep = Tuple[Side, bytes]
+
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(data: bytes, version: int = MERKLE_V2) -> bytes:
+    """Digest of one leaf's serialized bytes under `version`."""
+    if version == MERKLE_V1:
+        return hashlib.sha256(data).digest()
+    if version == MERKLE_V2:
+        return hashlib.sha256(_LEAF_PREFIX + data).digest()
+    raise ValueError(f"Unknown merkle version: {version}")
+
+
+def node_hash(left: bytes, right: bytes, version: int = MERKLE_V2) -> bytes:
+    if version == MERKLE_V1:
+        return hashlib.sha256((left.hex() + right.hex()).encode("utf-8")).digest()
+    if version == MERKLE_V2:
+        return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+    raise ValueError(f"Unknown merkle version: {version}")
+
+
+def _next_level(level: bytes, version: int) -> bytes:
+    sha256 = hashlib.sha256
+    pairs_end = (len(level) // (2 * DIGEST_SIZE)) * 2 * DIGEST_SIZE
+    if version == MERKLE_V1:
+        # hex(left) + hex(right) == hex(left || right)
+        out = b"".join(sha256(level[i:i + 64].hex().encode("ascii")).digest() for i in range(0, pairs_end, 64))
+    elif version == MERKLE_V2:
+        out = b"".join(sha256(_NODE_PREFIX + level[i:i + 64]).digest() for i in range(0, pairs_end, 64))
+    else:
+        raise ValueError(f"Unknown merkle version: {version}")
+    if pairs_end < len(level):
+        out += level[pairs_end:]  # promote the odd node
+    return out
+
+
+class MerkleTree:
+    def __init__(self, leaves: bytes, version: int = MERKLE_V2):
+        """Build from a buffer of concatenated 32-byte leaf digests."""
+        if len(leaves) % DIGEST_SIZE:
+            raise ValueError("Leaf buffer length must be a multiple of 32")
+        self.version = version
+        self.levels: list[bytes] = [bytes(leaves)]
+        while len(self.levels[-1]) > DIGEST_SIZE:
+            self.levels.append(_next_level(self.levels[-1], version))
+
+    @classmethod
+    def from_digests(cls, digests: Iterable[bytes], version: int = MERKLE_V2) -> "MerkleTree":
+        return cls(b"".join(digests), version)
+
+    @classmethod
+    def from_hex(cls, leaves: Sequence[str], version: int = MERKLE_V2) -> "MerkleTree":
+        return cls(bytes.fromhex("".join(leaves)), version)
+
+    @classmethod
+    def from_data(cls, items: Iterable[bytes], version: int = MERKLE_V2) -> "MerkleTree":
+        """Hash each serialized leaf with `leaf_hash` and build the tree."""
+        return cls(b"".join(leaf_hash(d, version) for d in items), version)
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) // DIGEST_SIZE
+
+    def leaf(self, index: int) -> bytes:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.levels[0][index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE]
+
+    @property
+    def root(self) -> bytes:
+        """Root digest; empty bytes for an empty tree."""
+        return self.levels[-1]
+
+    @property
+    def root_hex(self) -> str:
+        return self.root.hex()
+
+    def proof(self, index: int) -> list[ProofStep]:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        steps: list[ProofStep] = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling * DIGEST_SIZE < len(level):
+                side: Side = "left" if sibling < index else "right"
+                steps.append((side, level[sibling * DIGEST_SIZE:(sibling + 1) * DIGEST_SIZE]))
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf: bytes, proof: Sequence[ProofStep], root: bytes, version: int = MERKLE_V2) -> bool:
+    """Check that `leaf` (a leaf digest) is included under `root`."""
+    h = leaf
+    for side, sibling in proof:
+        h = node_hash(sibling, h, version) if side == "left" else node_hash(h, sibling, version)
+    return h == root
+
+
+class MerkleFrontier:
+    def __init__(self, count: int = 0, peaks: bytes = b"", version: int = MERKLE_V2):
+        if len(peaks) != bin(count).count("1") * DIGEST_SIZE:
+            raise ValueError("Peak buffer does not match leaf count")
+        self.count = count
+        self.version = version
+        self.peaks = [peaks[i:i + DIGEST_SIZE] for i in range(0, len(peaks), DIGEST_SIZE)]
+
+    def append(self, leaf: bytes) -> None:
+        carry, n = leaf, self.count
+        while n & 1:
+            carry = node_hash(self.peaks.pop(), carry, self.version)
+            n >>= 1
+        self.peaks.append(carry)
+        self.count += 1
+
+    def extend(self, leaves: Iterable[bytes]) -> None:
+        for leaf in leaves:
+            self.append(leaf)
+
+    @property
+    def root(self) -> bytes:
+        """Same value as `MerkleTree` over the appended leaves; empty if none."""
+        if not self.peaks:
+            return b""
+        acc = self.peaks[-1]
+        for peak in reversed(self.peaks[:-1]):
+            acc = node_hash(peak, acc, self.version)
+        return acc
+
+    @property
+    def root_hex(self) -> str:
+        return self.root.hex()
+
+    def peaks_bytes(self) -> bytes:
+        return b"".join(self.peaks)
+
+
+def proof_to_json(proof: Sequence[ProofStep]) -> list[dict]:
+    return [{"position": side, "hash": sibling.hex()} for side, sibling in proof]
+
+
+def proof_from_json(steps: Sequence[dict]) -> list[ProofStep]:
+    return [(s["position"], bytes.fromhex(s["hash"])) for s in steps]
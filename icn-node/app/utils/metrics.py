@@ -0,0 +1,201 @@
+"""
+In-process metrics served at `GET /metrics` (Prometheus text exposition 0.0.4).
+
+Why this exists
+- PRD §13 sets operational targets (`api_response_time_p95`,
+  `signature_verification_time_p95`, `checkpoint_generation_success_rate`)
+  that nothing measured. Per-subsystem `/debug/*` stats are point-in-time
+  windows; a scraper needs monotonic counters and histograms.
+
+Design
+- `Counter` and fixed-bucket `Histogram`, each holding one series per label
+  tuple. Recording is a dict lookup, a `bisect` and two in-place adds: no locks,
+  no allocation after a series exists.
+- Every recorder runs on the event-loop thread (SQLAlchemy's async engine
+  fires its cursor events there too), so there is nothing to contend on.
+  Code that records from worker threads must hand the value back to the loop.
+- Buckets are stored per bucket and only made cumulative in `render()`. p95
+  comes from the buckets, e.g.
+  `histogram_quantile(0.95, rate(icn_http_request_duration_seconds_bucket[5m]))`.
+
+Sources
+- `MetricsMiddleware`: every HTTP request, by method, route template and status
+- `instrument_engine`: every SQL statement, by operation (SELECT/INSERT/...)
+- crypto pool, audit appender and checkpoint generation record their own
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import event
+
+
+# Latency buckets in seconds (0.5ms .. 10s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        if not self.labelnames and not self._values:
+            yield f"{self.name} 0"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class _Series:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, _Series] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        s = self._series.get(labels)
+        if s is None:
+            # Last slot counts values above the largest bucket (+Inf only)
+            s = self._series[labels] = _Series(len(self.buckets) + 1)
+        s.counts[bisect_left(self.buckets, value)] += 1
+        s.sum += value
+
+    def count(self, *labels: Any) -> int:
+        s = self._series.get(labels)
+        return sum(s.counts) if s else 0
+
+    def quantile(self, q: float, *labels: Any) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or above the last bucket)."""
+        s = self._series.get(labels)
+        total = sum(s.counts) if s else 0
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for le, n in zip(self.buckets, s.counts):
+            seen += n
+            if seen >= rank:
+                return le
+        return None
+
+    def samples(self) -> Iterable[str]:
+        bounds = [_number(le) for le in self.buckets] + ["+Inf"]
+        bucket_names = self.labelnames + ("le",)
+        for labels, s in sorted(self._series.items()):
+            cumulative = 0
+            for le, n in zip(bounds, s.counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(bucket_names, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(s.sum)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Any] = {}
+
+    def _register(self, metric: Any) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # Re-imports (e.g. tests reloading a module) get the live instance back
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._metrics):
+            m = self._metrics[name]
+            lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            lines.extend(m.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "icn_http_request_duration_seconds",
+    "HTTP request latency, from first byte in to last byte out",
+    ("method", "route", "status"),
+)
+db_query_duration = metrics.histogram(
+    "icn_db_query_duration_seconds",
+    "SQL statement execution time as seen by the driver",
+    ("operation",),
+)
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def sql_operation(statement: str) -> str:
+    head = statement[:16].split(None, 1)
+    op = head[0].upper() if head else ""
+    return op if op in _SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: Any) -> None:
+    """Time every statement run on `engine` (an async engine or a sync Engine)."""
+    target = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        db_query_duration.observe(time.perf_counter() - started, sql_operation(statement))
+
+    @event.listens_for(target, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
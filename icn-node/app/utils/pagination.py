@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque keyset cursor for "rows after this id" in `ORDER BY id DESC` listings.
+
+    The format (urlsafe base64 of a tiny JSON object) is versioned so the sort key
+    can grow later without breaking cursors clients already hold.
+    """
+    raw = json.dumps({"v": 1, "id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the last-seen id encoded in `cursor`; 400 on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if data.get("v") != 1 or not isinstance(data.get("id"), int):
+            raise ValueError(cursor)
+        return data["id"]
+    except (binascii.Error, ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(ids: list[int], limit: int) -> str | None:
+    """Cursor for the following page, given ids fetched with `limit + 1`."""
+    if len(ids) <= limit:
+        return None
+    return encode_cursor(ids[limit - 1])
@@ -0,0 +1,92 @@
+"""
+Benchmark: `GET /export/audit` throughput and peak Python memory vs table size.
+
+Run from `icn-node/` against a scratch database (tables are created if missing):
+
+    DATABASE_URL=sqlite+aiosqlite:////tmp/icn_bench.db python -m bench.export_stream
+
+Seeds synthetic audit rows (not a valid chain; only the export path is measured)
+and drives the ASGI app directly with a counting `send` (httpx's ASGI transport
+buffers whole bodies, which would hide what the server itself holds). The
+tracemalloc peak should stay flat as the row count grows.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:////tmp/icn_bench.db")
+
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app.db import AsyncSessionFactory, Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import AuditLog  # noqa: E402
+
+
+SIZES = [int(n) for n in os.getenv("BENCH_ROWS", "10000,100000").split(",")]
+
+
+async def seed(rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionFactory() as s:
+        await s.execute(delete(AuditLog))
+        for start in range(0, rows, 10000):
+            await s.execute(insert(AuditLog), [
+                {
+                    "prev_hash": f"{i - 1:064x}" if i else None,
+                    "row_hash": f"{i:064x}",
+                    "op_type": "create",
+                    "entity_type": "invoice",
+                    "entity_id": str(i),
+                    "payload_hash": f"{i:064x}",
+                    "signature": None,
+                }
+                for i in range(start, min(start + 10000, rows))
+            ])
+        await s.commit()
+
+
+async def export(gzip: bool) -> tuple[int, int, float, float]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/export/audit", "raw_path": b"/export/audit", "root_path": "",
+        "query_string": f"gzip={str(gzip).lower()}".encode(), "headers": [],
+        "client": ("bench", 0), "server": ("bench", 80),
+    }
+    counts = {"lines": 0, "size": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            counts["size"] += len(body)
+            counts["lines"] += body.count(b"\n")
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return counts["lines"], counts["size"], elapsed, peak / 1e6
+
+
+async def main() -> None:
+    for rows in SIZES:
+        await seed(rows)
+        lines, size, elapsed, peak = await export(gzip=False)
+        assert lines == rows, (lines, rows)
+        print(f"rows={rows:<9} ndjson {rows / elapsed:9.0f} rows/s  {size / 1e6:7.1f} MB  peak {peak:6.1f} MB")
+        _, size, elapsed, peak = await export(gzip=True)
+        print(f"{'':<14} gzip   {rows / elapsed:9.0f} rows/s  {size / 1e6:7.1f} MB  peak {peak:6.1f} MB")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
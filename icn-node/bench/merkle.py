@@ -0,0 +1,71 @@
+"""
+Benchmark: Merkle roots and inclusion proofs at 1M leaves.
+
+Run from `icn-node/` (no database needed):
+
+    BENCH_LEAVES=1000000 python -m bench.merkle
+
+Compares the original list-of-hex-strings `merkle_root` implementation with
+`MerkleTree` (v1 legacy encoding and v2 binary encoding) on the same leaves,
+then times proof generation and verification on the v2 tree.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import time
+
+from app.utils.crypto import sha256_hex
+from app.utils.merkle import MERKLE_V1, MERKLE_V2, MerkleTree, verify_proof
+
+
+LEAVES = int(os.getenv("BENCH_LEAVES", "1000000"))
+PROOFS = int(os.getenv("BENCH_PROOFS", "10000"))
+
+
+def legacy_merkle_root(leaves: list[str]) -> str:
+    """The pre-MerkleTree implementation, kept here as the baseline."""
+    if not leaves:
+        return ""
+    level = leaves[:]
+    while len(level) > 1:
+        next_level: list[str] = []
+        for i in range(0, len(level), 2):
+            if i + 1 < len(level):
+                next_level.append(sha256_hex((level[i] + level[i + 1]).encode("utf-8")))
+            else:
+                next_level.append(level[i])
+        level = next_level
+    return level[0]
+
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    out = fn()
+    print(f"{label:<34} {(time.perf_counter() - started) * 1000:9.1f} ms")
+    return out
+
+
+def main() -> None:
+    digests = [hashlib.sha256(i.to_bytes(8, "big")).digest() for i in range(LEAVES)]
+    hex_leaves = [d.hex() for d in digests]
+    buffer = b"".join(digests)
+    print(f"leaves={LEAVES}")
+
+    legacy = timed("legacy merkle_root (hex lists)", lambda: legacy_merkle_root(hex_leaves))
+    v1 = timed("MerkleTree v1 (legacy encoding)", lambda: MerkleTree(buffer, MERKLE_V1))
+    assert v1.root_hex == legacy
+    v2 = timed("MerkleTree v2 (binary, prefixed)", lambda: MerkleTree(buffer, MERKLE_V2))
+    print(f"tree size {sum(len(level) for level in v2.levels) / 1e6:.1f} MB in {len(v2.levels)} level buffers"
+          f" (legacy peak holds {LEAVES} + {LEAVES // 2} str objects of ~113 bytes)")
+
+    indexes = [random.randrange(LEAVES) for _ in range(PROOFS)]
+    proofs = timed(f"{PROOFS} proofs", lambda: [v2.proof(i) for i in indexes])
+    ok = timed(f"{PROOFS} verifications", lambda: [verify_proof(v2.leaf(i), p, v2.root) for i, p in zip(indexes, proofs)])
+    assert all(ok)
+    print(f"proof length {len(proofs[0])} steps, {len(proofs[0]) * 33} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: multilateral netting at 100k orgs / 10M open invoices.
+
+Run from `icn-node/` (no database needed):
+
+    BENCH_ORGS=100000 BENCH_INVOICES=10000000 python -m bench.netting
+
+Generates skewed random invoices (integer cents), runs `netting.suggest`, checks
+conservation with `netting.check` plus an independent per-org recomputation, and
+times tracing transfers back to the invoices they combine. A small instance is
+also cross-checked against a plain-Python netting of the same invoices.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from app.services import netting
+
+
+ORGS = int(os.getenv("BENCH_ORGS", "100000"))
+INVOICES = int(os.getenv("BENCH_INVOICES", "10000000"))
+
+
+def synthetic_invoices(rng: np.random.Generator, orgs: int, invoices: int):
+    popularity = rng.pareto(1.5, orgs) + 1.0
+    p = popularity / popularity.sum()
+    debtors = rng.choice(orgs, invoices, p=p) + 1
+    creditors = rng.choice(orgs, invoices, p=p) + 1
+    creditors = np.where(creditors == debtors, creditors % orgs + 1, creditors)
+    cents = np.maximum(1, rng.lognormal(9.0, 1.5, invoices)).astype(np.int64)  # median ~$81
+    return np.arange(1, invoices + 1, dtype=np.int64), debtors, creditors, cents
+
+
+def python_net(debtors, creditors, cents) -> dict[int, int]:
+    net: dict[int, int] = defaultdict(int)
+    for d, c, a in zip(debtors.tolist(), creditors.tolist(), cents.tolist()):
+        net[d] -= a
+        net[c] += a
+    return {k: v for k, v in net.items() if v}
+
+
+def main() -> None:
+    rng = np.random.default_rng(11)
+    started = time.perf_counter()
+    ids, debtors, creditors, cents = synthetic_invoices(rng, ORGS, INVOICES)
+    print(f"generated {INVOICES} invoices over {ORGS} orgs in {time.perf_counter() - started:.1f} s")
+
+    result = netting.suggest(ids, debtors, creditors, cents)
+    print(
+        f"suggest: {result.elapsed * 1000:.0f} ms "
+        f"(net {result.timings['net_ms']:.0f} ms, transfers {result.timings['transfers_ms']:.0f} ms)"
+    )
+    print(
+        f"  {result.invoice_count} invoices -> {result.transfer_count} transfers "
+        f"({result.exact_matches} exact matches) across {result.orgs} orgs with a position; "
+        f"gross {result.gross_cents / 100:,.2f} -> net {result.net_cents / 100:,.2f}"
+    )
+
+    t = time.perf_counter()
+    problems = netting.check(result)
+    independent = np.zeros(len(result.net), dtype=np.int64)
+    np.add.at(independent, creditors, cents)
+    np.add.at(independent, debtors, -cents)
+    settled = np.zeros(len(result.net), dtype=np.int64)
+    np.add.at(settled, result.to_ids, result.cents)
+    np.add.at(settled, result.from_ids, -result.cents)
+    assert not problems, problems
+    assert np.array_equal(independent, result.net) and np.array_equal(settled, independent)
+    print(f"check: balances conserved ({(time.perf_counter() - t) * 1000:.0f} ms incl. independent recomputation)")
+
+    t = time.perf_counter()
+    combined = netting.trace(result, ids, debtors, creditors, limit=100)
+    direct = sum(1 for c in combined if c)
+    print(f"trace: {direct} transfers combine direct invoices ({(time.perf_counter() - t) * 1000:.0f} ms)")
+
+    ids, debtors, creditors, cents = synthetic_invoices(np.random.default_rng(3), 200, 5000)
+    small = netting.suggest(ids, debtors, creditors, cents)
+    expected = python_net(debtors, creditors, cents)
+    got = {i: int(v) for i, v in enumerate(small.net.tolist()) if v}
+    assert got == expected and not netting.check(small)
+    assert small.transfer_count <= len(expected) - 1
+    print(f"small instance matches plain-Python netting: {len(expected)} orgs -> {small.transfer_count} transfers")
+
+
+if __name__ == "__main__":
+    main()
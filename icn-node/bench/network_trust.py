@@ -0,0 +1,51 @@
+"""
+Benchmark: EigenTrust batch job (network testimony for every org).
+
+Run from `icn-node/` (no database needed):
+
+    BENCH_ORGS=50000 BENCH_EDGES=5000000 python -m bench.network_trust
+
+Solves on a synthetic skewed trade graph (same generator as `bench.trust_path`)
+from a cold start, then perturbs 1% of the edge weights, adds 0.1% new edges and
+re-solves, once cold and once warm-started from the first vector.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from app.services.network_trust import solve
+from bench.trust_path import synthetic_edges
+
+
+def report(label: str, result) -> None:
+    s = result.summary()
+    print(f"{label:<28} {s['iterations']:4d} iterations  {s['elapsed_ms']:8.1f} ms  (L1 delta {s['delta']:.1e})")
+
+
+def main() -> None:
+    rng = np.random.default_rng(7)
+    src, dst, w = synthetic_edges(rng)
+    print(f"{len(np.unique(np.concatenate([src, dst])))} orgs, {len(src)} edges")
+
+    first = solve(src, dst, w)
+    report("cold start", first)
+
+    changed = rng.random(len(w)) < 0.01
+    w2 = w.copy()
+    w2[changed] = rng.uniform(0.25, 1.0, int(changed.sum())).astype(np.float32)
+    extra = len(src) // 1000
+    orgs = int(max(src.max(), dst.max()))
+    src2 = np.concatenate([src, rng.integers(1, orgs + 1, extra)])
+    dst2 = np.concatenate([dst, rng.integers(1, orgs + 1, extra)])
+    w2 = np.concatenate([w2, rng.uniform(0.25, 1.0, extra).astype(np.float32)])
+
+    cold = solve(src2, dst2, w2)
+    report("after update, cold", cold)
+    previous = dict(zip(first.org_ids.tolist(), first.raw.tolist()))
+    warm = solve(src2, dst2, w2, previous=previous)
+    report("after update, warm", warm)
+    print(f"max |score difference| warm vs cold: {np.abs(warm.scores - cold.scores).max():.1e}")
+
+
+if __name__ == "__main__":
+    main()
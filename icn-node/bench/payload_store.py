@@ -0,0 +1,144 @@
+"""
+Benchmark: payload store size per million audit entries, and batched reads.
+
+Run from `icn-node/` (scratch SQLite files and segment directories are created
+and removed):
+
+    python -m bench.payload_store
+    BENCH_PAYLOADS=200000 python -m bench.payload_store
+
+Payloads mimic the app's mix (invoice creates, lifecycle transitions,
+attestations), built exactly as the routers build them and canonicalised.
+For each configuration:
+- average stored frame size, and bytes per million entries: frames alone, and
+  total on-disk growth (SQLite file + segment files, so row and index overhead
+  are included)
+- `get_many` of 1000 random hashes (µs per payload, decompress + re-hash)
+The dictionary is trained on a separate sample of 10k payloads.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import zstandard
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db import Base, create_engines
+from app.services.payload_store import PayloadCodec, PayloadStore, SegmentFiles
+from app.utils.crypto import canonicalize_json, sha256_hex
+
+
+N = int(os.getenv("BENCH_PAYLOADS", "100000"))
+SKUS = ["bread", "flour", "eggs", "milk", "cheese", "apples", "carrots", "coffee", "soap", "lumber"]
+UNITS = ["loaf", "kg", "dozen", "l", "crate", "bag", "each"]
+
+
+def _payload(rng: random.Random, i: int) -> dict:
+    a, b = f"urn:coop:org-{rng.randrange(2000)}", f"urn:coop:org-{rng.randrange(2000)}"
+    kind = rng.random()
+    if kind < 0.6:
+        lines = [
+            {"sku": rng.choice(SKUS), "qty": rng.randrange(1, 500), "unit": rng.choice(UNITS), "unit_price": round(rng.uniform(0.5, 40), 2)}
+            for _ in range(rng.randrange(1, 6))
+        ]
+        return {
+            "from_org": a,
+            "to_org": b,
+            "lines": lines,
+            "total": round(sum(l["qty"] * l["unit_price"] for l in lines), 2),
+            "terms": {"due_net_days": rng.choice([15, 30, 60])},
+            "status": "proposed",
+            "status_history": [{"status": "proposed", "by": a}],
+            "signatures": [],
+        }
+    if kind < 0.85:
+        action, status, previous = rng.choice([("accept", "accepted", "proposed"), ("settle", "settled", "accepted"), ("dispute", "disputed", "accepted")])
+        return {"invoice_id": i, "action": action, "status": status, "previous_status": previous, "seq": rng.randrange(2, 4), "by": b, "note": None}
+    return {
+        "subject_type": "invoice",
+        "subject_id": str(rng.randrange(1, N)),
+        "attestor_org": b,
+        "claims": [{"claim": "quantity_verified", "value": {"received": rng.randrange(500), "expected": rng.randrange(500)}, "confidence": round(rng.random(), 2)}],
+        "weight": 1.0,
+    }
+
+
+def _du(*paths: str) -> int:
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            total += sum(os.path.getsize(os.path.join(path, n)) for n in os.listdir(path))
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+async def run(label: str, codec: PayloadCodec, payloads: dict[str, bytes], segments_dir: str | None) -> None:
+    work = tempfile.mkdtemp(prefix="icn-payloads-")
+    db_path = os.path.join(work, "payloads.db")
+    _, write = create_engines(f"sqlite+aiosqlite:///{db_path}")
+    async with write.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    seg_path = os.path.join(work, "segments") if segments_dir else None
+    store = PayloadStore(codec, SegmentFiles(seg_path, fsync=False) if seg_path else None)
+    before = _du(db_path, *([seg_path] if seg_path else []))
+
+    sessions = async_sessionmaker(bind=write, expire_on_commit=False)
+    items = list(payloads.items())
+    started = time.perf_counter()
+    for i in range(0, len(items), 1000):
+        async with sessions() as session:
+            await store.put_many(session, dict(items[i:i + 1000]))
+            await session.commit()
+    write_s = time.perf_counter() - started
+    await write.dispose()  # last connection out checkpoints the WAL into the file
+    growth = _du(db_path, *([seg_path] if seg_path else [])) - before
+
+    read, _ = create_engines(f"sqlite+aiosqlite:///{db_path}")
+    async with async_sessionmaker(bind=read, expire_on_commit=False)() as session:
+        stats = await store.stats(session)
+        hashes = random.Random(1).sample(list(payloads), 1000)
+        started = time.perf_counter()
+        rounds = 5
+        for _ in range(rounds):
+            got = await store.get_many(session, hashes)
+        read_us = (time.perf_counter() - started) / (rounds * len(hashes)) * 1e6
+        assert all(got[h] == payloads[h] for h in hashes)
+    await read.dispose()
+
+    frames = stats["stored_bytes"]
+    print(
+        f"{label:<26} frames {frames / len(payloads):6.1f} MB/M entries   "
+        f"on disk {growth / len(payloads):6.1f} MB/M entries   write {len(payloads) / write_s:8.0f}/s   "
+        f"get_many {read_us:5.1f} µs/payload"
+    )
+    shutil.rmtree(work)
+
+
+async def main() -> None:
+    rng = random.Random(42)
+    payloads = {}
+    for i in range(N):
+        data = canonicalize_json(_payload(rng, i))
+        payloads[sha256_hex(data)] = data
+    training = [canonicalize_json(_payload(rng, N + i)) for i in range(10000)]
+    raw = sum(len(d) for d in payloads.values())
+    print(f"{len(payloads)} distinct payloads, avg canonical size {raw / len(payloads):.1f} B ({raw / len(payloads):.0f} MB per million entries uncompressed)")
+
+    dictionary = zstandard.train_dictionary(16384, training)
+    for label, codec, segments in (
+        ("zstd-3, db", PayloadCodec(3), None),
+        ("zstd-3 + dict, db", PayloadCodec(3, [dictionary.as_bytes()]), None),
+        ("zstd-3 + dict, segments", PayloadCodec(3, [dictionary.as_bytes()]), "segments"),
+        ("zstd-19 + dict, segments", PayloadCodec(19, [dictionary.as_bytes()]), "segments"),
+    ):
+        await run(label, codec, payloads, segments)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+Micro-benchmark: per-request overhead of the signature middleware.
+
+Run from `icn-node/`:
+
+    python -m bench.signature_middleware
+
+Drives a minimal FastAPI app directly through ASGI (no sockets, no DB: the org
+registry is primed in memory) and reports mean µs/request for a GET and a signed
+POST, with and without `SignatureVerificationMiddleware`. The difference is the
+middleware's cost.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+from fastapi import APIRouter, FastAPI, Request  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from app.middleware.signatures import SignatureVerificationMiddleware  # noqa: E402
+from app.models import Org  # noqa: E402
+from app.services.org_registry import org_registry  # noqa: E402
+from app.utils.crypto import generate_keypair, sign_data  # noqa: E402
+
+try:
+    from app.middleware.signatures import SignedRoute  # noqa: E402
+except ImportError:  # older tree without the single-parse route class
+    SignedRoute = None
+
+
+ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "5000"))
+URN = "urn:coop:bench"
+
+
+class Body(BaseModel):
+    from_org: str
+    to_org: str
+    lines: list[dict]
+    total: float
+
+
+def build_app(with_middleware: bool) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(route_class=SignedRoute) if SignedRoute else APIRouter()
+
+    @router.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @router.post("/echo")
+    async def echo(request: Request, body: Body):
+        return {"total": body.total}
+
+    app.include_router(router)
+    if with_middleware:
+        app.add_middleware(SignatureVerificationMiddleware)
+    return app
+
+
+async def call(app, method: str, path: str, body: bytes, headers: list[tuple[bytes, bytes]]) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app, method, path, body, headers) -> float:
+    for _ in range(200):  # warm-up
+        assert await call(app, method, path, body, headers) == 200
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await call(app, method, path, body, headers)
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+
+async def main() -> None:
+    pub, priv = generate_keypair()
+    org_registry._store(Org(id=1, urn=URN, name="bench", public_key=pub))
+
+    payload = {
+        "from_org": URN,
+        "to_org": "urn:coop:other",
+        "lines": [{"sku": f"sku-{i}", "qty": i, "unit": "kg", "unit_price": 1.5} for i in range(20)],
+        "total": 315.0,
+    }
+    body = json.dumps(payload).encode()
+    post_headers = [
+        (b"content-type", b"application/json"),
+        (b"x-key-id", URN.encode()),
+        (b"x-signature", sign_data(payload, priv).encode()),
+        (b"content-length", str(len(body)).encode()),
+    ]
+
+    bare, signed = build_app(False), build_app(True)
+    for label, method, path, data, headers in (
+        ("GET /ping", "GET", "/ping", b"", []),
+        ("POST /echo (signed)", "POST", "/echo", body, post_headers),
+    ):
+        base = await measure(bare, method, path, data, headers)
+        with_mw = await measure(signed, method, path, data, headers)
+        print(f"{label:<22} bare {base:7.1f} µs   middleware {with_mw:7.1f} µs   overhead {with_mw - base:7.1f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""
+Benchmark: local write latency on the embedded SQLite backend.
+
+Run from `icn-node/` (a scratch file is created and removed):
+
+    python -m bench.sqlite_write
+    SQLITE_SYNCHRONOUS=FULL python -m bench.sqlite_write
+
+Sequential single-client latency (p50/p95/p99, ms) of
+- `audit append`: one chained invoice write through the audit appender on the
+  single writer connection (entity + audit row + every registered hook)
+- `POST /invoices`: the same write through the full HTTP stack via ASGI
+  (signature verification, idempotency store, routing), no sockets
+and the amortised cost per write when `BENCH_CLIENTS` (default 32) clients
+append concurrently and the appender groups them into shared transactions.
+The target is under 1 ms per audit append.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+PATH = os.path.join(tempfile.mkdtemp(prefix="icn-sqlite-"), "icn.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{PATH}"
+
+import httpx  # noqa: E402
+
+from app.db import AsyncSessionFactory, Base, engine, write_engine  # noqa: E402
+from app.main import app  # noqa: E402  (installs every appender hook)
+from app.models import Invoice, Org  # noqa: E402
+from app.services.audit import AuditWrite, audit_appender  # noqa: E402
+from app.utils.crypto import generate_keypair, sign_data  # noqa: E402
+
+
+WRITES = int(os.getenv("BENCH_WRITES", "2000"))
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "32"))
+TARGET_MS = 1.0
+
+
+def _pct(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<14} p50 {_pct(ms, 0.50):6.3f} ms   p95 {_pct(ms, 0.95):6.3f} ms   "
+        f"p99 {_pct(ms, 0.99):6.3f} ms   mean {statistics.fmean(ms):6.3f} ms"
+    )
+
+
+def _invoice(i: int, a: int, b: int, payload: dict, prev_hash, row_hash) -> Invoice:
+    return Invoice(
+        idempotency_key=f"append-{i}",
+        from_org_id=a,
+        to_org_id=b,
+        lines=payload["lines"],
+        total=payload["total"],
+        terms={},
+        status="proposed",
+        status_history=payload["status_history"],
+        signatures=[],
+        prev_hash=prev_hash,
+        row_hash=row_hash,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+    keys = {}
+    async with AsyncSessionFactory() as s:
+        orgs = []
+        for urn in ("urn:coop:bench-a", "urn:coop:bench-b"):
+            pub, priv = generate_keypair()
+            keys[urn] = priv
+            org = Org(urn=urn, name=urn, public_key=pub, org_metadata={})
+            s.add(org)
+            orgs.append(org)
+        await s.commit()
+        a, b = orgs[0].id, orgs[1].id
+    print(f"sqlite {PATH} journal_mode={mode} synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')} writes={WRITES}")
+
+    def write(i: int) -> AuditWrite:
+        payload = {
+            "from_org": "urn:coop:bench-a",
+            "to_org": "urn:coop:bench-b",
+            "lines": [{"sku": "bread", "qty": 1, "unit": "loaf", "unit_price": float(i + 1)}],
+            "total": float(i + 1),
+            "terms": {},
+            "status": "proposed",
+            "status_history": [{"status": "proposed", "by": "urn:coop:bench-a"}],
+            "signatures": [],
+        }
+        return AuditWrite(
+            op_type="create",
+            entity_type="invoice",
+            payload=payload,
+            build=lambda p, r: _invoice(i, a, b, payload, p, r),
+        )
+
+    samples = []
+    for i in range(WRITES):
+        started = time.perf_counter()
+        await audit_appender.append(write(i))
+        samples.append(time.perf_counter() - started)
+    _report("audit append", samples[WRITES // 10:])
+
+    batches = audit_appender.batches
+    started = time.perf_counter()
+    for n in range(WRITES, 2 * WRITES, CLIENTS):
+        await asyncio.gather(*[audit_appender.append(write(i)) for i in range(n, min(n + CLIENTS, 2 * WRITES))])
+    amortised = (time.perf_counter() - started) / WRITES * 1000
+    print(
+        f"{'concurrent':<14} {amortised:6.3f} ms/write amortised, {CLIENTS} clients, "
+        f"{WRITES / (audit_appender.batches - batches):.1f} writes/batch"
+    )
+
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(WRITES):
+            body = {
+                "from_org": "urn:coop:bench-a",
+                "to_org": "urn:coop:bench-b",
+                "lines": [{"sku": "bread", "qty": 2, "unit": "loaf", "unit_price": 3.0}],
+                "total": 6.0 + i,
+                "terms": {},
+                "signatures": [],
+            }
+            headers = {
+                "Content-Type": "application/json",
+                "X-Key-Id": "urn:coop:bench-a",
+                "X-Signature": sign_data(body, keys["urn:coop:bench-a"]),
+                "Idempotency-Key": f"http-{i}",
+            }
+            started = time.perf_counter()
+            r = await client.post("/invoices", content=json.dumps(body), headers=headers)
+            samples.append(time.perf_counter() - started)
+            assert r.status_code == 200, r.text
+    _report("POST /invoices", samples[WRITES // 10:])
+    print(f"amortised audit append {amortised:.3f} ms: {'OK' if amortised < TARGET_MS else 'OVER TARGET'} (target < {TARGET_MS} ms)")
+
+    await audit_appender.close()
+    await engine.dispose()
+    await write_engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(PATH + suffix):
+            os.remove(PATH + suffix)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())